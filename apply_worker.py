@@ -0,0 +1,106 @@
+"""
+Module for running BatchApply on a background thread.
+
+The Tk event loop must never block on an apply, and Tk objects must only be touched from the main
+thread. ApplyWorker runs BatchApply.apply_changes on a daemon thread with a snapshot of plain
+setting values and reports progress, the result or the error through a thread-safe queue that the
+GUI drains with after(). The apply's timing spans are collected in the worker's trace.
+
+A worker created with preview=True runs BatchApply.preview_changes instead, so the GUI can show
+what an apply would change without blocking on parsing files that are not cached yet.
+
+Classes:
+    ApplyWorker: Runs an apply on a background thread and reports through a queue.
+
+Methods (ApplyWorker class):
+    __init__(self, batch_apply, values, schema, preview=False): Initializes the worker with the values to apply.
+    start(self): Starts the background thread.
+    cancel(self): Requests cancellation; files are left untouched if it arrives before commit.
+    poll(self): Returns all messages queued since the last poll.
+    is_running(self): Checks whether the background thread is still running.
+"""
+
+import logging
+import queue
+import threading
+from tracing import Trace
+
+class ApplyWorker:
+    """
+    Runs an apply on a background thread and reports through a queue.
+
+    Messages are (kind, payload) tuples where kind is 'progress' (payload: the progress event
+    dictionary), 'finished' (payload: the apply result, or the preview of a preview worker) or
+    'error' (payload: the exception).
+    """
+
+    def __init__(self, batch_apply, values, schema, preview=False):
+        """
+        Initializes the worker with the values to apply.
+
+        :param batch_apply: The BatchApply instance to run.
+        :param values: A dictionary of plain setting values keyed by setting ID.
+        :param schema: The schema defining the structure of the settings.
+        :param preview: If True, the changes are only previewed and no file is written.
+        """
+        self.batch_apply = batch_apply
+        self.values = values
+        self.schema = schema
+        self.preview = preview
+        self.messages = queue.Queue()
+        self.cancel_event = threading.Event()
+        self.trace = Trace('apply')
+        self._thread = threading.Thread(target=self._run, name="ApplyWorker", daemon=True)
+
+    def start(self):
+        """
+        Starts the background thread.
+        """
+        self._thread.start()
+
+    def cancel(self):
+        """
+        Requests cancellation; files are left untouched if it arrives before commit.
+        """
+        logging.info("Apply cancellation requested")
+        self.cancel_event.set()
+
+    def poll(self):
+        """
+        Returns all messages queued since the last poll.
+
+        :return: A list of (kind, payload) tuples.
+        """
+        messages = []
+        while True:
+            try:
+                messages.append(self.messages.get_nowait())
+            except queue.Empty:
+                return messages
+
+    def is_running(self):
+        """
+        Checks whether the background thread is still running.
+
+        :return: True while the apply is in progress.
+        """
+        return self._thread.is_alive()
+
+    def _run(self):
+        """
+        Thread body: runs the apply or preview and queues its outcome.
+        """
+        try:
+            if self.preview:
+                with self.trace.activate():
+                    result = self.batch_apply.preview_changes(self.values, self.schema)
+            else:
+                result = self.batch_apply.apply_changes(
+                    self.values, self.schema,
+                    progress=lambda event: self.messages.put(('progress', event)),
+                    cancel_event=self.cancel_event,
+                    trace=self.trace
+                )
+            self.messages.put(('finished', result))
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            self.messages.put(('error', e))
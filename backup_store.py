@@ -0,0 +1,326 @@
+"""
+Module providing a content-addressed, deduplicated and compressed backup store.
+
+Before an apply replaces files, the current version of every file about to change is recorded in
+a snapshot. File contents are stored once per distinct SHA-256 digest as gzip-compressed objects,
+so unchanged versions shared by several snapshots cost no extra space. Each snapshot is a small
+JSON manifest naming the objects and the paths they were taken from.
+
+A store may be shared by several threads, e.g. when applying to many servers at once; creating
+snapshots and pruning are serialized so that pruning never removes an object a snapshot being
+written relies on. Stores scoped to one server (see for_scope()) list, count and prune only their
+own snapshots but share the objects, and the lock, of the store they were made from.
+
+Layout inside the backup directory:
+    objects/<first two hex digits>/<sha256>.gz
+    manifests/<snapshot id>.json
+    manifests/<scope>/<snapshot id>.json
+
+Classes:
+    BackupStore: Creates, lists, restores and prunes snapshots.
+
+Methods (BackupStore class):
+    __init__(self, directory, max_snapshots=20, max_age_days=0, compression_level=1): Initializes the store.
+    from_config(config_manager): Creates a store from the 'backup' section of the configuration, or returns None.
+    for_scope(self, scope): Returns a store keeping the snapshots of one server apart from the others.
+    create_snapshot(self, files, label=''): Records the current version of the given files.
+    list_snapshots(self): Returns all snapshot manifests, newest first.
+    restore(self, snapshot_id, safe_writer=None): Restores every file of a snapshot.
+    restore_files(self, manifest, names, safe_writer=None): Puts some files of a snapshot back without snapshotting them first.
+    prune(self): Applies the retention policy and deletes unreferenced objects.
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+
+from safe_writer import SafeWriter
+
+CHUNK_SIZE = 1024 * 1024
+
+class BackupStore:
+    """
+    Creates, lists, restores and prunes snapshots.
+    """
+
+    def __init__(self, directory, max_snapshots=20, max_age_days=0, compression_level=1):
+        """
+        Initializes the store.
+
+        :param directory: The backup directory.
+        :param max_snapshots: The number of snapshots to keep; 0 keeps all.
+        :param max_age_days: Snapshots older than this are pruned; 0 disables age-based pruning.
+        :param compression_level: The gzip compression level (1 is fastest, 9 smallest).
+        """
+        self.directory = directory
+        self.objects_directory = os.path.join(directory, 'objects')
+        self.manifests_directory = os.path.join(directory, 'manifests')
+        self.scope = None
+        self.max_snapshots = max_snapshots
+        self.max_age_days = max_age_days
+        self.compression_level = compression_level
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def from_config(config_manager):
+        """
+        Creates a store from the 'backup' section of the configuration.
+
+        :param config_manager: The configuration manager, or None.
+        :return: A BackupStore, or None if no backup directory is configured.
+        """
+        if config_manager is None:
+            return None
+        directory = config_manager.get_setting('backup.directory', None)
+        if not directory:
+            return None
+        return BackupStore(
+            directory,
+            max_snapshots=config_manager.get_setting('backup.max_snapshots', 20),
+            max_age_days=config_manager.get_setting('backup.max_age_days', 0),
+            compression_level=config_manager.get_setting('backup.compression_level', 1)
+        )
+
+    def for_scope(self, scope):
+        """
+        Returns a store keeping the snapshots of one server apart from the others.
+
+        The scoped store uses the same directory, objects and retention policy, but its snapshots
+        are listed, counted and pruned separately, so pruning for one server never evicts the
+        snapshots of another.
+
+        :param scope: The name of the scope, e.g. a server profile name.
+        :return: The scoped BackupStore.
+        :raises ValueError: If the name cannot be used as a directory name.
+        """
+        if not scope or scope in ('.', '..') or any(sep and sep in scope for sep in (os.sep, os.altsep)):
+            raise ValueError(f"Invalid backup scope: {scope!r}")
+        store = BackupStore(self.directory, self.max_snapshots, self.max_age_days,
+                            self.compression_level)
+        store.manifests_directory = os.path.join(self.directory, 'manifests', scope)
+        store.scope = scope
+        # Creating a snapshot in one scope and pruning objects in another must not interleave
+        store._lock = self._lock
+        return store
+
+    def _referenced_objects(self):
+        """Return the digests of the objects referenced by the snapshots of every scope."""
+        referenced = set()
+        for directory, _, file_names in os.walk(os.path.join(self.directory, 'manifests')):
+            for file_name in file_names:
+                if not file_name.endswith('.json'):
+                    continue
+                try:
+                    with open(os.path.join(directory, file_name), 'r', encoding='utf-8') as file:
+                        manifest = json.load(file)
+                except (IOError, json.JSONDecodeError) as e:
+                    # Keep every object rather than delete one an unreadable manifest may need
+                    logging.error("Failed to read backup manifest %s: %s", file_name, e)
+                    return None
+                referenced.update(entry['sha256'] for entry in manifest['files'].values())
+        return referenced
+
+    def _object_path(self, digest):
+        """Return the path of the object with the given digest."""
+        return os.path.join(self.objects_directory, digest[:2], f"{digest}.gz")
+
+    def _manifest_path(self, snapshot_id):
+        """Return the path of the manifest with the given snapshot ID."""
+        return os.path.join(self.manifests_directory, f"{snapshot_id}.json")
+
+    @staticmethod
+    def _digest(file_path):
+        """Return the SHA-256 hex digest of a file, read in chunks."""
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as file:
+            for chunk in iter(lambda: file.read(CHUNK_SIZE), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _store_object(self, file_path):
+        """
+        Stores a file's content as an object unless an identical one exists.
+
+        :param file_path: The file to store.
+        :return: The (digest, stored) pair; stored is False for deduplicated content.
+        """
+        digest = self._digest(file_path)
+        object_path = self._object_path(digest)
+        if os.path.exists(object_path):
+            return digest, False
+
+        os.makedirs(os.path.dirname(object_path), exist_ok=True)
+        temp_path = f"{object_path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(file_path, 'rb') as source, \
+                    gzip.open(temp_path, 'wb', compresslevel=self.compression_level) as target:
+                shutil.copyfileobj(source, target, CHUNK_SIZE)
+            os.replace(temp_path, object_path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return digest, True
+
+    def create_snapshot(self, files, label=''):
+        """
+        Records the current version of the given files.
+
+        :param files: A mapping of relative file names to the resolved paths to back up.
+                      Files that do not exist are skipped.
+        :param label: A description shown when listing snapshots.
+        :return: The snapshot manifest, or None if none of the files exist.
+        """
+        with self._lock:
+            created = time.time()
+            snapshot_id = f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(created))}-{uuid.uuid4().hex[:6]}"
+            entries = {}
+            stored = 0
+            for name, file_path in files.items():
+                if not os.path.exists(file_path):
+                    continue
+                digest, is_new = self._store_object(file_path)
+                stored += is_new
+                entries[name] = {
+                    'path': os.path.abspath(file_path),
+                    'sha256': digest,
+                    'size': os.path.getsize(file_path)
+                }
+            if not entries:
+                return None
+
+            manifest = {'id': snapshot_id, 'created': created, 'label': label, 'files': entries}
+            os.makedirs(self.manifests_directory, exist_ok=True)
+            manifest_path = self._manifest_path(snapshot_id)
+            with open(manifest_path, 'w', encoding='utf-8') as file:
+                json.dump(manifest, file, ensure_ascii=False, indent=4)
+            # The modification time lets prune() order and age snapshots without parsing them
+            os.utime(manifest_path, (created, created))
+            logging.info("Backup snapshot %s created: %d file(s), %d new object(s)",
+                         snapshot_id, len(entries), stored)
+            return manifest
+
+    def list_snapshots(self):
+        """
+        Returns all snapshot manifests, newest first.
+
+        :return: A list of manifest dictionaries.
+        """
+        if not os.path.isdir(self.manifests_directory):
+            return []
+        manifests = []
+        for file_name in os.listdir(self.manifests_directory):
+            if not file_name.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.manifests_directory, file_name), 'r', encoding='utf-8') as file:
+                    manifests.append(json.load(file))
+            except (IOError, json.JSONDecodeError) as e:
+                logging.error("Failed to read backup manifest %s: %s", file_name, e)
+        manifests.sort(key=lambda manifest: manifest['created'], reverse=True)
+        return manifests
+
+    def restore(self, snapshot_id, safe_writer=None):
+        """
+        Restores every file of a snapshot.
+
+        The current versions are snapshotted first, so a restore can itself be undone. Each
+        object is decompressed once, streamed into a temporary file and swapped into place.
+
+        :param snapshot_id: The ID of the snapshot to restore.
+        :param safe_writer: The SafeWriter used to replace files.
+        :return: The list of restored file paths.
+        :raises FileNotFoundError: If the snapshot or one of its objects does not exist.
+        """
+        safe_writer = safe_writer or SafeWriter()
+        with open(self._manifest_path(snapshot_id), 'r', encoding='utf-8') as file:
+            manifest = json.load(file)
+        for entry in manifest['files'].values():
+            if not os.path.exists(self._object_path(entry['sha256'])):
+                raise FileNotFoundError(f"Backup object missing: {entry['sha256']}")
+
+        self.create_snapshot(
+            {name: entry['path'] for name, entry in manifest['files'].items()},
+            label=f"Before restoring {snapshot_id}"
+        )
+        restored = self.restore_files(manifest, manifest['files'], safe_writer)
+        logging.info("Backup snapshot %s restored: %d file(s)", snapshot_id, len(restored))
+        return restored
+
+    def restore_files(self, manifest, names, safe_writer=None):
+        """
+        Puts some files of a snapshot back without snapshotting their current versions first,
+        e.g. to roll back files replaced by an apply that failed partway.
+
+        :param manifest: The snapshot manifest, e.g. as returned by create_snapshot().
+        :param names: The relative file names to restore; names not in the snapshot are skipped.
+        :param safe_writer: The SafeWriter used to replace files.
+        :return: The list of restored file paths.
+        :raises FileNotFoundError: If an object of the snapshot does not exist.
+        """
+        safe_writer = safe_writer or SafeWriter()
+        restored = []
+        for name in names:
+            entry = manifest['files'].get(name)
+            if entry is None:
+                continue
+            temp_path = safe_writer.create_temp(entry['path'])
+            try:
+                with gzip.open(self._object_path(entry['sha256']), 'rb') as source, \
+                        open(temp_path, 'wb') as target:
+                    shutil.copyfileobj(source, target, CHUNK_SIZE)
+                safe_writer.finish_temp(temp_path, entry['path'])
+                safe_writer.commit(temp_path, entry['path'])
+            except Exception:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                raise
+            restored.append(entry['path'])
+        return restored
+
+    def prune(self):
+        """
+        Applies the retention policy and deletes objects no snapshot references.
+
+        Only the snapshots of this store's scope are counted and aged; objects are deleted once no
+        snapshot of any scope references them. Snapshots are ordered and aged by their manifest's
+        modification time, so manifests are only parsed when something has to be removed.
+
+        :return: The IDs of the removed snapshots.
+        """
+        with self._lock:
+            if not os.path.isdir(self.manifests_directory):
+                return []
+            manifests = []
+            for file_name in os.listdir(self.manifests_directory):
+                path = os.path.join(self.manifests_directory, file_name)
+                if file_name.endswith('.json') and os.path.isfile(path):
+                    manifests.append((os.path.getmtime(path), file_name[:-5]))
+            manifests.sort(reverse=True)
+
+            removed = []
+            cutoff = time.time() - self.max_age_days * 86400 if self.max_age_days else None
+            for position, (created, snapshot_id) in enumerate(manifests):
+                too_many = self.max_snapshots and position >= self.max_snapshots
+                too_old = cutoff is not None and created < cutoff
+                if too_many or too_old:
+                    os.remove(self._manifest_path(snapshot_id))
+                    removed.append(snapshot_id)
+            if not removed:
+                return removed
+
+            referenced = self._referenced_objects()
+            if referenced is not None and os.path.isdir(self.objects_directory):
+                for prefix in os.listdir(self.objects_directory):
+                    prefix_directory = os.path.join(self.objects_directory, prefix)
+                    for file_name in os.listdir(prefix_directory):
+                        if file_name.endswith('.gz') and file_name[:-3] not in referenced:
+                            os.remove(os.path.join(prefix_directory, file_name))
+            logging.info("Pruned %d backup snapshot(s)", len(removed))
+            return removed
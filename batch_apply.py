@@ -2,39 +2,104 @@
 BatchApply module for applying configuration settings to JSON files.
 
 This module contains the BatchApply class, which handles the batch application of configuration
-settings to JSON files. It includes methods for resolving file paths, applying changes, and
-handling complex settings.
+settings to JSON files. Values are first coerced to their declared types and validated against
+their bounds, so invalid input is rejected before any file is opened. Simple and complex changes
+are then grouped by target file so that every file is parsed once, mutated in memory by all of its
+changes, and serialized once. Files without an effective change are skipped, and changed scalar
+values are patched into the original text instead of re-serializing the whole document.
+
+preview_changes() plans the same changes without staging or writing anything: it reports the old
+and new value of every simple change, the number of records every bulk complex change would touch
+and the estimated size of every file that would be written, reading the documents through the
+document cache. A dry run of apply_changes() is built from it, so it never writes to disk.
 
 Classes:
     BatchApply: Handles the batch application of configuration settings to JSON files.
+    ApplyCancelled: Raised when an apply is cancelled before any file was modified.
+
+Functions:
+    _notify(progress, event, **fields): Sends a progress event to an optional callback.
+    _stage_in_worker(file_path, changes): Stages one file's changes inside a worker process.
 
 Methods (BatchApply class):
-    __init__(self, config_manager): Initializes BatchApply with a configuration manager.
+    __init__(self, config_manager, document_cache=None, workers=None, paths=None, backup_store=None): Initializes BatchApply with a configuration manager.
     resolve_full_path(self, file_path): Resolves the full file path based on the base directory.
-    apply_changes(self, settings, schema): Apply changes to configuration files based on settings and schema.
-    handle_complex_settings(self, settings, schema): Handle specific complex settings like Ammo Stack Size.
-    organize_changes_by_file(self, settings, schema): Organize changes by file based on settings and schema.
+    apply_changes(self, settings, schema, progress=None, cancel_event=None, dry_run=False, file_changes=None, trace=None): Apply changes to configuration files based on settings and schema.
+    preview_changes(self, settings, schema, file_changes=None): Compute what an apply would change without writing anything.
+    plan_file_changes(self, file_path, changes): Plan all changes for one file without modifying it.
+    stage_file_changes(self, file_path, changes, trie=None): Apply all changes for one file in a single pass and stage the result.
+    commit_staged(self, staged, pending, file_changes): Replace target files with their staged copies.
+    discard_staged(self, staged): Remove staged temporary files after a failure.
+    write_document(self, target_path, text, data, assignments): Patch changed values in place or rewrite the document.
+    apply_simple_changes(self, data, changes, assignments=None, trie=None): Apply all simple changes of a file in one pass over its document.
+    apply_simple_change(self, data, change, assignments=None): Apply a single simple change to a loaded JSON document.
+    organize_changes_by_file(self, settings, schema): Organize simple and complex changes by file.
 """
 
+import contextlib
 import json
 import os
 import logging
-import tkinter as tk
+import time
+from concurrent.futures import CancelledError, ProcessPoolExecutor
 from complex_config_handler import ComplexConfigHandler
+from item_template_index import ItemTemplateIndex
+from json_patcher import JsonPatcher
+from change_plan import ChangePlan, MISSING
+from document_cache import DocumentCache, get_document_cache
+from safe_writer import SafeWriter
+from backup_store import BackupStore
+from schema_index import get_schema_index, resolve_path
+from key_path_trie import KeyPathTrie, parse_key_path
+from tracing import Trace, span, add_events
+from logger_setup import TRACE
+
+class ApplyCancelled(Exception):
+    """
+    Raised when an apply is cancelled before any file was modified.
+    """
+
+def _notify(progress, event, **fields):
+    """
+    Sends a progress event to an optional callback.
+
+    :param progress: The progress callable or None.
+    :param event: The event name.
+    :param fields: Additional event fields.
+    """
+    if progress is not None:
+        progress({'event': event, **fields})
 
 class BatchApply:
     """
     Class to handle the batch application of configuration settings.
     """
 
-    def __init__(self, config_manager):
+    def __init__(self, config_manager, document_cache=None, workers=None, paths=None,
+                 backup_store=None):
         """
         Initialize BatchApply with a configuration manager.
 
         :param config_manager: The configuration manager instance.
+        :param document_cache: The DocumentCache to load files through; defaults to the
+                               process-wide cache.
+        :param workers: The number of worker processes, overriding 'apply.workers'.
+        :param paths: A dictionary with the 'server_database' and 'server_config' directories of
+                      the server to apply to; defaults to the 'paths' section.
+        :param backup_store: The BackupStore to snapshot files into; defaults to the one
+                             configured in the 'backup' section.
         """
         self.config_manager = config_manager
-        self.complex_handler = ComplexConfigHandler(config_manager)
+        self.workers = workers
+        self.paths = paths
+        self.document_cache = document_cache or get_document_cache()
+        self.safe_writer = SafeWriter()
+        self.backup_store = backup_store or BackupStore.from_config(config_manager)
+        self.complex_handler = ComplexConfigHandler(
+            config_manager, self.document_cache, self.safe_writer, self.backup_store
+        )
+        # Relative file path -> (file signature, requested values) from the last apply
+        self.applied_snapshots = {}
 
     def resolve_full_path(self, file_path):
         """
@@ -44,105 +109,661 @@ class BatchApply:
         :return: The full file path.
         :raises ValueError: If the base directory is unknown.
         """
-        file_base = file_path.split('/', 1)[0]
-        if file_base == 'database':
-            base_path = self.config_manager.get_setting('paths.server_database')
-        elif file_base == 'configs':
-            base_path = self.config_manager.get_setting('paths.server_config')
-        else:
-            raise ValueError(f"Unknown base directory for file path: {file_path}")
+        return resolve_path(file_path, self._base_paths())
 
-        return os.path.join(base_path, file_path.split('/', 1)[1])
+    def _base_paths(self):
+        """
+        Return the server directories to apply to.
 
-    def apply_changes(self, settings, schema):
+        :return: A dictionary with the 'server_database' and 'server_config' directories.
+        """
+        if self.paths is not None:
+            return self.paths
+        return {name: self.config_manager.get_setting(f'paths.{name}')
+                for name in ('server_database', 'server_config')}
+
+    def apply_changes(self, settings, schema, progress=None, cancel_event=None, dry_run=False,
+                      file_changes=None, trace=None):
         """
         Apply changes to configuration files based on settings and schema.
 
-        :param settings: The settings to apply.
+        Every target file is loaded once, all simple and complex changes for it are applied
+        to the in-memory document, and the result is staged to a temporary file once. Files
+        whose values already match the settings are not rewritten; files that are unchanged on
+        disk since they were last applied with the same values are not even parsed. Staged
+        files only replace their targets once every file has been staged successfully, so a
+        failure leaves all files untouched.
+
+        With more than one worker configured in 'apply.workers', files are staged in parallel
+        by a process pool.
+
+        :param settings: The plain values to apply, keyed by setting ID.
         :param schema: The schema defining the structure of the settings.
+        :param progress: An optional callable receiving progress event dictionaries: 'started'
+                         (with 'file', 'index' and 'total'), 'written' (with 'file' and 'bytes'),
+                         'done' (with 'file') and 'committed'. It may be called from a worker
+                         thread, so it must not touch Tk widgets directly.
+        :param cancel_event: An optional threading.Event; once set, the apply stops before the
+                             commit and raises ApplyCancelled, leaving every file untouched.
+        :param dry_run: If True, the changes are only planned with preview_changes(), so nothing
+                        is staged or written, not even temporary files; the result reports the
+                        files that would be touched.
+        :param file_changes: The changes from organize_changes_by_file, if they were already
+                             organized for another server; settings are then ignored.
+        :param trace: An optional tracing.Trace receiving timing spans of the organize, parse,
+                      mutate, write, backup and commit phases, including those of worker
+                      processes.
+        :return: A dictionary with the 'touched' and 'skipped' relative file paths, per-file
+                 'timings' ('parse', 'mutate' and 'write' seconds) for touched files, the total
+                 'bytes' staged and the number of 'workers' used. A dry run has no timings,
+                 reports the estimated 'bytes', and adds the number of changed 'values' and the
+                 plan of every touched file under 'files' (see plan_file_changes()).
+        :raises ValidationError: If a value does not match its setting's type or bounds; no file
+                                 was opened.
+        :raises ApplyCancelled: If cancel_event was set before the commit.
         :raises Exception: If an error occurs during the application of changes.
         """
-        try:
-            # Handle complex configurations specifically
-            self.handle_complex_settings(settings, schema)
+        activation = trace.activate() if trace is not None else contextlib.nullcontext()
+        with activation, span('apply', dry_run=dry_run):
+            if dry_run:
+                return self._dry_run(settings, schema, file_changes)
+            return self._apply_changes(settings, schema, progress, cancel_event, file_changes)
+
+    def _dry_run(self, settings, schema, file_changes):
+        """
+        Report what apply_changes() would change without writing anything; see apply_changes().
+        """
+        preview = self.preview_changes(settings, schema, file_changes)
+        result = {'touched': list(preview['files']), 'skipped': preview['unchanged'],
+                  'timings': {}, 'bytes': preview['bytes'], 'workers': 1,
+                  'values': preview['values'], 'files': preview['files']}
+        logging.info("Dry run finished: %d file(s) would be touched, %d skipped",
+                     len(result['touched']), len(result['skipped']))
+        return result
 
-            # Handle simple configurations
-            file_changes = self.organize_changes_by_file(settings, schema)
+    def _apply_changes(self, settings, schema, progress, cancel_event, file_changes):
+        """
+        Apply changes to configuration files; see apply_changes().
+        """
+        result = {'touched': [], 'skipped': [], 'timings': {}, 'bytes': 0, 'workers': 1}
+        staged = {}
+        try:
+            with span('organize'):
+                self.complex_handler.prepare(schema)
+                if file_changes is None:
+                    file_changes = self.organize_changes_by_file(settings, schema)
+                schema_index = get_schema_index(schema)
+                file_paths = schema_index.file_paths(self._base_paths())
 
+            pending = {}
             for relative_path, changes in file_changes.items():
-                try:
-                    file_path = self.resolve_full_path(relative_path)
-                    logging.debug("Applying changes to %s", file_path)
-
-                    # Load current content of the JSON file
-                    with open(file_path, 'r', encoding='utf-8') as file:
-                        data = json.load(file)
-
-                    # Apply changes
-                    for change in changes:
-                        keys = change['key_path'].split('.')
-                        d = data
-                        for key in keys[:-1]:
-                            if key not in d:
-                                d[key] = {}
-                            d = d[key]
-                        d[keys[-1]] = change['value']
-                        logging.debug(
-                            "Applied change for %s - %s: %s",
-                            file_path, change['key_path'], change['value']
-                        )
-
-                    # Write modified content back to the JSON file
-                    with open(file_path, 'w', encoding='utf-8') as file:
-                        json.dump(data, file, ensure_ascii=False, indent=4)
-
-                    logging.info("Changes applied for %s", file_path)
-
-                except FileNotFoundError:
-                    logging.error("File not found: %s", file_path)
-                    raise  # Re-raise the exception to stop the process
-                except json.JSONDecodeError:
-                    logging.error("Error decoding JSON from file: %s", file_path)
-                    raise  # Re-raise the exception to stop the process
-                except Exception as e:
-                    logging.error("Unexpected error applying changes to %s: %s", relative_path, e)
-                    raise  # Re-raise the exception to stop the process
+                file_path = file_paths.get(relative_path) or self.resolve_full_path(relative_path)
+                requested = self._requested_values(changes)
+                if self._unchanged_since_last_apply(file_path, relative_path, requested):
+                    logging.debug("Skipping %s: unchanged since last apply", file_path)
+                    result['skipped'].append(relative_path)
+                else:
+                    pending[relative_path] = (file_path, changes)
+
+            workers = min(self._configured_workers(), len(pending))
+            if workers > 1:
+                result['workers'] = workers
+                staged = self._stage_in_process_pool(pending, workers, progress, cancel_event)
+            else:
+                for index, (relative_path, (file_path, changes)) in enumerate(pending.items()):
+                    self._check_cancelled(cancel_event)
+                    _notify(progress, 'started', file=relative_path, index=index, total=len(pending))
+                    with span('stage', file=relative_path):
+                        staged[relative_path] = self._stage_or_raise(
+                            relative_path, file_path, changes,
+                            schema_index.key_path_trie(relative_path))
+                    self._notify_staged(progress, relative_path, staged[relative_path])
+
+            self._check_cancelled(cancel_event)
+            self.commit_staged(staged, pending, file_changes)
+            _notify(progress, 'committed')
+            for relative_path in pending:
+                if staged[relative_path] is None:
+                    result['skipped'].append(relative_path)
+                else:
+                    result['touched'].append(relative_path)
+                    result['timings'][relative_path] = staged[relative_path]['timings']
+                    result['bytes'] += staged[relative_path]['bytes']
 
         except Exception as e:
+            self.discard_staged(staged)
             logging.error("Error applying changes: %s", e)
             raise  # Re-raise the exception to be handled by the caller
 
-    def handle_complex_settings(self, settings, schema):
+        logging.info("Apply finished: %d file(s) touched, %d skipped",
+                     len(result['touched']), len(result['skipped']))
+        return result
+
+    def preview_changes(self, settings, schema, file_changes=None):
         """
-        Handle specific complex settings like Ammo Stack Size.
+        Compute what apply_changes() would change, without staging or writing anything.
 
-        :param settings: The settings to handle.
+        Values are validated exactly as for an apply. Documents are read through the document
+        cache and are not modified, so previewing files that were loaded before is near-instant.
+
+        :param settings: The plain values to apply, keyed by setting ID.
         :param schema: The schema defining the structure of the settings.
+        :param file_changes: The changes from organize_changes_by_file, if they were already
+                             organized; settings are then ignored.
+        :return: A dictionary with the plan of every file that would change under 'files' (see
+                 plan_file_changes()) in schema order, the relative paths of the 'unchanged'
+                 files, and the total number of changed 'values' and estimated 'bytes' to write.
+        :raises ValidationError: If a value does not match its setting's type or bounds.
+        :raises Exception: If a target file cannot be read or parsed.
+        """
+        preview = {'files': {}, 'unchanged': [], 'values': 0, 'bytes': 0}
+        with span('preview'):
+            self.complex_handler.prepare(schema)
+            if file_changes is None:
+                file_changes = self.organize_changes_by_file(settings, schema)
+            file_paths = get_schema_index(schema).file_paths(self._base_paths())
+
+            for relative_path, changes in file_changes.items():
+                file_path = file_paths.get(relative_path) or self.resolve_full_path(relative_path)
+                if self._unchanged_since_last_apply(file_path, relative_path,
+                                                    self._requested_values(changes)):
+                    preview['unchanged'].append(relative_path)
+                    continue
+                file_plan = self.plan_file_changes(file_path, changes)
+                if file_plan is None:
+                    preview['unchanged'].append(relative_path)
+                    continue
+                preview['files'][relative_path] = file_plan
+                preview['values'] += file_plan['values']
+                preview['bytes'] += file_plan['bytes']
+
+        logging.info("Preview: %d file(s) would change (%d value(s), about %d bytes), %d unchanged",
+                     len(preview['files']), preview['values'], preview['bytes'],
+                     len(preview['unchanged']))
+        return preview
+
+    def plan_file_changes(self, file_path, changes):
+        """
+        Plan all changes for one file without modifying its document.
+
+        :param file_path: The resolved path of the file.
+        :param changes: The changes for this file from organize_changes_by_file.
+        :return: A dictionary with the 'file_path', the simple 'changes' as (key_path, whether
+                 the key exists, old value, new value) tuples, the bulk complex changes under
+                 'bulk' as dictionaries with the 'key_path', the setting's 'label', the new
+                 'value' and the number of changed 'records', the total number of changed
+                 'values' and the estimated 'bytes' of the written file, or None if the file
+                 would not change. The old value of a key that does not exist yet is None, which
+                 the existence flag tells apart from a JSON null.
+        """
+        with span('parse', file=file_path):
+            data = self.document_cache.load(file_path)
+
+        with span('plan', file=file_path, changes=len(changes)):
+            plan = ChangePlan(data)
+            bulk = []
+            index = None
+            for change in changes:
+                if change['complex']:
+                    if index is None:
+                        index = ItemTemplateIndex(data)
+                    records = self.complex_handler.plan_complex_change(data, change, plan, index)
+                    if records:
+                        bulk.append({'key_path': change['key_path'],
+                                     'label': change['setting'].get('label', change['key_path']),
+                                     'value': change['value'], 'records': records})
+            # Simple changes are applied after complex ones, see stage_file_changes()
+            for change in changes:
+                if not change['complex']:
+                    plan.assign(change.get('keys') or parse_key_path(change['key_path']),
+                                change['value'])
+
+            simple_changes = []
+            for change in changes:
+                if change['complex']:
+                    continue
+                planned = plan.diff(change.get('keys') or parse_key_path(change['key_path']))
+                if planned is not None:
+                    old, new = planned
+                    exists = old is not MISSING
+                    simple_changes.append((change['key_path'], exists, old if exists else None,
+                                           new))
+
+            values = sum(1 for keys in plan.values if plan.diff(keys) is not None)
+            if not values:
+                return None
+            return {
+                'file_path': file_path,
+                'changes': simple_changes,
+                'bulk': bulk,
+                'values': values,
+                'bytes': plan.estimate_bytes(os.path.getsize(file_path))
+            }
+
+    def _stage_or_raise(self, relative_path, file_path, changes, trie=None):
+        """
+        Stage one file in this process, logging errors before re-raising them.
+
+        :return: The staged file dictionary or None.
+        """
+        try:
+            return self.stage_file_changes(file_path, changes, trie)
+        except FileNotFoundError:
+            logging.error("File not found: %s", file_path)
+            raise  # Re-raise the exception to stop the process
+        except json.JSONDecodeError:
+            logging.error("Error decoding JSON from file: %s", file_path)
+            raise  # Re-raise the exception to stop the process
+        except Exception as e:
+            logging.error("Unexpected error applying changes to %s: %s", relative_path, e)
+            raise  # Re-raise the exception to stop the process
+
+    def _stage_in_process_pool(self, pending, workers, progress=None, cancel_event=None):
+        """
+        Stage files in parallel worker processes.
+
+        Every file is staged even if another one fails, so that results and errors are
+        aggregated in schema order regardless of completion order. Cancellation drops jobs
+        that have not started yet and discards everything already staged.
+
+        :param pending: A mapping of relative paths to (resolved path, changes) tuples.
+        :param workers: The number of worker processes.
+        :param progress: An optional progress callable, see apply_changes().
+        :param cancel_event: An optional threading.Event requesting cancellation.
+        :return: A mapping of relative paths to staged file dictionaries or None.
+        :raises ApplyCancelled: If cancel_event was set while staging.
+        :raises Exception: The error of the first failing file in schema order.
+        """
+        logging.debug("Staging %d file(s) with %d worker processes", len(pending), workers)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {}
+            for index, (relative_path, (file_path, changes)) in enumerate(pending.items()):
+                futures[relative_path] = executor.submit(_stage_in_worker, file_path, changes)
+                _notify(progress, 'started', file=relative_path, index=index, total=len(pending))
+            staged = {}
+            errors = []
+            for relative_path, future in futures.items():
+                if cancel_event is not None and cancel_event.is_set():
+                    for other in futures.values():
+                        other.cancel()
+                try:
+                    staged[relative_path] = future.result()
+                    if staged[relative_path] is not None:
+                        add_events(staged[relative_path].pop('spans', None))
+                    self._notify_staged(progress, relative_path, staged[relative_path])
+                except CancelledError:
+                    continue
+                except Exception as e:  # pylint: disable=broad-exception-caught
+                    logging.error("Error staging changes for %s: %s", relative_path, e)
+                    errors.append(e)
+
+        if errors or (cancel_event is not None and cancel_event.is_set()):
+            self.discard_staged(staged)
+            self._check_cancelled(cancel_event)
+            raise errors[0]
+
+        # Worker processes modified their own copies; the cached documents here are stale
+        for relative_path, (file_path, _) in pending.items():
+            if staged[relative_path] is not None:
+                self.document_cache.invalidate(file_path)
+        return staged
+
+    @staticmethod
+    def _check_cancelled(cancel_event):
+        """
+        Raise ApplyCancelled if cancellation was requested.
+
+        :param cancel_event: An optional threading.Event.
+        :raises ApplyCancelled: If the event is set.
+        """
+        if cancel_event is not None and cancel_event.is_set():
+            logging.info("Apply cancelled before commit; no files were modified")
+            raise ApplyCancelled("Apply was cancelled; no files were modified.")
+
+    @staticmethod
+    def _notify_staged(progress, relative_path, entry):
+        """Report the 'written' and 'done' progress events for a staged file."""
+        if entry is not None:
+            _notify(progress, 'written', file=relative_path, bytes=entry['bytes'])
+        _notify(progress, 'done', file=relative_path)
+
+    def _configured_workers(self):
         """
-        self.complex_handler.update_ammo_stack_size(settings, schema)
+        Return the number of apply worker processes from the 'apply.workers' setting, unless
+        overridden when constructing BatchApply.
+
+        :return: The worker count; 0 means one per CPU.
+        """
+        workers = self.workers
+        if workers is None:
+            workers = self.config_manager.get_setting('apply.workers', 1)
+        if workers == 0:
+            workers = os.cpu_count() or 1
+        return max(1, int(workers))
+
+    @staticmethod
+    def _requested_values(changes):
+        """Return the values requested by a file's changes, keyed by key path and kind."""
+        return {(change['key_path'], change['complex']): change['value'] for change in changes}
+
+    def _unchanged_since_last_apply(self, file_path, relative_path, requested):
+        """Check whether a file is unchanged since it was last applied with the same values."""
+        snapshot = self.applied_snapshots.get(relative_path)
+        return snapshot is not None and snapshot[1] == requested \
+            and snapshot[0] == self._file_signature(file_path)
+
+    def stage_file_changes(self, file_path, changes, trie=None):
+        """
+        Apply all changes for one file with a single parse and stage the result.
+
+        The modified document is written and fsynced to a temporary file next to the target;
+        the target itself is only replaced by commit_staged().
+
+        :param file_path: The resolved path of the file.
+        :param changes: The changes for this file from organize_changes_by_file.
+        :param trie: The file's KeyPathTrie from SchemaIndex.key_path_trie(); compiled from the
+                     changes if not given.
+        :return: A dictionary with the 'file_path', 'temp_path', the staged size in 'bytes', the
+                 modified 'document' and the 'parse', 'mutate' and 'write' 'timings', or None if
+                 the file had no effective change.
+        """
+        logging.debug("Applying changes to %s", file_path)
+
+        # Load current content of the JSON file, reusing the parsed document if unchanged
+        started = time.perf_counter()
+        with span('parse', file=file_path):
+            data = self.document_cache.load(file_path)
+        parsed = time.perf_counter()
+
+        # Apply complex and then simple changes to the in-memory document, recording every
+        # changed value, so a simple setting of one record overrides a bulk setting. Complex
+        # changes share one template index built for this document.
+        assignments = {}
+        temp_path = None
+        try:
+            with span('mutate', file=file_path, changes=len(changes)):
+                index = None
+                for change in changes:
+                    if change['complex']:
+                        if index is None:
+                            with span('index_items', file=file_path):
+                                index = ItemTemplateIndex(data)
+                        self.complex_handler.apply_complex_change(data, change, index, assignments)
+                self.apply_simple_changes(data, changes, assignments, trie)
+            mutated = time.perf_counter()
+
+            if not assignments:
+                logging.debug("Skipping %s: values already match", file_path)
+                return None
+
+            # Stage the modified content next to the JSON file
+            with span('write', file=file_path, values=len(assignments)):
+                # newline='' keeps line endings as they are, so CRLF files stay CRLF
+                with open(file_path, 'r', encoding='utf-8', newline='') as file:
+                    text = file.read()
+                temp_path = self.safe_writer.create_temp(file_path)
+                self.write_document(temp_path, text, data, assignments)
+                self.safe_writer.finish_temp(temp_path, file_path)
+                written_bytes = os.path.getsize(temp_path)
+            written = time.perf_counter()
+        except Exception:
+            # The cached document may be partially modified and no longer matches the file
+            self.document_cache.invalidate(file_path)
+            if temp_path is not None and os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        logging.info(
+            "Changes staged for %s: %d value(s) (parse %.3fs, mutate %.3fs, write %.3fs)",
+            file_path, len(assignments), parsed - started, mutated - parsed, written - mutated
+        )
+        return {
+            'file_path': file_path,
+            'temp_path': temp_path,
+            'bytes': written_bytes,
+            'document': data,
+            'timings': {
+                'parse': parsed - started,
+                'mutate': mutated - parsed,
+                'write': written - mutated
+            }
+        }
+
+    def commit_staged(self, staged, pending, file_changes):
+        """
+        Replace every target file with its staged copy and record the applied snapshots.
+
+        The previous versions of all replaced targets are recorded in one backup snapshot
+        before the first of them is replaced, and the backup retention policy is applied
+        afterwards. Without a backup store, the previous versions are kept in memory instead.
+        If replacing a file fails, e.g. because it is locked, the files already replaced are
+        put back from those previous versions before the error is re-raised, so either every
+        target is replaced or none is.
+
+        :param staged: A mapping of relative paths to staged file dictionaries or None.
+        :param pending: A mapping of relative paths to (resolved path, changes) tuples.
+        :param file_changes: The changes per relative path from organize_changes_by_file.
+        """
+        replaced = {relative_path: file_path for relative_path, (file_path, _) in pending.items()
+                    if staged[relative_path] is not None}
+        manifest = None
+        originals = {}
+        if self.backup_store is not None:
+            if replaced:
+                with span('backup', files=len(replaced)):
+                    manifest = self.backup_store.create_snapshot(
+                        replaced, label=f"Apply of {len(replaced)} file(s)")
+        else:
+            for relative_path, file_path in replaced.items():
+                with open(file_path, 'rb') as file:
+                    originals[relative_path] = file.read()
+
+        committed = {}
+        with span('commit'):
+            try:
+                for relative_path, (file_path, _) in pending.items():
+                    entry = staged[relative_path]
+                    if entry is not None:
+                        self.safe_writer.commit(entry['temp_path'], file_path)
+                        committed[relative_path] = file_path
+                        entry['temp_path'] = None
+                        if entry.get('document') is not None:
+                            self.document_cache.store(file_path, entry['document'])
+                        logging.info("Changes applied for %s", file_path)
+                    self.applied_snapshots[relative_path] = (
+                        self._file_signature(file_path),
+                        self._requested_values(file_changes[relative_path])
+                    )
+            except Exception as e:
+                logging.error("Replacing the files failed (%s); rolling back %d replaced file(s)",
+                              e, len(committed))
+                self._roll_back(committed, manifest, originals)
+                for relative_path in pending:
+                    self.applied_snapshots.pop(relative_path, None)
+                raise
+        if self.backup_store is not None:
+            with span('prune'):
+                self.backup_store.prune()
+
+    def _roll_back(self, committed, manifest, originals):
+        """
+        Put the previous versions of files replaced by a failed commit back.
+
+        :param committed: A mapping of the relative paths of the replaced files to their paths.
+        :param manifest: The backup snapshot taken before the commit, or None.
+        :param originals: The previous contents keyed by relative path, used without a snapshot.
+        """
+        for relative_path, file_path in committed.items():
+            self.document_cache.invalidate(file_path)
+            if manifest is not None:
+                self.backup_store.restore_files(manifest, [relative_path], self.safe_writer)
+            elif relative_path in originals:
+                temp_path = self.safe_writer.create_temp(file_path)
+                try:
+                    with open(temp_path, 'wb') as file:
+                        file.write(originals[relative_path])
+                    self.safe_writer.finish_temp(temp_path, file_path)
+                    self.safe_writer.commit(temp_path, file_path)
+                except Exception:
+                    if os.path.exists(temp_path):
+                        os.remove(temp_path)
+                    raise
+            logging.info("Rolled back %s", file_path)
+
+    def discard_staged(self, staged):
+        """
+        Remove staged temporary files and drop their modified documents from the cache.
+
+        :param staged: A mapping of relative paths to staged file dictionaries or None.
+        """
+        for entry in staged.values():
+            if entry is None or entry['temp_path'] is None:
+                continue
+            if os.path.exists(entry['temp_path']):
+                os.remove(entry['temp_path'])
+            entry['temp_path'] = None
+            self.document_cache.invalidate(entry['file_path'])
+
+    def write_document(self, target_path, text, data, assignments):
+        """
+        Write a modified document to a file.
+
+        When every changed value replaces an existing scalar, the new values are spliced into the
+        original text and the rest of the file is streamed through unchanged. Otherwise the whole
+        document is serialized again, keeping CRLF line endings if the original text used them.
+        Line endings are never translated, so the bytes outside the changed values stay the same.
+
+        :param target_path: The path to write to.
+        :param text: The original text of the document's file, read with newline=''.
+        :param data: The modified document.
+        :param assignments: A mapping of changed key tuples to their new values.
+        :return: The number of characters written.
+        """
+        patcher = JsonPatcher(text)
+        splices = patcher.plan(assignments)
+        with open(target_path, 'w', encoding='utf-8', newline='') as file:
+            if splices is not None:
+                logging.debug("Patching %d value(s) in place into %s", len(splices), target_path)
+                return patcher.write(file, splices)
+            logging.debug("Structure changed, rewriting the whole document into %s", target_path)
+            serialized = json.dumps(data, ensure_ascii=False, indent=4)
+            if '\r\n' in text:
+                serialized = serialized.replace('\n', '\r\n')
+            return file.write(serialized)
+
+    @staticmethod
+    def _file_signature(file_path):
+        """
+        Return a cheap signature of a file's on-disk state.
+
+        :param file_path: The path of the file.
+        :return: A (modification time in nanoseconds, size) tuple.
+        """
+        stat = os.stat(file_path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def apply_simple_changes(self, data, changes, assignments=None, trie=None):
+        """
+        Apply all simple changes of a file in one depth-first pass over its loaded document.
+
+        The key paths of the changes are looked up in a KeyPathTrie, so keys shared by several
+        key paths are visited once. Missing intermediate objects along a key path are created;
+        digit keys index into arrays.
+
+        :param data: The loaded JSON document.
+        :param changes: The changes for this file from organize_changes_by_file; complex
+                        changes are ignored.
+        :param assignments: An optional dictionary that receives the key tuple and value of
+                            every changed key.
+        :param trie: The file's KeyPathTrie from SchemaIndex.key_path_trie(), ending at setting
+                     IDs; compiled from the changes if not given.
+        :return: The number of values that changed the document.
+        :raises KeyError: If a key path leads through a scalar value or past the end of an array.
+        """
+        simple = [change for change in changes if not change['complex']]
+        if not simple:
+            return 0
+        if trie is None or any('id' not in change for change in simple):
+            trie = KeyPathTrie((change.get('keys') or parse_key_path(change['key_path']), position)
+                               for position, change in enumerate(simple))
+            values = {position: change['value'] for position, change in enumerate(simple)}
+        else:
+            values = {change['id']: change['value'] for change in simple}
+        changed = {}
+        count = trie.apply(data, values, changed)
+        if logging.getLogger().isEnabledFor(TRACE):
+            for keys, value in changed.items():
+                logging.log(TRACE, "Applied change for %s: %s", '.'.join(keys), value)
+        if assignments is not None:
+            assignments.update(changed)
+        return count
+
+    def apply_simple_change(self, data, change, assignments=None):
+        """
+        Apply a single simple change to a loaded JSON document.
+
+        Missing intermediate objects along the key path are created.
+
+        :param data: The loaded JSON document.
+        :param change: A change dictionary with 'key_path' and 'value', and optionally the
+                       pre-split 'keys' tuple.
+        :param assignments: An optional dictionary that receives the key tuple and value if the
+                            document changed.
+        :return: True if the document changed, False if it already held the value.
+        """
+        return self.apply_simple_changes(data, [{**change, 'complex': False}], assignments) > 0
 
     def organize_changes_by_file(self, settings, schema):
         """
-        Organize changes by file based on settings and schema.
+        Organize simple and complex changes by file based on settings and schema.
 
-        :param settings: The settings to apply.
+        Every value is coerced to its setting's type and checked against its bounds first, so
+        invalid input is rejected before any file is opened.
+
+        :param settings: The plain values to apply, keyed by setting ID.
         :param schema: The schema defining the structure of the settings.
-        :return: A dictionary of file changes.
+        :return: A dictionary mapping each relative file path to its list of changes. Each change
+                 holds the setting's 'id', the 'key_path' and its pre-split 'keys', the coerced
+                 'value', the 'complex' flag and the originating 'setting'.
+        :raises ValidationError: If any value is invalid; it lists every invalid value.
         """
+        index = get_schema_index(schema)
+        values = index.validate(settings)
         file_changes = {}
-        for tab_data in schema['tabs'].values():
-            for group_data in tab_data['groups'].values():
-                for setting in group_data['settings']:
-                    if not setting.get('complex', False):  # Skip complex settings
-                        key_path = setting['key_path']
-                        file_path = setting['file']
-                        if key_path in settings:
-                            if file_path not in file_changes:
-                                file_changes[file_path] = []
-                            widget = settings[key_path]
-                            value = widget.get() if isinstance(widget, tk.Entry) else widget.get()
-                            file_changes[file_path].append({
-                                'key_path': key_path,
-                                'value': value
-                            })
+        for file_path, entries in index.by_file.items():
+            changes = [{
+                'id': entry['id'],
+                'key_path': entry['key_path'],
+                'keys': entry['keys'],
+                'value': values[entry['id']],
+                'complex': entry['complex'],
+                'setting': entry['setting']
+            } for entry in entries if entry['id'] in values]
+            if changes:
+                file_changes[file_path] = changes
         return file_changes
+
+# BatchApply used by this worker process, created on the first job it receives
+_worker_batch_apply = None
+
+def _stage_in_worker(file_path, changes):
+    """
+    Stages one file's changes inside a worker process.
+
+    The modified document is not sent back to the parent process; only the staged file's path,
+    timings and trace spans are.
+
+    :param file_path: The resolved path of the file.
+    :param changes: The changes for this file from organize_changes_by_file.
+    :return: The staged file dictionary without its document, or None.
+    """
+    global _worker_batch_apply  # pylint: disable=global-statement
+    if _worker_batch_apply is None:
+        _worker_batch_apply = BatchApply(None, DocumentCache())
+    trace = Trace()
+    with trace.activate(), span('stage', file=file_path):
+        staged = _worker_batch_apply.stage_file_changes(file_path, changes)
+    if staged is not None:
+        staged['document'] = None
+        staged['spans'] = trace.events
+    return staged
@@ -0,0 +1,342 @@
+"""
+Benchmark suite for the apply engine, presets, schema loading and GUI startup.
+
+Generates a synthetic SPT server tree (see synthetic_server.py) in a temporary directory and runs
+every case in a fresh Python process, so that each case's peak resident set size is its own and
+caches start cold:
+    schema_load: ConfigManager loading the schema and building its SchemaIndex.
+    preset_save / preset_load: PresetManager saving and loading a preset of every setting.
+    apply_cold: BatchApply.apply_changes with a new BatchApply and an empty document cache.
+    apply_warm: BatchApply.apply_changes with new values, reusing the BatchApply and its cache.
+    apply_noop: BatchApply.apply_changes with unchanged values, skipping every file.
+    apply_preview: BatchApply.preview_changes with new values on documents already cached.
+    complex_items: ComplexConfigHandler.update_ammo_stack_size on the items file.
+    load_values_cold: ValueLoader.load reading the current value of every setting with an empty
+                      document cache.
+    load_values_warm: ValueLoader.load again on unchanged files.
+    gui_startup: Constructing the Tk application and building its first tab; skipped without
+                 a display.
+
+Each case reports the median and every round's wall time in seconds, the peak RSS in kilobytes
+and the bytes written per round. Results are saved as JSON; with --compare, cases whose median
+is slower than in an earlier result file by more than --tolerance are reported and the exit code
+is 1.
+
+Usage:
+    python benchmarks/bench_apply.py [--items 4500] [--bot-types 40] [--rounds 5]
+                                     [--case NAME ...] [--output bench_apply.json]
+                                     [--compare previous.json] [--tolerance 0.2]
+
+Functions:
+    round_values(schema, round_number): Returns values that differ from the previous round.
+    run_case(name, paths, rounds): Runs one case in this process and returns its measurements.
+    run_case_in_subprocess(name, paths, rounds): Runs one case in a fresh Python process.
+    compare_results(results, previous, tolerance): Returns the cases that got slower.
+    main(): Parses arguments, runs the cases and saves the results.
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+# pylint: disable=wrong-import-position
+from synthetic_server import generate
+from config_manager import ConfigManager
+from document_cache import get_document_cache
+from schema_index import get_schema_index
+from batch_apply import BatchApply
+from complex_config_handler import ComplexConfigHandler
+from settings_model import SettingsModel
+from value_loader import ValueLoader
+# pylint: enable=wrong-import-position
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+CASES = ('schema_load', 'preset_save', 'preset_load', 'apply_cold', 'apply_warm', 'apply_noop',
+         'apply_preview', 'complex_items', 'load_values_cold', 'load_values_warm', 'gui_startup')
+
+def _peak_rss_kb():
+    """Return the peak resident set size of this process in kilobytes, or None if unknown."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+def round_values(schema, round_number):
+    """
+    Returns values that differ from the previous round for every setting.
+
+    :param schema: The schema of the synthetic server.
+    :param round_number: The round number.
+    :return: A dictionary of plain values keyed by setting ID.
+    """
+    values = {}
+    for entry in get_schema_index(schema).entries:
+        default = entry['setting']['default']
+        if entry['type'] == 'boolean':
+            values[entry['id']] = bool(round_number % 2) != default
+        elif entry['type'] == 'integer':
+            values[entry['id']] = default + round_number + 1
+        elif entry['type'] == 'float':
+            values[entry['id']] = default + (round_number + 1) / 4
+        else:
+            values[entry['id']] = default
+    return values
+
+def _timed(rounds, action):
+    """
+    Runs an action for several rounds.
+
+    :param rounds: The number of rounds.
+    :param action: A callable receiving the round number and returning the bytes it wrote.
+    :return: The wall times and bytes written per round.
+    """
+    durations = []
+    written = []
+    for round_number in range(rounds):
+        started = time.perf_counter()
+        written.append(action(round_number) or 0)
+        durations.append(time.perf_counter() - started)
+    return durations, written
+
+def _gui_startup(paths, rounds):
+    """
+    Times constructing the Tk application and building its first tab.
+
+    The application reads config.json and config_schema.json from the working directory, so
+    this runs in the synthetic tree's directory.
+    """
+    import tkinter as tk  # pylint: disable=import-outside-toplevel
+    try:
+        tk.Tk().destroy()
+    except tk.TclError as e:
+        return {'skipped': f"No display available: {e}"}
+    from gui import Application  # pylint: disable=import-outside-toplevel
+    os.chdir(os.path.dirname(os.path.abspath(paths['config_path'])))
+
+    def start(_):
+        app = Application()
+        app.show_tab_content(next(iter(app.config_manager.get_schema()['tabs'])))
+        app.update_idletasks()
+        app.destroy()
+        get_document_cache().clear()
+    durations, written = _timed(rounds, start)
+    return {'durations': durations, 'bytes_written': written}
+
+def run_case(name, paths, rounds):
+    """
+    Runs one case in this process and returns its measurements.
+
+    :param name: The case name, one of CASES.
+    :param paths: The paths returned by synthetic_server.generate().
+    :param rounds: The number of timed rounds.
+    :return: A dictionary with 'median', 'durations', 'bytes_written' and 'peak_rss_kb', or
+             with 'skipped' and the reason.
+    :raises ValueError: If the case is unknown.
+    """
+    if name == 'gui_startup':
+        measured = _gui_startup(paths, rounds)
+        if 'skipped' in measured:
+            return measured
+    else:
+        action = _case_action(name, paths)
+        durations, written = _timed(rounds, action)
+        measured = {'durations': durations, 'bytes_written': written}
+    measured['median'] = statistics.median(measured['durations'])
+    measured['peak_rss_kb'] = _peak_rss_kb()
+    return measured
+
+def _case_action(name, paths):
+    """
+    Prepares a case and returns its timed action.
+
+    :param name: The case name.
+    :param paths: The paths returned by synthetic_server.generate().
+    :return: A callable receiving the round number and returning the bytes it wrote.
+    :raises ValueError: If the case is unknown.
+    """
+    config_manager = ConfigManager(paths['config_path'], paths['schema_path'])
+    schema = config_manager.get_schema()
+
+    if name == 'schema_load':
+        def action(_):
+            get_document_cache().clear()
+            ConfigManager(paths['config_path'], paths['schema_path']).get_schema_index()
+        return action
+
+    if name in ('preset_save', 'preset_load'):
+        from preset_manager import PresetManager  # pylint: disable=import-outside-toplevel
+        preset_directory = os.path.join(os.path.dirname(paths['config_path']), 'presets')
+        preset_manager = PresetManager(preset_directory, paths['schema_path'])
+        preset_path = os.path.join(preset_directory, 'bench.json')
+        values = SettingsModel(schema).values()
+        preset_manager.save_preset(preset_path, values)
+        if name == 'preset_save':
+            def action(_):
+                preset_manager.save_preset(preset_path, values)
+                return os.path.getsize(preset_path)
+        else:
+            def action(_):
+                preset_manager.load_preset(preset_path)
+        return action
+
+    if name == 'apply_cold':
+        def action(round_number):
+            get_document_cache().clear()
+            batch_apply = BatchApply(config_manager)
+            return batch_apply.apply_changes(round_values(schema, round_number), schema)['bytes']
+        return action
+
+    if name == 'apply_preview':
+        batch_apply = BatchApply(config_manager)
+        batch_apply.preview_changes(round_values(schema, -1), schema)
+
+        def action(round_number):
+            batch_apply.preview_changes(round_values(schema, round_number), schema)
+        return action
+
+    if name in ('apply_warm', 'apply_noop'):
+        batch_apply = BatchApply(config_manager)
+        batch_apply.apply_changes(round_values(schema, -1), schema)
+        if name == 'apply_warm':
+            def action(round_number):
+                return batch_apply.apply_changes(round_values(schema, round_number), schema)['bytes']
+        else:
+            def action(_):
+                return batch_apply.apply_changes(round_values(schema, -1), schema)['bytes']
+        return action
+
+    if name == 'complex_items':
+        handler = ComplexConfigHandler(config_manager)
+        items_path = handler.resolve_full_path('database/templates/items.json')
+        key = next(entry['id'] for entry in get_schema_index(schema).entries
+                   if entry['key_path'] == '_props.StackMaxSize')
+
+        def action(round_number):
+            handler.update_ammo_stack_size({key: 100 + round_number}, schema)
+            return os.path.getsize(items_path)
+        return action
+
+    if name == 'load_values_cold':
+        def action(_):
+            get_document_cache().clear()
+            ValueLoader(config_manager).load(schema)
+        return action
+
+    if name == 'load_values_warm':
+        value_loader = ValueLoader(config_manager)
+        value_loader.load(schema)
+
+        def action(_):
+            value_loader.load(schema)
+        return action
+
+    raise ValueError(f"Unknown benchmark case: {name}")
+
+def run_case_in_subprocess(name, paths, rounds):
+    """
+    Runs one case in a fresh Python process.
+
+    :param name: The case name, one of CASES.
+    :param paths: The paths returned by synthetic_server.generate().
+    :param rounds: The number of timed rounds.
+    :return: The case's measurements, or 'error' with the process's error output.
+    """
+    completed = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--run-case', name,
+         '--paths', json.dumps(paths), '--rounds', str(rounds)],
+        capture_output=True, text=True, check=False
+    )
+    if completed.returncode != 0:
+        return {'error': completed.stderr.strip().splitlines()[-1:] or ['failed']}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+def compare_results(results, previous, tolerance):
+    """
+    Returns the cases that got slower than in an earlier result.
+
+    :param results: The current result document.
+    :param previous: An earlier result document.
+    :param tolerance: The allowed slowdown as a fraction, e.g. 0.2 for 20%.
+    :return: A list of (case, previous median, current median) tuples.
+    """
+    regressions = []
+    for name, measured in results['cases'].items():
+        before = previous.get('cases', {}).get(name, {})
+        if 'median' in measured and 'median' in before \
+                and measured['median'] > before['median'] * (1 + tolerance):
+            regressions.append((name, before['median'], measured['median']))
+    return regressions
+
+def main():
+    """
+    Parses arguments, runs the cases and saves the results.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n', 1)[0])
+    parser.add_argument('--items', type=int, default=4500)
+    parser.add_argument('--bot-types', type=int, default=40)
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--case', action='append', choices=CASES, default=[])
+    parser.add_argument('--output', default='bench_apply.json')
+    parser.add_argument('--compare', default=None)
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    parser.add_argument('--run-case', default=None, help=argparse.SUPPRESS)
+    parser.add_argument('--paths', default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_case:
+        print(json.dumps(run_case(args.run_case, json.loads(args.paths), args.rounds)))
+        return 0
+
+    work_directory = tempfile.mkdtemp(prefix='bench_apply_')
+    try:
+        paths = generate(work_directory, args.items, args.bot_types)
+        print(f"Fixture: {paths['files']} file(s), {paths['bytes'] / 1024 / 1024:.1f} MB")
+        results = {
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'fixture': {'items': args.items, 'bot_types': args.bot_types,
+                        'files': paths['files'], 'bytes': paths['bytes']},
+            'rounds': args.rounds,
+            'cases': {}
+        }
+        for name in args.case or CASES:
+            measured = run_case_in_subprocess(name, paths, args.rounds)
+            results['cases'][name] = measured
+            if 'median' in measured:
+                print(f"{name:<15} median {measured['median'] * 1000:9.1f} ms, "
+                      f"peak RSS {(measured['peak_rss_kb'] or 0) / 1024:7.1f} MB, "
+                      f"written {max(measured['bytes_written']) / 1024 / 1024:6.1f} MB")
+            else:
+                print(f"{name:<15} {measured.get('skipped') or measured.get('error')}")
+    finally:
+        shutil.rmtree(work_directory)
+
+    with open(args.output, 'w', encoding='utf-8') as file:
+        json.dump(results, file, indent=4)
+    print(f"Results saved to {args.output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as file:
+            previous = json.load(file)
+        regressions = compare_results(results, previous, args.tolerance)
+        for name, before, after in regressions:
+            print(f"Regression in {name}: {before * 1000:.1f} ms -> {after * 1000:.1f} ms")
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
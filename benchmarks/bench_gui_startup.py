@@ -0,0 +1,247 @@
+"""
+Benchmark for GUI startup with a large settings schema.
+
+Generates a schema of --settings settings (1200 by default) spread over --tabs tabs, with a mix of
+entries and checkboxes, top labels, hidden left labels and inline settings, and one large group
+per tab so that per-group layout cost dominates. The cases are:
+    layout: layout_engine.compute_layout() over the whole schema; needs no display.
+    search_build: Building the SearchIndex over the whole schema; needs no display.
+    search_typing: Searching for every prefix of a few queries, as when typing them; needs no
+                   display. Its 'per_keystroke' value is the median time of one search.
+    startup: Constructing the Tk application and building its first tab.
+    all_tabs: Constructing the Tk application and building every tab.
+
+Tabs with more than --virtualize-threshold settings are shown as a virtualized list, as in the
+application; raise it above the tab size to time building every widget. The Tk cases are skipped
+without a display.
+
+Results are saved as JSON in the format of bench_apply.py; with --compare, cases whose median is
+slower than in an earlier result file by more than --tolerance are reported and the exit code is 1.
+
+Usage:
+    python benchmarks/bench_gui_startup.py [--settings 1200] [--tabs 4] [--rounds 5]
+                                           [--virtualize-threshold 150]
+                                           [--output bench_gui_startup.json]
+                                           [--compare previous.json] [--tolerance 0.2]
+
+Functions:
+    make_schema(settings, tabs): Builds a schema with the given number of settings.
+    write_application_files(directory, schema, virtualize_threshold): Writes the files the application reads at startup.
+    run_case(name, directory, schema, rounds): Times one case.
+    main(): Parses arguments, runs the cases and saves the results.
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+# pylint: disable=wrong-import-position
+from bench_apply import compare_results
+from layout_engine import compute_layout
+from schema_index import SchemaIndex
+from search_index import SearchIndex
+# pylint: enable=wrong-import-position
+
+CASES = ('layout', 'search_build', 'search_typing', 'startup', 'all_tabs')
+
+# Queries typed character by character in the search_typing case
+TYPED_QUERIES = ('setting 1150', 'synthetic', 'core setting', 'xyz')
+
+def make_schema(settings, tabs):
+    """
+    Builds a schema with the given number of settings.
+
+    Every tab has one large group in the first column and a small one in the second. Every third
+    setting is a checkbox, every second one has a top label instead of a left label, and every
+    tenth one is placed inline with the previous one.
+
+    :param settings: The total number of settings.
+    :param tabs: The number of tabs.
+    :return: The schema document.
+    """
+    schema = {'tabs': {}}
+    for tab_number in range(tabs):
+        schema['tabs'][f"Tab {tab_number + 1}"] = {'groups': {
+            'Large Group': {'column': 1, 'settings': []},
+            'Small Group': {'column': 2, 'settings': []}
+        }}
+    tab_names = list(schema['tabs'])
+    for number in range(settings):
+        groups = schema['tabs'][tab_names[number % tabs]]['groups']
+        group = groups['Small Group'] if number % 25 == 0 else groups['Large Group']
+        checkbox = number % 3 == 0
+        group['settings'].append({
+            'id': f"setting_{number}",
+            'label': f"Setting {number}",
+            'description': f"Synthetic setting {number}.",
+            'file': 'configs/core.json',
+            'key_path': f"synthetic.setting_{number}",
+            'type': 'boolean' if checkbox else 'integer',
+            'default': False if checkbox else number,
+            'complex': False,
+            'ui_element': {
+                'type': 'checkbox' if checkbox else 'entry',
+                'widget_width': 10,
+                'top_label_visible': number % 2 == 0,
+                'left_label_visible': number % 2 == 1,
+                'inline_with_previous': number % 10 == 9
+            }
+        })
+    return schema
+
+def write_application_files(directory, schema, virtualize_threshold):
+    """
+    Writes the files the application reads at startup: config.json, config_schema.json and the
+    presets directory.
+
+    :param directory: The directory to write into.
+    :param schema: The schema document.
+    :param virtualize_threshold: The 'gui.virtualize_threshold' setting.
+    """
+    config = {
+        'paths': {'server_database': os.path.join(directory, 'database'),
+                  'server_config': os.path.join(directory, 'configs')},
+        'logging': {'level': 'WARNING', 'file': os.path.join(directory, 'logs', 'app.log')},
+        'gui': {'virtualize_threshold': virtualize_threshold}
+    }
+    with open(os.path.join(directory, 'config.json'), 'w', encoding='utf-8') as file:
+        json.dump(config, file)
+    with open(os.path.join(directory, 'config_schema.json'), 'w', encoding='utf-8') as file:
+        json.dump(schema, file)
+    os.makedirs(os.path.join(directory, 'presets'), exist_ok=True)
+
+def _display_available():
+    """Return None if Tk can open a window, or the reason it cannot."""
+    import tkinter as tk  # pylint: disable=import-outside-toplevel
+    try:
+        tk.Tk().destroy()
+    except tk.TclError as e:
+        return str(e)
+    return None
+
+def run_case(name, directory, schema, rounds):
+    """
+    Times one case.
+
+    :param name: The case name, one of CASES.
+    :param directory: The directory holding the application files.
+    :param schema: The schema document.
+    :param rounds: The number of timed rounds.
+    :return: A dictionary with the 'median' and every round's 'durations' (and 'per_keystroke'
+             for search_typing), or with 'skipped' and the reason.
+    :raises ValueError: If the case is unknown.
+    """
+    if name == 'layout':
+        def action():
+            compute_layout(schema)
+    elif name == 'search_build':
+        schema_index = SchemaIndex(schema)
+
+        def action():
+            SearchIndex(schema_index)
+    elif name == 'search_typing':
+        search_index = SearchIndex(SchemaIndex(schema))
+        keystrokes = []
+
+        def action():
+            for query in TYPED_QUERIES:
+                for length in range(1, len(query) + 1):
+                    started = time.perf_counter()
+                    search_index.search(query[:length], limit=200)
+                    keystrokes.append(time.perf_counter() - started)
+    elif name in ('startup', 'all_tabs'):
+        reason = _display_available()
+        if reason is not None:
+            return {'skipped': f"No display available: {reason}"}
+        from gui import Application  # pylint: disable=import-outside-toplevel
+        from document_cache import get_document_cache  # pylint: disable=import-outside-toplevel
+        os.chdir(directory)
+
+        def action():
+            get_document_cache().clear()
+            app = Application()
+            tab_names = list(app.config_manager.get_schema()['tabs'])
+            for tab_name in tab_names if name == 'all_tabs' else tab_names[:1]:
+                app.show_tab_content(tab_name)
+            app.update_idletasks()
+            app.destroy()
+    else:
+        raise ValueError(f"Unknown benchmark case: {name}")
+
+    durations = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        action()
+        durations.append(time.perf_counter() - started)
+    measured = {'median': statistics.median(durations), 'durations': durations}
+    if name == 'search_typing':
+        measured['per_keystroke'] = statistics.median(keystrokes)
+    return measured
+
+def main():
+    """
+    Parses arguments, runs the cases and saves the results.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n', 1)[0])
+    parser.add_argument('--settings', type=int, default=1200)
+    parser.add_argument('--tabs', type=int, default=4)
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--virtualize-threshold', type=int, default=150)
+    parser.add_argument('--case', action='append', choices=CASES, default=[])
+    parser.add_argument('--output', default='bench_gui_startup.json')
+    parser.add_argument('--compare', default=None)
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    args = parser.parse_args()
+
+    output = os.path.abspath(args.output)
+    schema = make_schema(args.settings, args.tabs)
+    results = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'fixture': {'settings': args.settings, 'tabs': args.tabs,
+                    'virtualize_threshold': args.virtualize_threshold},
+        'rounds': args.rounds,
+        'cases': {}
+    }
+    work_directory = tempfile.mkdtemp(prefix='bench_gui_startup_')
+    working_directory = os.getcwd()
+    try:
+        write_application_files(work_directory, schema, args.virtualize_threshold)
+        for name in args.case or CASES:
+            measured = run_case(name, work_directory, schema, args.rounds)
+            results['cases'][name] = measured
+            if 'median' in measured:
+                per_keystroke = measured.get('per_keystroke')
+                print(f"{name:<13} median {measured['median'] * 1000:9.1f} ms"
+                      + (f", {per_keystroke * 1000:.3f} ms per keystroke"
+                         if per_keystroke is not None else ""))
+            else:
+                print(f"{name:<13} {measured['skipped']}")
+    finally:
+        os.chdir(working_directory)
+        shutil.rmtree(work_directory)
+
+    with open(output, 'w', encoding='utf-8') as file:
+        json.dump(results, file, indent=4)
+    print(f"Results saved to {output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as file:
+            previous = json.load(file)
+        regressions = compare_results(results, previous, args.tolerance)
+        for name, before, after in regressions:
+            print(f"Regression in {name}: {before * 1000:.1f} ms -> {after * 1000:.1f} ms")
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
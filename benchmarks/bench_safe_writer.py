@@ -0,0 +1,100 @@
+"""
+Benchmark comparing a plain in-place rewrite with SafeWriter's atomic replacement.
+
+Generates a synthetic JSON file of the requested size and measures, over several rounds:
+    plain: open(..., 'w') and write the text (the old, non crash-safe behaviour).
+    atomic: temporary file, fsync, os.replace and directory fsync.
+    atomic+backup: the above plus a BackupStore snapshot of the previous version.
+
+Usage:
+    python benchmarks/bench_safe_writer.py [--size-mb 30] [--rounds 5]
+
+Functions:
+    make_text(size_mb): Builds a JSON text of roughly the given size.
+    measure(label, rounds, action): Times an action and prints the median duration.
+    main(): Parses arguments and runs the benchmark.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from safe_writer import SafeWriter  # pylint: disable=wrong-import-position
+from backup_store import BackupStore  # pylint: disable=wrong-import-position
+
+def make_text(size_mb):
+    """
+    Builds a JSON text of roughly the given size.
+
+    :param size_mb: The approximate size in megabytes.
+    :return: The JSON text.
+    """
+    item = {'_parent': '5485a8684bdc2da71d8b4567', '_props': {'StackMaxSize': 60, 'Name': 'x' * 200}}
+    item_size = len(json.dumps(item, indent=4))
+    count = max(1, int(size_mb * 1024 * 1024 / item_size))
+    return json.dumps({f"item{i:08d}": item for i in range(count)}, indent=4)
+
+def measure(label, rounds, action):
+    """
+    Times an action and prints the median duration.
+
+    :param label: The name printed for the measurement.
+    :param rounds: The number of repetitions.
+    :param action: A callable receiving the round number.
+    :return: The median duration in seconds.
+    """
+    durations = []
+    for round_number in range(rounds):
+        started = time.perf_counter()
+        action(round_number)
+        durations.append(time.perf_counter() - started)
+    median = statistics.median(durations)
+    print(f"{label:<15} median {median * 1000:8.1f} ms over {rounds} rounds")
+    return median
+
+def main():
+    """
+    Parses arguments and runs the benchmark.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n', 1)[0])
+    parser.add_argument('--size-mb', type=float, default=30)
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+
+    text = make_text(args.size_mb)
+    work_directory = tempfile.mkdtemp(prefix='bench_safe_writer_')
+    try:
+        target = os.path.join(work_directory, 'items.json')
+        with open(target, 'w', encoding='utf-8') as file:
+            file.write(text)
+        print(f"File size: {os.path.getsize(target) / 1024 / 1024:.1f} MB")
+
+        def plain(_):
+            with open(target, 'w', encoding='utf-8') as file:
+                file.write(text)
+
+        def atomic(_):
+            SafeWriter().write_text(target, text)
+
+        backup_store = BackupStore(os.path.join(work_directory, 'backup'), max_snapshots=0)
+
+        def atomic_with_backup(round_number):
+            backup_store.create_snapshot({'items.json': target})
+            SafeWriter().write_text(target, text + ' ' * round_number)
+
+        baseline = measure('plain', args.rounds, plain)
+        measure('atomic', args.rounds, atomic)
+        with_backup = measure('atomic+backup', args.rounds, atomic_with_backup)
+        print(f"Overhead of atomic+backup: {(with_backup - baseline) * 1000:.1f} ms")
+    finally:
+        shutil.rmtree(work_directory)
+
+if __name__ == "__main__":
+    main()
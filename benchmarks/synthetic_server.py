@@ -0,0 +1,290 @@
+"""
+Generates a synthetic SPT server tree for benchmarks.
+
+The generated tree mirrors the shape of a real server without shipping its data: an items.json
+with thousands of templates below a category tree and deep '_props' (prefabs, slots with filter
+lists, grids), a set of bot type files with per-difficulty settings, and several config files. A
+matching settings schema, configuration file and preset are written next to it, so the apply
+engine, presets and GUI can be run against the tree offline. The same seed always produces the
+same files.
+
+Usage:
+    python benchmarks/synthetic_server.py DIRECTORY [--items 4500] [--bot-types 40] [--seed 1]
+
+Functions:
+    make_items(count, rng): Builds an items document with a category tree and item templates.
+    make_bot_type(rng): Builds a bot type document.
+    make_configs(rng): Builds the config documents keyed by file name.
+    make_schema(bot_names): Builds a settings schema targeting the generated files.
+    generate(directory, items=4500, bot_types=40, seed=1): Writes the server tree, schema, configuration and preset.
+    main(): Parses arguments and generates a tree.
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from item_template_index import AMMO_CATEGORY_ID  # pylint: disable=wrong-import-position
+
+ROOT_CATEGORY_ID = '54009119af1c881c07000029'
+DIFFICULTIES = ('easy', 'normal', 'hard', 'impossible')
+BOT_SECTIONS = ('Lay', 'Aiming', 'Look', 'Shoot', 'Move', 'Grenade', 'Change', 'Cover', 'Patrol',
+                'Hearing', 'Mind', 'Boss', 'Core', 'Scattering')
+
+def _object_id(rng):
+    """Return a random 24 character hexadecimal ID like the ones SPT uses."""
+    return f"{rng.getrandbits(96):024x}"
+
+def _node(node_id, parent_id, name):
+    """Return a category node template."""
+    return {'_id': node_id, '_name': name, '_parent': parent_id, '_type': 'Node',
+            '_props': {'Name': name, 'ShortName': name, 'Description': name}, '_proto': ''}
+
+def make_items(count, rng):
+    """
+    Builds an items document with a category tree and item templates.
+
+    Roughly a fifth of the items are ammo below the ammo category, some of them in nested
+    calibre categories.
+
+    :param count: The number of item templates, not counting category nodes.
+    :param rng: The random.Random to draw from.
+    :return: The items document keyed by template ID.
+    """
+    items = {ROOT_CATEGORY_ID: _node(ROOT_CATEGORY_ID, '', 'Item')}
+    items[AMMO_CATEGORY_ID] = _node(AMMO_CATEGORY_ID, ROOT_CATEGORY_ID, 'Ammo')
+    categories = [AMMO_CATEGORY_ID]
+    for name in ('Weapon', 'Armor', 'Container', 'Food', 'Meds', 'Barter', 'Mod', 'Key'):
+        node_id = _object_id(rng)
+        items[node_id] = _node(node_id, ROOT_CATEGORY_ID, name)
+        categories.append(node_id)
+    for calibre in ('9x19', '5.45x39', '7.62x39', '12ga'):
+        node_id = _object_id(rng)
+        items[node_id] = _node(node_id, AMMO_CATEGORY_ID, f"Ammo {calibre}")
+        categories.append(node_id)
+
+    item_ids = [_object_id(rng) for _ in range(count)]
+    for number, item_id in enumerate(item_ids):
+        parent_id = categories[0] if number % 5 == 0 else rng.choice(categories)
+        name = f"item_{number:05d}"
+        slots = [{
+            '_name': f"mod_{slot}",
+            '_id': _object_id(rng),
+            '_parent': item_id,
+            '_props': {'filters': [{'Shift': 0, 'Filter': rng.sample(item_ids, 6)}]},
+            '_required': rng.random() < 0.2,
+            '_mergeSlotWithChildren': False,
+            '_proto': '55d30c4c4bdc2db4468b457e'
+        } for slot in range(rng.randint(0, 4))]
+        items[item_id] = {
+            '_id': item_id,
+            '_name': name,
+            '_parent': parent_id,
+            '_type': 'Item',
+            '_props': {
+                'Name': name,
+                'ShortName': name[-5:],
+                'Description': f"Synthetic item {number} used for benchmarking the apply engine.",
+                'Weight': round(rng.uniform(0.01, 12.0), 3),
+                'Width': rng.randint(1, 5),
+                'Height': rng.randint(1, 5),
+                'StackMaxSize': rng.choice((1, 20, 30, 50, 60)),
+                'ExaminedByDefault': rng.random() < 0.5,
+                'CreditsPrice': rng.randint(100, 500000),
+                'Rarity': rng.choice(('Common', 'Rare', 'Superrare', 'Not_exist')),
+                'Prefab': {'path': f"assets/content/items/{name}.bundle", 'rcid': ''},
+                'UsePrefab': {'path': '', 'rcid': ''},
+                'Slots': slots,
+                'Grids': [{
+                    '_name': 'main',
+                    '_id': _object_id(rng),
+                    '_parent': item_id,
+                    '_props': {'filters': [], 'cellsH': rng.randint(1, 6), 'cellsV': rng.randint(1, 6),
+                               'minCount': 0, 'maxCount': 0, 'maxWeight': 0},
+                    '_proto': '55d329c24bdc2d892f8b4567'
+                }] if rng.random() < 0.1 else [],
+                'Buffs': {},
+                'ConflictingItems': rng.sample(item_ids, 2) if rng.random() < 0.3 else []
+            },
+            '_proto': '55d32a5f4bdc2d6f3b8b4567'
+        }
+    return items
+
+def make_bot_type(rng):
+    """
+    Builds a bot type document.
+
+    :param rng: The random.Random to draw from.
+    :return: The bot type document.
+    """
+    def difficulty():
+        return {section: {f"{section.upper()}_{number}": round(rng.uniform(0, 100), 2)
+                          for number in range(25)}
+                for section in BOT_SECTIONS}
+
+    return {
+        'appearance': {part: {_object_id(rng): rng.randint(1, 10) for _ in range(8)}
+                       for part in ('body', 'feet', 'hands', 'head', 'voice')},
+        'chances': {'equipment': {slot: rng.randint(0, 100) for slot in
+                                  ('Headwear', 'Earpiece', 'FaceCover', 'ArmorVest', 'Eyewear',
+                                   'TacticalVest', 'Backpack', 'Holster', 'Scabbard')},
+                    'weaponMods': {f"mod_{number}": rng.randint(0, 100) for number in range(30)}},
+        'difficulty': {level: difficulty() for level in DIFFICULTIES},
+        'experience': {'level': {'min': 0, 'max': 100}, 'reward': {'min': 100, 'max': 500}},
+        'health': {'BodyParts': [{part: {'min': 30, 'max': 120} for part in
+                                  ('Head', 'Chest', 'Stomach', 'LeftArm', 'RightArm',
+                                   'LeftLeg', 'RightLeg')}]},
+        'inventory': {'equipment': {slot: {_object_id(rng): rng.randint(1, 50) for _ in range(15)}
+                                    for slot in ('Headwear', 'ArmorVest', 'FirstPrimaryWeapon',
+                                                 'Holster', 'Backpack')},
+                      'items': {'Pockets': [_object_id(rng) for _ in range(20)]}},
+        'skills': {'Common': {f"skill_{number}": {'min': 0, 'max': 5100} for number in range(20)}}
+    }
+
+def make_configs(rng):
+    """
+    Builds the config documents keyed by file name.
+
+    :param rng: The random.Random to draw from.
+    :return: A dictionary mapping config file names to documents.
+    """
+    return {
+        'core.json': {'features': {'chatbotFeatures': {'commandoEnabled': True,
+                                                       'sptFriendEnabled': True}},
+                      'serverName': 'SPT', 'profileSaveIntervalSeconds': 15},
+        'health.json': {'healthMultipliers': {'death': 0.3, 'blacked': 0.1},
+                        'save': {'health': True, 'effects': True}},
+        'inventory.json': {'newItemsMarkedFound': False, 'sealedAirdropContainer': {
+            'weaponRewardWeight': {_object_id(rng): rng.randint(1, 10) for _ in range(50)}}},
+        'ragfair.json': {'runIntervalSeconds': 60, 'dynamic': {
+            'blacklist': {'custom': [_object_id(rng) for _ in range(300)]},
+            'offerItemCount': {'min': 7, 'max': 30},
+            'priceRanges': {'default': {'min': 0.8, 'max': 1.2}}}},
+        'bot.json': {'maxBotCap': {location: rng.randint(10, 30) for location in
+                                   ('factory4_day', 'bigmap', 'woods', 'shoreline', 'interchange',
+                                    'rezervbase', 'laboratory', 'lighthouse', 'tarkovstreets')},
+                     'presetBatch': {f"bot_{number}": rng.randint(1, 20) for number in range(40)}}
+    }
+
+def _setting(label, file, key_path, value_type, default, **extra):
+    """Return a schema setting with an entry or checkbox UI element."""
+    ui_type = 'checkbox' if value_type == 'boolean' else 'entry'
+    setting = {'label': label, 'description': f"Synthetic setting {label}.", 'file': file,
+               'key_path': key_path, 'type': value_type, 'default': default, 'criteria': {},
+               'complex': False, 'ui_element': {'type': ui_type, 'widget_width': 10}}
+    setting.update(extra)
+    return setting
+
+def make_schema(bot_names):
+    """
+    Builds a settings schema targeting the generated files.
+
+    :param bot_names: The names of the generated bot type files, without extension.
+    :return: The schema document.
+    """
+    items_file = 'database/templates/items.json'
+    item_settings = [
+        _setting('Ammo Stack Size', items_file, '_props.StackMaxSize', 'integer', 60, min=1,
+                 complex=True, criteria={'ancestor': AMMO_CATEGORY_ID, 'type': 'Item'}),
+        _setting('All Items Examined', items_file, '_props.ExaminedByDefault', 'boolean', False,
+                 complex=True, criteria={'type': 'Item'})
+    ]
+    bot_settings = [
+        _setting(f"{name} Visible Distance", f"database/bots/types/{name}.json",
+                 'difficulty.normal.Core.CORE_0', 'float', 50.0, id=f"bots.{name}.visible_distance")
+        for name in bot_names
+    ]
+    config_settings = [
+        _setting('Commando Enabled', 'configs/core.json',
+                 'features.chatbotFeatures.commandoEnabled', 'boolean', True),
+        _setting('Death Health Multiplier', 'configs/health.json', 'healthMultipliers.death',
+                 'float', 0.3),
+        _setting('Items Marked Found', 'configs/inventory.json', 'newItemsMarkedFound', 'boolean',
+                 False),
+        _setting('Ragfair Run Interval', 'configs/ragfair.json', 'runIntervalSeconds', 'integer', 60,
+                 min=1),
+        _setting('Factory Bot Cap', 'configs/bot.json', 'maxBotCap.factory4_day', 'integer', 20,
+                 min=0)
+    ]
+    return {'tabs': {
+        'Items': {'groups': {'Items': {'column': 1, 'settings': item_settings}}},
+        'Bots': {'groups': {'Difficulty': {'column': 1, 'settings': bot_settings}}},
+        'Configs': {'groups': {'Server': {'column': 1, 'settings': config_settings}}}
+    }}
+
+def _write_json(path, document):
+    """Write a document the way SPT ships its files and return the written size in bytes."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(document, file, ensure_ascii=False, indent=4)
+    return os.path.getsize(path)
+
+def generate(directory, items=4500, bot_types=40, seed=1):
+    """
+    Writes the server tree, schema, configuration and preset.
+
+    :param directory: The directory to generate into; it is created if needed.
+    :param items: The number of item templates.
+    :param bot_types: The number of bot type files.
+    :param seed: The random seed.
+    :return: A dictionary with the 'config_path', 'schema_path', 'preset_path', the
+             'server_database' and 'server_config' directories, the number of data 'files' and
+             their total 'bytes'.
+    """
+    rng = random.Random(seed)
+    server_database = os.path.join(directory, 'server', 'database')
+    server_config = os.path.join(directory, 'server', 'configs')
+    sizes = [_write_json(os.path.join(server_database, 'templates', 'items.json'),
+                         make_items(items, rng))]
+    bot_names = [f"bot{number:03d}" for number in range(bot_types)]
+    for name in bot_names:
+        sizes.append(_write_json(os.path.join(server_database, 'bots', 'types', f"{name}.json"),
+                                 make_bot_type(rng)))
+    for name, document in make_configs(rng).items():
+        sizes.append(_write_json(os.path.join(server_config, name), document))
+
+    schema = make_schema(bot_names)
+    paths = {
+        'config_path': os.path.join(directory, 'config.json'),
+        'schema_path': os.path.join(directory, 'config_schema.json'),
+        'preset_path': os.path.join(directory, 'preset.json'),
+        'server_database': server_database,
+        'server_config': server_config,
+        'files': len(sizes),
+        'bytes': sum(sizes)
+    }
+    _write_json(paths['schema_path'], schema)
+    _write_json(paths['config_path'], {
+        'paths': {'server_database': os.path.abspath(server_database),
+                  'server_config': os.path.abspath(server_config)},
+        'logging': {'level': 'WARNING', 'file': os.path.abspath(os.path.join(directory, 'app.log'))},
+        'backup': {'directory': os.path.abspath(os.path.join(directory, 'backup')),
+                   'max_snapshots': 2, 'compression_level': 1},
+        'apply': {'workers': 1, 'server_workers': 4}
+    })
+    _write_json(paths['preset_path'], {
+        setting.get('id', setting['key_path']): {'label': setting['label'], 'value': setting['default']}
+        for tab in schema['tabs'].values() for group in tab['groups'].values()
+        for setting in group['settings']
+    })
+    return paths
+
+def main():
+    """
+    Parses arguments and generates a tree.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n', 1)[0])
+    parser.add_argument('directory')
+    parser.add_argument('--items', type=int, default=4500)
+    parser.add_argument('--bot-types', type=int, default=40)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+    paths = generate(args.directory, args.items, args.bot_types, args.seed)
+    print(f"Generated {paths['files']} file(s), {paths['bytes'] / 1024 / 1024:.1f} MB in {args.directory}")
+
+if __name__ == "__main__":
+    main()
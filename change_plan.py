@@ -0,0 +1,108 @@
+"""
+Module for planning the value changes of an apply without modifying any document.
+
+A preview has to report exactly what an apply would change, but documents loaded through the
+document cache are shared and must not be mutated for a preview. ChangePlan therefore reads a
+document without touching it and records every assignment an apply would make as a
+(key tuple, old value, new value) entry. Later assignments see the values planned by earlier
+ones, so several changes to the same key are planned in the order they would be applied.
+
+Classes:
+    ChangePlan: Records the value changes an apply would make to one document.
+
+Methods (ChangePlan class):
+    __init__(self, data): Initializes an empty plan for a loaded document.
+    current(self, keys): Returns the value a key would hold after the assignments planned so far.
+    assign(self, keys, value): Plans an assignment if it would change the document.
+    diff(self, keys): Returns the (old value, new value) planned for a key, or None.
+    estimate_bytes(self, size): Estimates the size of the document after the planned changes.
+"""
+
+import json
+from key_path_trie import lookup, same_value
+
+# Stands in for the old value of a key that does not exist yet
+MISSING = object()
+
+class ChangePlan:
+    """
+    Records the value changes an apply would make to one document.
+
+    The 'values' attribute maps every changed key tuple to its (old value, new value) pair in
+    the order the keys were first assigned; old values of keys that do not exist are MISSING.
+    """
+
+    def __init__(self, data):
+        """
+        Initializes an empty plan for a loaded document.
+
+        :param data: The loaded JSON document; it is never modified.
+        """
+        self.data = data
+        self.values = {}
+
+    def current(self, keys):
+        """
+        Returns the value a key would hold after the assignments planned so far.
+
+        :param keys: The key tuple.
+        :return: The value, or MISSING if the key would not exist.
+        """
+        if keys in self.values:
+            return self.values[keys][1]
+        return lookup(self.data, keys, MISSING)
+
+    def assign(self, keys, value):
+        """
+        Plans an assignment if it would change the document.
+
+        Values are compared with key_path_trie.same_value(), exactly as when applying.
+
+        :param keys: The key tuple.
+        :param value: The new value.
+        :return: True if the document would change, False if the key already holds the value.
+        """
+        current = self.current(keys)
+        if current is not MISSING and same_value(current, value):
+            return False
+        old = self.values[keys][0] if keys in self.values else current
+        self.values[keys] = (old, value)
+        return True
+
+    def diff(self, keys):
+        """
+        Returns the (old value, new value) planned for a key.
+
+        :param keys: The key tuple.
+        :return: The pair, or None if the key is unchanged or was set back to its old value.
+        """
+        planned = self.values.get(keys)
+        if planned is None:
+            return None
+        old, new = planned
+        if old is not MISSING and same_value(old, new):
+            return None
+        return planned
+
+    def estimate_bytes(self, size):
+        """
+        Estimates the size of the document after the planned changes.
+
+        Changed values are assumed to be patched in place, so the estimate is the current size
+        plus the difference in serialized length of every changed value; a new key adds its
+        name and value.
+
+        :param size: The current size of the document's file in bytes.
+        :return: The estimated size in bytes.
+        """
+        for keys in self.values:
+            planned = self.diff(keys)
+            if planned is None:
+                continue
+            old, new = planned
+            size += len(json.dumps(new, ensure_ascii=False).encode('utf-8'))
+            if old is MISSING:
+                size += len(json.dumps(keys[-1], ensure_ascii=False).encode('utf-8')) + 2
+            else:
+                size -= len(json.dumps(old, ensure_ascii=False).encode('utf-8'))
+        return size
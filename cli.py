@@ -0,0 +1,246 @@
+"""
+Command-line interface for applying presets without a display.
+
+Runs the same BatchApply engine as the GUI, so a preset can be applied to an SPT server from
+scripts and deployment tooling:
+
+    python main.py apply --preset presets/cat.json --config config.json [--dry-run] [--jobs N] [--json]
+    python main.py apply --preset presets/cat.json --all-servers [--server-jobs N]
+    python main.py apply --preset presets/cat.json --server alpha --server beta
+    python main.py apply --preset presets/cat.json --trace apply-trace.json
+
+Settings missing from the preset keep their schema defaults, exactly as when the preset is loaded
+into a freshly started GUI. With --json, a single JSON object describing the outcome and per-file
+timings is printed to standard output; log messages go to the configured log file and standard
+error.
+
+With --dry-run, the changes are only planned, as for the GUI's preview, and the old and new value
+of every change is reported instead of timings. Nothing is written to the server directories, not
+even temporary files.
+
+With --server or --all-servers, the preset is applied to the named server profiles from the
+'servers' section of the configuration concurrently (see fleet_apply.py), and a per-server result
+table with aggregate throughput is reported.
+
+With --trace, timing spans of configuration and schema loading and of every parse, mutation and
+write are saved as a Chrome trace-event file, viewable in chrome://tracing or ui.perfetto.dev.
+
+Exit codes:
+    0: The apply (or dry run) succeeded on every server.
+    1: Applying failed on at least one server; no file of that server was modified.
+    2: Invalid arguments, configuration, preset, preset values or server directories. Every
+       value that does not match its setting's type or bounds is listed under 'errors'.
+
+Functions:
+    build_parser(): Builds the argument parser.
+    run_apply(args): Applies a preset and reports the outcome.
+    run_fleet_apply(args, config_manager, values, schema, report): Applies values to several server profiles.
+    main(argv=None): Parses arguments, runs the command and returns the exit code.
+"""
+
+import argparse
+import json
+import logging
+import sys
+import time
+
+from config_manager import ConfigManager
+from logger_setup import LoggerSetup
+from directory_validator import DirectoryValidator
+from batch_apply import BatchApply
+from preset_manager import PresetManager
+from settings_model import SettingsModel
+from schema_index import SchemaError, ValidationError
+from fleet_apply import FleetApply, format_result_table
+from tracing import Trace, active_trace
+
+EXIT_OK = 0
+EXIT_APPLY_FAILED = 1
+EXIT_USAGE = 2
+
+def build_parser():
+    """
+    Builds the argument parser.
+
+    :return: The argparse.ArgumentParser for the command line.
+    """
+    parser = argparse.ArgumentParser(
+        prog='servervaluechanger',
+        description="Apply ServerValueChanger presets to an SPT server without the GUI."
+    )
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    apply_parser = subparsers.add_parser('apply', help="Apply a preset to the server files.")
+    apply_parser.add_argument('--preset', required=True, help="The preset JSON file to apply.")
+    apply_parser.add_argument('--config', default='config.json',
+                              help="The configuration file (default: config.json).")
+    apply_parser.add_argument('--schema', default='config_schema.json',
+                              help="The settings schema file (default: config_schema.json).")
+    apply_parser.add_argument('--dry-run', action='store_true',
+                              help="Plan the changes and report them without writing any file.")
+    apply_parser.add_argument('--jobs', type=int, default=None, metavar='N',
+                              help="Number of worker processes; 0 uses one per CPU "
+                                   "(default: apply.workers from the configuration).")
+    apply_parser.add_argument('--json', action='store_true',
+                              help="Print the outcome and timings as JSON.")
+    apply_parser.add_argument('--server', action='append', default=[], metavar='NAME',
+                              help="Apply to the named server profile; may be repeated.")
+    apply_parser.add_argument('--all-servers', action='store_true',
+                              help="Apply to every server profile in the configuration.")
+    apply_parser.add_argument('--server-jobs', type=int, default=None, metavar='N',
+                              help="Number of servers applied concurrently "
+                                   "(default: apply.server_workers from the configuration).")
+    apply_parser.add_argument('--trace', default=None, metavar='FILE',
+                              help="Save timing spans as a Chrome trace-event JSON file.")
+    return parser
+
+def _report(args, report):
+    """
+    Prints the outcome of a command as JSON or as readable text.
+
+    :param args: The parsed arguments.
+    :param report: The report dictionary.
+    """
+    if args.json:
+        print(json.dumps(report, indent=4))
+        return
+    if 'servers' in report:
+        print(format_result_table(report))
+        return
+    if report['status'] != 'ok':
+        print(f"Error: {report['error']}", file=sys.stderr)
+        for error in report.get('errors', []):
+            print(f"  {error['label']} ({error['id']}): {error['message']}", file=sys.stderr)
+        return
+    for relative_path in report['touched']:
+        if report['dry_run']:
+            plan = report['files'][relative_path]
+            print(f"Would update {relative_path} ({plan['values']} value(s), "
+                  f"about {plan['bytes']:,} bytes)")
+            continue
+        timings = report['timings'][relative_path]
+        print(f"Updated {relative_path} (parse {timings['parse']:.3f}s, "
+              f"mutate {timings['mutate']:.3f}s, write {timings['write']:.3f}s)")
+    outcome = "would be updated" if report['dry_run'] else "updated"
+    print(f"{len(report['touched'])} file(s) {outcome}, {len(report['skipped'])} unchanged "
+          f"in {report['elapsed']:.3f}s with {report['workers']} worker(s)")
+
+def run_apply(args):
+    """
+    Applies a preset and reports the outcome.
+
+    :param args: The parsed arguments of the 'apply' command.
+    :return: The exit code.
+    """
+    report = {'status': 'error', 'dry_run': args.dry_run}
+    fleet = bool(args.server or args.all_servers)
+    try:
+        config_manager = ConfigManager(args.config, args.schema)
+        LoggerSetup(config_manager)
+        if not fleet:
+            DirectoryValidator([
+                config_manager.get_setting('paths.server_database'),
+                config_manager.get_setting('paths.server_config')
+            ]).validate()
+    except (FileNotFoundError, KeyError, ValueError) as e:
+        report['error'] = str(e)
+        _report(args, report)
+        return EXIT_USAGE
+
+    try:
+        preset = PresetManager(config_schema_path=args.schema).load_preset(args.preset)
+    except (AttributeError, KeyError, TypeError) as e:
+        # Valid JSON, but not an object of {"label": ..., "value": ...} entries
+        report['error'] = f"Invalid preset {args.preset}: {type(e).__name__}: {e}"
+        _report(args, report)
+        return EXIT_USAGE
+    if preset is None:
+        report['error'] = f"Failed to load preset: {args.preset}"
+        _report(args, report)
+        return EXIT_USAGE
+
+    schema = config_manager.get_schema()
+    try:
+        model = SettingsModel(schema)
+    except SchemaError as e:
+        report['error'] = f"Invalid schema: {e}"
+        _report(args, report)
+        return EXIT_USAGE
+    unknown = sorted(set(preset) - set(model.settings))
+    for key in unknown:
+        logging.warning("Preset setting %s is not in the schema and is ignored", key)
+    model.update(preset)
+    report['ignored_settings'] = unknown
+    if fleet:
+        return run_fleet_apply(args, config_manager, model.values(), schema, report)
+
+    started = time.perf_counter()
+    try:
+        result = BatchApply(config_manager, workers=args.jobs).apply_changes(
+            model.values(), schema, dry_run=args.dry_run
+        )
+    except ValidationError as e:
+        report.update({'error': "Invalid setting values", 'errors': e.errors})
+        _report(args, report)
+        return EXIT_USAGE
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        report.update({'error': str(e), 'error_type': type(e).__name__,
+                       'elapsed': time.perf_counter() - started})
+        _report(args, report)
+        return EXIT_APPLY_FAILED
+
+    report.update(result)
+    report.update({'status': 'ok', 'elapsed': time.perf_counter() - started})
+    _report(args, report)
+    return EXIT_OK
+
+def run_fleet_apply(args, config_manager, values, schema, report):
+    """
+    Applies values to several server profiles and reports the per-server results.
+
+    :param args: The parsed arguments of the 'apply' command.
+    :param config_manager: The loaded configuration manager.
+    :param values: The plain values to apply, keyed by setting ID.
+    :param schema: The schema defining the structure of the settings.
+    :param report: The report dictionary to complete.
+    :return: The exit code.
+    """
+    try:
+        fleet_apply = FleetApply(config_manager, server_workers=args.server_jobs, workers=args.jobs)
+        result = fleet_apply.apply(values, schema, None if args.all_servers else args.server,
+                                   dry_run=args.dry_run, trace=active_trace())
+    except ValidationError as e:
+        report.update({'error': "Invalid setting values", 'errors': e.errors})
+        _report(args, report)
+        return EXIT_USAGE
+    except (KeyError, ValueError) as e:
+        report['error'] = str(e)
+        _report(args, report)
+        return EXIT_USAGE
+
+    report.update(result)
+    report['status'] = 'ok' if result['aggregate']['failed'] == 0 else 'error'
+    _report(args, report)
+    return EXIT_OK if report['status'] == 'ok' else EXIT_APPLY_FAILED
+
+def main(argv=None):
+    """
+    Parses arguments, runs the command and returns the exit code.
+
+    :param argv: The arguments without the program name; defaults to sys.argv[1:].
+    :return: The exit code.
+    """
+    args = build_parser().parse_args(argv)
+    if args.command == 'apply':
+        if not args.trace:
+            return run_apply(args)
+        trace = Trace('servervaluechanger apply')
+        with trace.activate():
+            code = run_apply(args)
+        trace.export(args.trace)
+        logging.info("Trace saved to %s (%s)", args.trace, trace.summary())
+        return code
+    return EXIT_USAGE
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,36 +5,58 @@ Classes:
     ComplexConfigHandler: Handles complex configuration updates for StackMaxSize in JSON files.
 
 Methods:
-    __init__(self, config_manager): Initializes the ComplexConfigHandler with a given configuration manager.
+    __init__(self, config_manager, document_cache=None, safe_writer=None, backup_store=None): Initializes the ComplexConfigHandler with a given configuration manager.
     update_ammo_stack_size(self, settings, schema): Updates the StackMaxSize for items in JSON configuration files.
+    prepare(self, schema): Compiles the criteria of every complex setting in a newly loaded schema.
+    apply_complex_change(self, data, change, index=None, assignments=None): Applies a complex change to a loaded JSON document.
+    plan_complex_change(self, data, change, plan, index=None): Plans a complex change without modifying the document.
+    read_complex_values(self, data, setting, index=None): Reads the current values of the records a complex setting targets.
+    set_ammo_stack_size(self, data, value, index=None, assignments=None): Sets the StackMaxSize for every ammo item.
     resolve_full_path(self, file_path): Resolves the full path of a given file path based on the base directory.
 """
 
 import json
-import os
 import logging
-import tkinter as tk
+from item_template_index import ItemTemplateIndex, AMMO_CATEGORY_ID
+from criteria_engine import CriteriaEngine
+from key_path_trie import lookup, parse_key_path, same_value
+from document_cache import get_document_cache
+from safe_writer import SafeWriter
+from backup_store import BackupStore
+from schema_index import get_schema_index, resolve_path, coerce_value
+from tracing import span
+from logger_setup import BulkLog
 
 class ComplexConfigHandler:
     """
     Handles complex configuration updates for StackMaxSize in JSON files.
     """
 
-    def __init__(self, config_manager):
+    def __init__(self, config_manager, document_cache=None, safe_writer=None, backup_store=None):
         """
         Initializes the ComplexConfigHandler with a given configuration manager.
 
         Args:
             config_manager: An instance managing configuration settings.
+            document_cache: The DocumentCache to load files through; defaults to the
+                process-wide cache.
+            safe_writer: The SafeWriter used to replace files.
+            backup_store: The BackupStore snapshotting files before they are replaced;
+                defaults to the one configured in the 'backup' section.
         """
         self.config_manager = config_manager
+        self.document_cache = document_cache or get_document_cache()
+        self.safe_writer = safe_writer or SafeWriter()
+        self.backup_store = backup_store or BackupStore.from_config(config_manager)
+        self.criteria_engine = CriteriaEngine()
+        self._prepared_schema = None
 
     def update_ammo_stack_size(self, settings, schema):
         """
         Updates the StackMaxSize for items in JSON configuration files based on given settings.
 
         Args:
-            settings: A dictionary containing the settings from the UI.
+            settings: A dictionary of plain setting values keyed by setting ID.
             schema: A dictionary representing the schema of the configuration.
 
         Returns:
@@ -42,46 +64,219 @@ class ComplexConfigHandler:
         """
         file_changes = {}
 
-        for tab_data in schema['tabs'].values():
-            for group_data in tab_data['groups'].values():
-                for setting in group_data['settings']:
-                    if setting.get('complex', False) and setting['key_path'] == '_props.StackMaxSize':
-                        key_path = setting['key_path']
-                        file_path = setting['file']
-                        if key_path in settings:
-                            widget = settings[key_path]
-                            value = widget.get() if isinstance(widget, tk.Entry) else widget.get()
-
-                            try:
-                                resolved_file_path = self.resolve_full_path(file_path)
-                                logging.debug("Applying complex changes to %s", resolved_file_path)
-
-                                # Load current content of the JSON file
-                                with open(resolved_file_path, 'r', encoding='utf-8') as file:
-                                    data = json.load(file)
-
-                                # Apply the specific complex change
-                                for item_id, item_data in data.items():
-                                    if item_data.get('_parent') == '5485a8684bdc2da71d8b4567':
-                                        item_data['_props']['StackMaxSize'] = int(value)
-                                        logging.debug(
-                                            "Updated StackMaxSize for item %s to %s", item_id, value
-                                        )
-
-                                # Collect changes to pass to BatchApply
-                                file_changes[file_path] = data
-
-                                # Write modified content back to the JSON file
-                                with open(resolved_file_path, 'w', encoding='utf-8') as file:
-                                    json.dump(data, file, ensure_ascii=False, indent=4)
-
-                            except FileNotFoundError as e:
-                                logging.error("Error applying complex changes: %s", e)
-                            except ValueError as e:
-                                logging.error("Error resolving file path: %s", e)
+        for entry in get_schema_index(schema).entries:
+            if not entry['complex'] or entry['key_path'] != '_props.StackMaxSize':
+                continue
+            if entry['id'] not in settings:
+                continue
+            file_path = entry['file']
+            value = settings[entry['id']]
+
+            try:
+                resolved_file_path = self.resolve_full_path(file_path)
+                logging.debug("Applying complex changes to %s", resolved_file_path)
+
+                # Load current content of the JSON file
+                data = self.document_cache.load(resolved_file_path)
+
+                # Apply the specific complex change
+                try:
+                    self.set_ammo_stack_size(data, value)
+
+                    # Collect changes to pass to BatchApply
+                    file_changes[file_path] = data
+
+                    # Write modified content back to the JSON file
+                    if self.backup_store is not None:
+                        self.backup_store.create_snapshot({file_path: resolved_file_path})
+                    self.safe_writer.write_text(
+                        resolved_file_path,
+                        json.dumps(data, ensure_ascii=False, indent=4)
+                    )
+                except Exception:
+                    self.document_cache.invalidate(resolved_file_path)
+                    raise
+                self.document_cache.store(resolved_file_path, data)
+
+            except FileNotFoundError as e:
+                logging.error("Error applying complex changes: %s", e)
+            except ValueError as e:
+                logging.error("Error resolving file path: %s", e)
 
         return file_changes
 
+    def prepare(self, schema):
+        """
+        Compiles the criteria of every complex setting in a newly loaded schema.
+
+        Compiled predicates are kept until a different schema object is prepared.
+
+        Args:
+            schema: A dictionary representing the schema of the configuration.
+        """
+        if schema is self._prepared_schema:
+            return
+        self.criteria_engine.clear()
+        for entry in get_schema_index(schema).entries:
+            if entry['complex'] and entry['setting'].get('criteria'):
+                self.criteria_engine.compile(entry['setting']['criteria'])
+        self._prepared_schema = schema
+
+    def apply_complex_change(self, data, change, index=None, assignments=None):
+        """
+        Applies a complex change to an already loaded JSON document.
+
+        Settings that declare criteria are applied to every matching record; settings without
+        criteria fall back to the built-in handlers.
+
+        Args:
+            data: The loaded JSON document to mutate in place.
+            change: A change dictionary with 'key_path' and 'value'.
+            index: An optional ItemTemplateIndex over data, shared by all changes to the document.
+            assignments: An optional dictionary that receives the key tuple and value of every
+                changed record.
+
+        Returns:
+            The number of records whose value changed.
+
+        Raises:
+            ValueError: If no complex handler exists for the change's key path.
+        """
+        criteria = change.get('setting', {}).get('criteria')
+        with span('complex', key_path=change['key_path']):
+            if criteria:
+                if index is None:
+                    index = ItemTemplateIndex(data)
+                value = self._coerce_value(change['value'], change['setting'].get('type'))
+                return self.criteria_engine.apply(data, criteria, change['key_path'], value,
+                                                  index, assignments)
+            if change['key_path'] == '_props.StackMaxSize':
+                return self.set_ammo_stack_size(data, change['value'], index, assignments)
+        raise ValueError(f"No complex handler for key path: {change['key_path']}")
+
+    def plan_complex_change(self, data, change, plan, index=None):
+        """
+        Plans a complex change without modifying the document.
+
+        The same records are selected as by apply_complex_change(), and the assignment to each
+        of them is recorded in the plan.
+
+        Args:
+            data: The loaded JSON document; it is not modified.
+            change: A change dictionary with 'key_path' and 'value'.
+            plan: The ChangePlan of the document.
+            index: An optional ItemTemplateIndex over data, shared by all changes to the document.
+
+        Returns:
+            The number of records whose value would change.
+
+        Raises:
+            ValueError: If no complex handler exists for the change's key path.
+        """
+        setting = change.get('setting', {})
+        record_ids, keys = self._target_records(data, setting, change['key_path'], index)
+        if setting.get('criteria'):
+            value = self._coerce_value(change['value'], setting.get('type'))
+        else:
+            value = int(change['value'])
+        return sum(1 for record_id in record_ids if plan.assign((record_id, *keys), value))
+
+    def read_complex_values(self, data, setting, index=None):
+        """
+        Reads the current values of the records a complex setting targets.
+
+        The same records are selected as by apply_complex_change().
+
+        Args:
+            data: The loaded JSON document; it is not modified.
+            setting: The complex setting dictionary from the schema.
+            index: An optional ItemTemplateIndex over data, shared by all settings of the
+                document.
+
+        Returns:
+            A tuple of the number of targeted records and the list of their values, leaving out
+            records that do not hold the key path yet.
+
+        Raises:
+            ValueError: If no complex handler exists for the setting's key path.
+        """
+        record_ids, keys = self._target_records(data, setting, setting['key_path'], index)
+        missing = object()
+        values = [lookup(data[record_id], keys, missing) for record_id in record_ids]
+        return len(record_ids), [value for value in values if value is not missing]
+
+    def _target_records(self, data, setting, key_path, index):
+        """
+        Selects the records a complex setting targets.
+
+        Args:
+            data: The loaded JSON document.
+            setting: The complex setting dictionary from the schema.
+            key_path: The setting's key path, relative to each record.
+            index: An ItemTemplateIndex over data, or None to build one.
+
+        Returns:
+            A tuple of the list of record IDs and the key tuple within each record.
+
+        Raises:
+            ValueError: If no complex handler exists for the key path.
+        """
+        if index is None:
+            index = ItemTemplateIndex(data)
+        criteria = setting.get('criteria')
+        if criteria:
+            return self.criteria_engine.select(data, criteria, index), parse_key_path(key_path)
+        if key_path == '_props.StackMaxSize':
+            return index.get_descendant_items(AMMO_CATEGORY_ID), ('_props', 'StackMaxSize')
+        raise ValueError(f"No complex handler for key path: {key_path}")
+
+    def set_ammo_stack_size(self, data, value, index=None, assignments=None):
+        """
+        Sets the StackMaxSize for every ammo item in a loaded items document.
+
+        Ammo is every item descending from the ammo category, including nested categories.
+
+        Args:
+            data: The loaded items document to mutate in place.
+            value: The new stack size.
+            index: An optional ItemTemplateIndex over data; one is built if not given.
+            assignments: An optional dictionary that receives the key tuple and value of every
+                changed item.
+
+        Returns:
+            The number of items whose StackMaxSize changed.
+        """
+        if index is None:
+            index = ItemTemplateIndex(data)
+        value = int(value)
+        bulk_log = BulkLog("Updated StackMaxSize to %s", value)
+        for item_id in index.get_descendant_items(AMMO_CATEGORY_ID):
+            props = data[item_id].setdefault('_props', {})
+            if 'StackMaxSize' not in props or not same_value(props['StackMaxSize'], value):
+                props['StackMaxSize'] = value
+                bulk_log.add(item_id)
+                if assignments is not None:
+                    assignments[(item_id, '_props', 'StackMaxSize')] = value
+        bulk_log.log()
+        return bulk_log.count
+
+    @staticmethod
+    def _coerce_value(value, value_type):
+        """
+        Coerces a UI value to the type declared by its setting.
+
+        Args:
+            value: The value read from the UI.
+            value_type: The schema type ('integer', 'float', 'boolean' or other).
+
+        Returns:
+            The coerced value.
+
+        Raises:
+            ValueError: If the value cannot be converted.
+        """
+        return coerce_value(value, value_type)
+
     def resolve_full_path(self, file_path):
         """
         Resolves the full path of a given file path based on the base directory.
@@ -95,12 +290,6 @@ class ComplexConfigHandler:
         Raises:
             ValueError: If the base directory is unknown.
         """
-        file_base = file_path.split('/', 1)[0]
-        if file_base == 'database':
-            base_path = self.config_manager.get_setting('paths.server_database')
-        elif file_base == 'configs':
-            base_path = self.config_manager.get_setting('paths.server_config')
-        else:
-            raise ValueError(f"Unknown base directory for file path: {file_path}")
-
-        return os.path.join(base_path, file_path.split('/', 1)[1])
+        return resolve_path(
+            file_path, lambda name: self.config_manager.get_setting(f'paths.{name}')
+        )
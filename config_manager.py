@@ -6,15 +6,20 @@ Classes:
 
 Methods:
     __init__(self, config_path, schema_path): Initializes ConfigManager with paths to configuration and schema files.
-    load_config(self): Loads the configuration file.
-    load_schema(self): Loads the schema file.
-    get_setting(self, setting_path): Retrieves a setting from the configuration.
+    load_config(self): Loads the configuration file through the shared document cache.
+    load_schema(self): Loads the schema file through the shared document cache.
+    get_setting(self, setting_path, default=_MISSING): Retrieves a setting from the configuration.
     get_schema(self): Retrieves the schema.
+    get_schema_index(self): Retrieves the compiled SchemaIndex of the schema.
 """
 
-import json
 import os
 import logging
+from document_cache import get_document_cache
+from schema_index import get_schema_index
+from tracing import span
+
+_MISSING = object()
 
 class ConfigManager:
     """
@@ -37,8 +42,8 @@ class ConfigManager:
             logging.error("Configuration file not found: %s", self.config_path)
             raise FileNotFoundError(f"Configuration file not found: {self.config_path}")
 
-        with open(self.config_path, 'r', encoding='utf-8') as file:
-            config = json.load(file)
+        with span('load_config', 'startup', file=self.config_path):
+            config = get_document_cache().load(self.config_path)
 
         logging.info("Configuration file loaded successfully.")
         return config
@@ -51,22 +56,26 @@ class ConfigManager:
             logging.error("Schema file not found: %s", self.schema_path)
             raise FileNotFoundError(f"Schema file not found: {self.schema_path}")
 
-        with open(self.schema_path, 'r', encoding='utf-8') as file:
-            schema = json.load(file)
+        with span('load_schema', 'startup', file=self.schema_path):
+            schema = get_document_cache().load(self.schema_path)
 
         logging.info("Schema file loaded successfully.")
         return schema
 
-    def get_setting(self, setting_path):
+    def get_setting(self, setting_path, default=_MISSING):
         """
         Retrieve a setting from the configuration.
+
+        If a default is given it is returned for missing settings instead of raising KeyError.
         """
         keys = setting_path.split('.')
         value = self.config
 
         for key in keys:
-            value = value.get(key)
+            value = value.get(key) if isinstance(value, dict) else None
             if value is None:
+                if default is not _MISSING:
+                    return default
                 logging.error("Setting '%s' not found in configuration.", setting_path)
                 raise KeyError(f"Setting '{setting_path}' not found in configuration.")
 
@@ -77,3 +86,11 @@ class ConfigManager:
         Retrieve the schema.
         """
         return self.schema
+
+    def get_schema_index(self):
+        """
+        Retrieve the compiled SchemaIndex of the schema.
+
+        The index is built on first use and shared with every other user of the same schema.
+        """
+        return get_schema_index(self.schema)
@@ -0,0 +1,204 @@
+"""
+Module for compiling schema criteria into record predicates and applying bulk changes.
+
+A complex setting's "criteria" object selects the records of a keyed document (for example the
+item templates in database/templates/items.json) that its value is written to. The setting's
+key_path is then resolved relative to every matching record.
+
+Supported criteria keys:
+    ids: List of record IDs to include.
+    exclude_ids: List of record IDs to exclude.
+    parent: Parent ID (or list of IDs) the record's _parent must match.
+    ancestor: ID (or list of IDs) the record must transitively descend from.
+    exclude_ancestor: ID (or list of IDs) the record must not descend from.
+    type: Required value of the record's _type (e.g. "Item").
+    props: Mapping of _props fields to the values they must equal, including their type
+           (see key_path_trie.same_value()), so 1 matches neither true nor 1.0.
+    ranges: Mapping of _props fields to {"min": x, "max": y} inclusive bounds.
+
+Classes:
+    CriteriaEngine: Compiles criteria into cached predicates and applies values to matching records.
+
+Methods (CriteriaEngine class):
+    __init__(self): Initializes the engine with an empty predicate cache.
+    compile(self, criteria): Compiles a criteria object into a predicate, reusing cached predicates.
+    select(self, data, criteria, index): Returns the IDs of all records matching the criteria.
+    apply(self, data, criteria, key_path, value, index, assignments=None): Sets a value on every matching record, counting changes.
+    clear(self): Drops all compiled predicates.
+"""
+
+import json
+from key_path_trie import assign, parse_key_path, same_value
+from logger_setup import BulkLog
+
+# Stands for a _props field a record does not have
+_MISSING = object()
+
+SUPPORTED_KEYS = {'ids', 'exclude_ids', 'parent', 'ancestor', 'exclude_ancestor', 'type', 'props', 'ranges'}
+
+def _as_set(value):
+    """Return a criteria value that may be a single ID or a list of IDs as a set."""
+    if isinstance(value, (list, tuple, set)):
+        return set(value)
+    return {value}
+
+class CriteriaEngine:
+    """
+    Compiles criteria into cached predicates and applies values to matching records.
+    """
+
+    def __init__(self):
+        """
+        Initializes the engine with an empty predicate cache.
+        """
+        self._compiled = {}
+
+    def compile(self, criteria):
+        """
+        Compiles a criteria object into a predicate, reusing cached predicates.
+
+        The predicate is called as predicate(record_id, record, index) and returns a boolean.
+
+        :param criteria: The criteria object from the schema.
+        :return: The compiled predicate.
+        :raises ValueError: If the criteria contain unsupported keys.
+        """
+        cache_key = json.dumps(criteria, sort_keys=True)
+        if cache_key in self._compiled:
+            return self._compiled[cache_key]
+
+        unknown = set(criteria) - SUPPORTED_KEYS
+        if unknown:
+            raise ValueError(f"Unsupported criteria keys: {sorted(unknown)}")
+
+        checks = []
+        if 'ids' in criteria:
+            ids = _as_set(criteria['ids'])
+            checks.append(lambda record_id, record, index: record_id in ids)
+        if 'exclude_ids' in criteria:
+            exclude_ids = _as_set(criteria['exclude_ids'])
+            checks.append(lambda record_id, record, index: record_id not in exclude_ids)
+        if 'parent' in criteria:
+            parents = _as_set(criteria['parent'])
+            checks.append(lambda record_id, record, index: record.get('_parent') in parents)
+        if 'ancestor' in criteria:
+            ancestors = _as_set(criteria['ancestor'])
+            checks.append(lambda record_id, record, index:
+                          not ancestors.isdisjoint(index.get_ancestors(record_id)))
+        if 'exclude_ancestor' in criteria:
+            excluded = _as_set(criteria['exclude_ancestor'])
+            checks.append(lambda record_id, record, index:
+                          excluded.isdisjoint(index.get_ancestors(record_id)))
+        if 'type' in criteria:
+            record_type = criteria['type']
+            checks.append(lambda record_id, record, index: record.get('_type') == record_type)
+        for prop_name, expected in criteria.get('props', {}).items():
+            checks.append(lambda record_id, record, index, prop_name=prop_name, expected=expected:
+                          same_value(record.get('_props', {}).get(prop_name, _MISSING), expected))
+        for prop_name, bounds in criteria.get('ranges', {}).items():
+            checks.append(self._compile_range(prop_name, bounds))
+
+        def predicate(record_id, record, index):
+            return all(check(record_id, record, index) for check in checks)
+
+        self._compiled[cache_key] = predicate
+        return predicate
+
+    @staticmethod
+    def _compile_range(prop_name, bounds):
+        """
+        Compiles an inclusive numeric range check on a _props field.
+
+        :param prop_name: The name of the field inside _props.
+        :param bounds: A dictionary with optional 'min' and 'max' bounds.
+        :return: The range check.
+        """
+        minimum = bounds.get('min')
+        maximum = bounds.get('max')
+
+        def check(record_id, record, index):
+            value = record.get('_props', {}).get(prop_name)
+            if not isinstance(value, (int, float)) or isinstance(value, bool):
+                return False
+            if minimum is not None and value < minimum:
+                return False
+            if maximum is not None and value > maximum:
+                return False
+            return True
+
+        return check
+
+    def _candidates(self, data, criteria, index):
+        """
+        Narrows the records to test using the template index where the criteria allow it.
+
+        :param data: The loaded keyed document.
+        :param criteria: The criteria object.
+        :param index: The ItemTemplateIndex over data.
+        :return: An iterable of candidate record IDs.
+        """
+        if 'ids' in criteria:
+            return [record_id for record_id in _as_set(criteria['ids']) if record_id in data]
+        if 'parent' in criteria:
+            return [child_id for parent_id in _as_set(criteria['parent'])
+                    for child_id in index.get_children(parent_id)]
+        if 'ancestor' in criteria:
+            candidates = []
+            for ancestor_id in _as_set(criteria['ancestor']):
+                candidates.extend(index.get_descendants(ancestor_id))
+            return list(dict.fromkeys(candidates))
+        for prop_name, expected in criteria.get('props', {}).items():
+            return index.find_by_prop(prop_name, expected)
+        return data.keys()
+
+    def select(self, data, criteria, index):
+        """
+        Returns the IDs of all records matching the criteria.
+
+        :param data: The loaded keyed document.
+        :param criteria: The criteria object.
+        :param index: The ItemTemplateIndex over data.
+        :return: A list of matching record IDs.
+        """
+        predicate = self.compile(criteria)
+        return [
+            record_id for record_id in self._candidates(data, criteria, index)
+            if isinstance(data.get(record_id), dict) and predicate(record_id, data[record_id], index)
+        ]
+
+    def apply(self, data, criteria, key_path, value, index, assignments=None):
+        """
+        Sets a value on every record matching the criteria in a single pass.
+
+        Records that already hold the value, compared with key_path_trie.same_value(), are left
+        untouched and not counted. The key path is followed as by key_path_trie.assign().
+
+        :param data: The loaded keyed document to mutate in place.
+        :param criteria: The criteria object.
+        :param key_path: The dot-separated path, relative to each record, to set; see
+                         key_path_trie.parse_key_path().
+        :param value: The value to set.
+        :param index: The ItemTemplateIndex over data.
+        :param assignments: An optional dictionary that receives the full key tuple and value of
+                            every changed record.
+        :return: The number of records whose value changed.
+        :raises KeyError: If the key path leads through a scalar value or past the end of an
+                          array in a record.
+        """
+        keys = parse_key_path(key_path)
+        record_ids = self.select(data, criteria, index)
+        bulk_log = BulkLog("Set %s to %s", key_path, value)
+        for record_id in record_ids:
+            if not assign(data[record_id], keys, value):
+                continue
+            bulk_log.add(record_id)
+            if assignments is not None:
+                assignments[(record_id, *keys)] = value
+        bulk_log.log()
+        return bulk_log.count
+
+    def clear(self):
+        """
+        Drops all compiled predicates.
+        """
+        self._compiled.clear()
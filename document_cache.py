@@ -0,0 +1,193 @@
+"""
+Module providing a process-wide cache of parsed JSON documents.
+
+Parsing the SPT database files dominates reload and apply time, and several components read the
+same files (config_schema.json is read by ConfigManager and PresetManager). DocumentCache keeps
+parsed documents keyed by resolved path and reuses them while the file's (st_mtime_ns, st_size)
+signature, and optionally its content hash, is unchanged.
+
+Cached documents are shared objects: callers that mutate a document must either store() it after
+writing it back to disk or invalidate() its path.
+
+Classes:
+    DocumentCache: LRU cache of parsed JSON documents with an approximate memory budget.
+
+Functions:
+    get_document_cache(): Returns the process-wide DocumentCache instance.
+
+Methods (DocumentCache class):
+    __init__(self, max_bytes=DEFAULT_MAX_BYTES, verify_hash=False): Initializes an empty cache.
+    load(self, path): Returns the parsed document at path, parsing it only if it changed.
+    store(self, path, document): Records a document that was just written to path.
+    invalidate(self, path): Drops the cached document for path.
+    clear(self): Drops all cached documents and resets the counters.
+    stats(self): Returns the hit/miss counters and current usage.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from tracing import span
+
+# Parsed Python objects take several times the size of their JSON text
+MEMORY_FACTOR = 6
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+
+class DocumentCache:
+    """
+    LRU cache of parsed JSON documents with an approximate memory budget.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, verify_hash=False):
+        """
+        Initializes an empty cache.
+
+        :param max_bytes: Approximate memory budget; an entry is estimated at MEMORY_FACTOR times
+                          the size of its file.
+        :param verify_hash: If True, a cached document is only reused when the SHA-1 of the file
+                            content also matches, which catches edits that keep mtime and size.
+        """
+        self.max_bytes = max_bytes
+        self.verify_hash = verify_hash
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._used_bytes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(path):
+        """Return the cache key for a path."""
+        return os.path.realpath(path)
+
+    @staticmethod
+    def _signature(path):
+        """Return the (st_mtime_ns, st_size) signature of a file."""
+        stat = os.stat(path)
+        return stat.st_mtime_ns, stat.st_size
+
+    @staticmethod
+    def _hash(content):
+        """Return the SHA-1 hex digest of file content."""
+        return hashlib.sha1(content).hexdigest()
+
+    def load(self, path):
+        """
+        Returns the parsed document at path, parsing it only if it changed.
+
+        :param path: The path of the JSON file.
+        :return: The parsed document.
+        :raises FileNotFoundError: If the file does not exist.
+        :raises json.JSONDecodeError: If the file is not valid JSON.
+        """
+        key = self._key(path)
+        signature = self._signature(path)
+        content = None
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None and entry['signature'] == signature:
+            if self.verify_hash:
+                with open(path, 'rb') as file:
+                    content = file.read()
+            if not self.verify_hash or entry['hash'] == self._hash(content):
+                with self._lock:
+                    self.hits += 1
+                    if key in self._entries:
+                        self._entries.move_to_end(key)
+                logging.debug("Document cache hit for %s", path)
+                return entry['document']
+
+        if content is None:
+            with span('read', file=path), open(path, 'rb') as file:
+                content = file.read()
+        with span('json_parse', file=path, bytes=len(content)):
+            document = json.loads(content.decode('utf-8'))
+        with self._lock:
+            self.misses += 1
+        logging.debug("Document cache miss for %s", path)
+        self._put(key, document, signature, content)
+        return document
+
+    def store(self, path, document):
+        """
+        Records a document that was just written to path.
+
+        :param path: The path the document was written to.
+        :param document: The document as written.
+        """
+        content = None
+        if self.verify_hash:
+            with open(path, 'rb') as file:
+                content = file.read()
+        self._put(self._key(path), document, self._signature(path), content)
+
+    def _put(self, key, document, signature, content):
+        """Insert an entry and evict least recently used entries beyond the budget."""
+        cost = signature[1] * MEMORY_FACTOR
+        with self._lock:
+            self._drop(key)
+            if cost > self.max_bytes:
+                return
+            self._entries[key] = {
+                'document': document,
+                'signature': signature,
+                'hash': self._hash(content) if self.verify_hash else None,
+                'cost': cost
+            }
+            self._used_bytes += cost
+            while self._used_bytes > self.max_bytes:
+                evicted_key = next(iter(self._entries))
+                logging.debug("Evicting %s from the document cache", evicted_key)
+                self._drop(evicted_key)
+
+    def _drop(self, key):
+        """Remove an entry; the caller holds the lock."""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._used_bytes -= entry['cost']
+
+    def invalidate(self, path):
+        """
+        Drops the cached document for path.
+
+        :param path: The path of the JSON file.
+        """
+        with self._lock:
+            self._drop(self._key(path))
+
+    def clear(self):
+        """
+        Drops all cached documents and resets the counters.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._used_bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """
+        Returns the hit/miss counters and current usage.
+
+        :return: A dictionary with 'hits', 'misses', 'entries' and estimated 'bytes'.
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(self._entries),
+                'bytes': self._used_bytes
+            }
+
+_document_cache = DocumentCache()
+
+def get_document_cache():
+    """
+    Returns the process-wide DocumentCache instance.
+
+    :return: The shared DocumentCache.
+    """
+    return _document_cache
@@ -0,0 +1,199 @@
+"""
+Module for applying one set of setting values to several SPT servers at once.
+
+Server profiles are listed under 'servers' in config.json, each with a 'name' and its own
+'server_database' and 'server_config' directories. Without that list the 'paths' section is the
+only profile, named 'default'.
+
+The values are organized into a per-file change plan once; every server then applies the same
+plan with its own BatchApply on a bounded thread pool. Each server's apply stays all-or-nothing,
+and a failing server does not stop the others. Every server keeps its snapshots in its own scope
+of the backup store, so the 'backup' retention limits apply per server, while file contents the
+servers have in common are still stored once. The number of servers applied concurrently is
+'apply.server_workers' (default 4); each server additionally stages its files with
+'apply.workers' processes.
+
+Classes:
+    FleetApply: Applies values to many server profiles concurrently.
+
+Functions:
+    load_server_profiles(config_manager): Returns the server profiles from the configuration.
+    format_result_table(result): Formats a fan-out result as a text table.
+
+Methods (FleetApply class):
+    __init__(self, config_manager, server_workers=None, workers=None): Initializes the fan-out for the configured profiles.
+    apply(self, settings, schema, server_names=None, dry_run=False, trace=None): Applies values to the selected servers.
+"""
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from batch_apply import BatchApply
+from backup_store import BackupStore
+from directory_validator import DirectoryValidator
+
+def load_server_profiles(config_manager):
+    """
+    Returns the server profiles from the configuration.
+
+    :param config_manager: The configuration manager.
+    :return: A list of profile dictionaries with 'name', 'server_database' and 'server_config'.
+    :raises ValueError: If a profile is incomplete or two profiles share a name.
+    """
+    profiles = config_manager.get_setting('servers', None)
+    if not profiles:
+        return [{
+            'name': 'default',
+            'server_database': config_manager.get_setting('paths.server_database'),
+            'server_config': config_manager.get_setting('paths.server_config')
+        }]
+
+    names = set()
+    for profile in profiles:
+        missing = {'name', 'server_database', 'server_config'} - set(profile)
+        if missing:
+            raise ValueError(f"Server profile {profile.get('name', '?')} is missing {sorted(missing)}")
+        if profile['name'] in names:
+            raise ValueError(f"Duplicate server profile name: {profile['name']}")
+        names.add(profile['name'])
+    return profiles
+
+def format_result_table(result):
+    """
+    Formats a fan-out result as a text table with an aggregate line.
+
+    :param result: The result of FleetApply.apply().
+    :return: The table as a string.
+    """
+    rows = [('Server', 'Status', 'Touched', 'Skipped', 'MB', 'Seconds', 'Error')]
+    for row in result['servers']:
+        rows.append((
+            row['server'], row['status'], str(len(row['touched'])), str(len(row['skipped'])),
+            f"{row['bytes'] / 1024 / 1024:.1f}", f"{row['elapsed']:.3f}", row.get('error', '')
+        ))
+    widths = [max(len(row[column]) for row in rows) for column in range(len(rows[0]))]
+    lines = ['  '.join(value.ljust(width) for value, width in zip(row, widths)).rstrip()
+             for row in rows]
+    aggregate = result['aggregate']
+    lines.append(
+        f"{aggregate['succeeded']}/{aggregate['servers']} server(s) succeeded, "
+        f"{aggregate['files_touched']} file(s) in {aggregate['elapsed']:.3f}s "
+        f"({aggregate['files_per_second']:.1f} files/s, {aggregate['megabytes_per_second']:.1f} MB/s)"
+    )
+    return '\n'.join(lines)
+
+class FleetApply:
+    """
+    Applies values to many server profiles concurrently.
+    """
+
+    def __init__(self, config_manager, server_workers=None, workers=None):
+        """
+        Initializes the fan-out for the configured profiles.
+
+        :param config_manager: The configuration manager.
+        :param server_workers: The number of servers applied concurrently, overriding
+                               'apply.server_workers'.
+        :param workers: The number of worker processes per server, overriding 'apply.workers'.
+        """
+        self.config_manager = config_manager
+        self.profiles = {profile['name']: profile for profile in load_server_profiles(config_manager)}
+        if server_workers is None:
+            server_workers = config_manager.get_setting('apply.server_workers', 4)
+        self.server_workers = max(1, int(server_workers))
+        self.workers = workers
+        # All servers share the backup objects, deduplicating files they have in common, but
+        # each counts and prunes its snapshots in its own scope
+        self.backup_store = BackupStore.from_config(config_manager)
+        self.batch_applies = {}
+
+    def _batch_apply(self, name):
+        """
+        Returns the BatchApply of a server, keeping it across applies for incremental skipping.
+
+        :param name: The profile name.
+        :return: The server's BatchApply.
+        :raises ValueError: If the profile name cannot be used as a backup scope.
+        """
+        if name not in self.batch_applies:
+            backup_store = self.backup_store.for_scope(name) if self.backup_store else None
+            self.batch_applies[name] = BatchApply(
+                self.config_manager, workers=self.workers, paths=self.profiles[name],
+                backup_store=backup_store
+            )
+        return self.batch_applies[name]
+
+    def apply(self, settings, schema, server_names=None, dry_run=False, trace=None):
+        """
+        Applies values to the selected servers.
+
+        :param settings: The plain values to apply, keyed by setting ID.
+        :param schema: The schema defining the structure of the settings.
+        :param server_names: The profile names to apply to; defaults to all profiles.
+        :param dry_run: If True, changes are only planned and reported; no file is written.
+        :param trace: An optional tracing.Trace receiving the timing spans of every server.
+        :return: A dictionary with one 'servers' row per server ('server', 'status', 'touched',
+                 'skipped', 'bytes', 'elapsed' and, on failure, 'error') in the requested order,
+                 and 'aggregate' totals ('servers', 'succeeded', 'failed', 'files_touched',
+                 'bytes', 'elapsed', 'files_per_second' and 'megabytes_per_second').
+        :raises KeyError: If a requested server has no profile.
+        :raises ValueError: If a requested profile name cannot be used as a backup scope.
+        :raises ValidationError: If a value does not match its setting's type or bounds; no server
+                                 was touched.
+        """
+        names = list(server_names) if server_names else list(self.profiles)
+        for name in names:
+            if name not in self.profiles:
+                raise KeyError(f"Unknown server profile: {name}")
+
+        # Organize the values once; every server applies the same plan. Criteria are compiled
+        # here, before the threads start, so no server recompiles them concurrently.
+        file_changes = self._batch_apply(names[0]).organize_changes_by_file(settings, schema)
+        for name in names:
+            self._batch_apply(name).complex_handler.prepare(schema)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=min(self.server_workers, len(names)),
+                                thread_name_prefix="FleetApply") as executor:
+            futures = [executor.submit(self._apply_server, name, schema, file_changes, dry_run,
+                                       trace)
+                       for name in names]
+            rows = [future.result() for future in futures]
+        elapsed = time.perf_counter() - started
+
+        files_touched = sum(len(row['touched']) for row in rows)
+        total_bytes = sum(row['bytes'] for row in rows)
+        succeeded = sum(row['status'] == 'ok' for row in rows)
+        aggregate = {
+            'servers': len(rows),
+            'succeeded': succeeded,
+            'failed': len(rows) - succeeded,
+            'files_touched': files_touched,
+            'bytes': total_bytes,
+            'elapsed': elapsed,
+            'files_per_second': files_touched / elapsed if elapsed else 0.0,
+            'megabytes_per_second': total_bytes / 1024 / 1024 / elapsed if elapsed else 0.0
+        }
+        logging.info("Applied to %d/%d server(s) in %.3fs", succeeded, len(rows), elapsed)
+        return {'servers': rows, 'aggregate': aggregate}
+
+    def _apply_server(self, name, schema, file_changes, dry_run, trace=None):
+        """
+        Applies a change plan to one server and returns its result row.
+        """
+        profile = self.profiles[name]
+        row = {'server': name, 'status': 'ok', 'touched': [], 'skipped': [], 'bytes': 0}
+        started = time.perf_counter()
+        try:
+            DirectoryValidator([profile['server_database'], profile['server_config']]).validate()
+            result = self._batch_apply(name).apply_changes(
+                None, schema, dry_run=dry_run, file_changes=file_changes, trace=trace
+            )
+            row.update({'touched': result['touched'], 'skipped': result['skipped'],
+                        'bytes': result['bytes'], 'timings': result['timings']})
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            logging.error("Applying to server %s failed: %s", name, e)
+            row.update({'status': 'error', 'error': str(e), 'error_type': type(e).__name__})
+        row['elapsed'] = time.perf_counter() - started
+        return row
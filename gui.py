@@ -8,26 +8,52 @@ Methods (Application class):
     __init__(self): Initializes the main application window.
     create_widgets(self): Creates the widgets for the GUI.
     on_tab_select(self, _event=None): Handles tab selection in the listbox.
-    show_tab_content(self, tab_name): Displays the content of the selected tab.
-    create_widget(self, setting, parent): Creates a widget for a given setting.
+    on_search(self): Lists the settings matching the search box.
+    on_search_result_select(self, _event=None): Jumps to the selected search result.
+    show_setting(self, key): Displays the tab of a setting, scrolls to it and focuses its widget.
+    show_tab_content(self, tab_name): Displays the content of the selected tab, building it on first display.
+    build_tab(self, tab_name): Creates the frame, groups and widgets of a tab at their precomputed positions.
+    create_widget(self, placement, parent): Creates the labels and input widget of a setting from its placement.
     initialize_defaults(self): Initializes the UI with default values.
-    apply_changes(self): Applies changes made in the GUI to the configuration files.
+    load_current_values(self): Starts reading the current values of all settings from the server files.
+    poll_value_loader(self): Waits for the background load of the current values.
+    on_values_loaded(self, result): Shows the loaded values and summarizes complex settings.
+    update_dirty_state(self): Marks the window title while settings differ from the last apply.
+    apply_changes(self): Previews the GUI values in the background and applies them once confirmed.
+    start_apply(self, values): Starts applying values to the configuration files in the background.
+    poll_apply_worker(self): Drains progress messages from the background apply.
+    cancel_apply(self): Cancels a running apply, leaving all files untouched.
     save_preset(self): Saves the current settings as a preset.
     load_preset(self): Loads a preset and applies it to the UI.
+    restore_backup(self): Lists the backup snapshots and restores the selected one.
 """
 
 import tkinter as tk
-from tkinter import messagebox
+from tkinter import messagebox, ttk
 import logging
+import time
 import json  # Import json to avoid undefined variable error
 
 from config_manager import ConfigManager
 from logger_setup import LoggerSetup
-from batch_apply import BatchApply
+from batch_apply import BatchApply, ApplyCancelled
+from schema_index import ValidationError
+from apply_worker import ApplyWorker
+from preview_dialog import PreviewDialog
 from preset_manager import PresetManager
 from ui_updater import UIUpdater
+from settings_model import SettingsModel
+from layout_engine import compute_layout, count_settings, layout_rows
+from virtual_settings_view import VirtualSettingsView
+from search_index import SearchIndex
+from value_loader import ValueLoader
 from tooltip import Tooltip
 
+APPLY_POLL_INTERVAL_MS = 50
+# Tabs with more settings than this are shown as a virtualized list
+VIRTUALIZE_THRESHOLD = 150
+SEARCH_RESULT_LIMIT = 200
+
 class Application(tk.Tk):
     """
     Main application class for the JSON Configuration Editor.
@@ -42,14 +68,22 @@ class Application(tk.Tk):
         LoggerSetup(self.config_manager)
 
         self.preset_manager = PresetManager('presets')
-        self.ui_updater = UIUpdater(self.config_manager)
+        self.settings_model = SettingsModel(self.config_manager.get_schema())
+        self.layout = compute_layout(self.config_manager.get_schema())
+        self.search_index = SearchIndex(self.settings_model.index)
+        self.settings_model.subscribe(lambda *_: self.update_dirty_state())
+        self.ui_updater = UIUpdater(self.config_manager, self.settings_model)
         self.batch_apply = BatchApply(self.config_manager)
+        self.apply_worker = None
+        self.value_loader = ValueLoader(self.config_manager, self.batch_apply.document_cache)
+        self.load_future = None
 
         logging.debug("Creating widgets")
         self.create_widgets()
 
         logging.debug("Initializing defaults")
         self.initialize_defaults()
+        self.load_current_values()
 
         self.center_window()
 
@@ -64,23 +98,39 @@ class Application(tk.Tk):
         left_panel = tk.Frame(main_frame, width=200)
         left_panel.pack(side="left", fill="y")
 
+        # Search box; while it holds a query, the matching settings replace the tab list
+        self.search_var = tk.StringVar(self)
+        self.search_entry = tk.Entry(left_panel, textvariable=self.search_var)
+        self.search_entry.pack(side="top", fill="x", padx=2, pady=2)
+        self.search_entry.bind("<Escape>", lambda _: self.search_var.set(""))
+        self.search_entry.bind("<Return>", self.on_search_result_select)
+        Tooltip(self.search_entry, "Search settings by label, description, key path or file")
+        self.search_var.trace_add('write', lambda *_: self.on_search())
+        self.search_results = []
+
         self.tab_listbox = tk.Listbox(left_panel)
         self.tab_listbox.pack(expand=True, fill="both")
         self.tab_listbox.bind("<<ListboxSelect>>", self.on_tab_select)
 
-        # Right panel for tab content
-        right_panel = tk.Frame(main_frame)
-        right_panel.pack(side="right", expand=True, fill="both")
+        self.results_listbox = tk.Listbox(left_panel)
+        self.results_listbox.bind("<<ListboxSelect>>", self.on_search_result_select)
 
-        # Canvas and scrollbar for right panel
-        self.canvas = tk.Canvas(right_panel)
-        self.scrollbar = tk.Scrollbar(right_panel, orient="vertical", command=self.canvas.yview)
+        # Right panel for tab content
+        self.right_panel = tk.Frame(main_frame)
+        self.right_panel.pack(side="right", expand=True, fill="both")
+
+        # Canvas and scrollbar showing the grid-laid-out tabs; very large tabs are shown in
+        # their own VirtualSettingsView instead
+        self.grid_view = tk.Frame(self.right_panel)
+        self.canvas = tk.Canvas(self.grid_view)
+        self.scrollbar = tk.Scrollbar(self.grid_view, orient="vertical", command=self.canvas.yview)
         self.scrollable_frame = tk.Frame(self.canvas)
 
+        # The frame reports its own size, so the scroll region needs no bbox("all") measurement
         self.scrollable_frame.bind(
             "<Configure>",
             lambda e: self.canvas.configure(
-                scrollregion=self.canvas.bbox("all")
+                scrollregion=(0, 0, e.width, e.height)
             )
         )
 
@@ -89,32 +139,19 @@ class Application(tk.Tk):
 
         self.canvas.pack(side="left", fill="both", expand=True)
         self.scrollbar.pack(side="right", fill="y")
+        self.scroll_target = self.canvas
 
         # Bind mouse wheel events
         self.bind_mouse_wheel()
 
+        # Tabs are built on first selection; the settings model holds every setting's value
+        # whether or not its tab has been built
         self.tabs = {}
-        self.settings = {}
-
-        schema = self.config_manager.get_schema()
-        for tab_name, tab_data in schema['tabs'].items():
-            if tab_name not in self.tabs:
-                self.tabs[tab_name] = tk.Frame(self.scrollable_frame)
-                self.tabs[tab_name].pack(side="top", fill="both", expand=True)
-                self.tab_listbox.insert("end", tab_name)
-                self.tabs[tab_name].grid_columnconfigure(0, weight=1)
-                self.tabs[tab_name].grid_columnconfigure(1, weight=1)
-
-            for group_name, group_data in tab_data['groups'].items():
-                col = group_data['column']
-                group_frame = tk.LabelFrame(self.tabs[tab_name], text=group_name)
-                group_frame.grid(row=len(self.tabs[tab_name].grid_slaves(column=col)),
-                                 column=col, padx=5, pady=5, sticky="nsew")
-                group_frame.grid_columnconfigure(0, weight=1)
-                group_frame.grid_columnconfigure(1, weight=1)
-
-                for setting in group_data['settings']:
-                    self.create_widget(setting, group_frame)
+        # Setting ID -> input widget, for settings of built grid tabs
+        self.setting_widgets = {}
+
+        for tab_name in self.config_manager.get_schema()['tabs']:
+            self.tab_listbox.insert("end", tab_name)
 
         logging.debug("Creating bottom panel for buttons")
         # Bottom panel for buttons
@@ -130,6 +167,24 @@ class Application(tk.Tk):
         self.load_preset_button = tk.Button(bottom_panel, text="Load Preset", command=self.load_preset)
         self.load_preset_button.pack(side="left", padx=5, pady=5)
 
+        self.restore_backup_button = tk.Button(bottom_panel, text="Restore Backup",
+                                               command=self.restore_backup)
+        self.restore_backup_button.pack(side="left", padx=5, pady=5)
+
+        self.reload_button = tk.Button(bottom_panel, text="Reload Values",
+                                       command=self.load_current_values)
+        self.reload_button.pack(side="left", padx=5, pady=5)
+
+        self.cancel_button = tk.Button(bottom_panel, text="Cancel", command=self.cancel_apply,
+                                       state="disabled")
+        self.cancel_button.pack(side="right", padx=5, pady=5)
+
+        self.progress_bar = ttk.Progressbar(bottom_panel, mode="determinate", length=200)
+        self.progress_bar.pack(side="right", padx=5, pady=5)
+
+        self.status_label = tk.Label(bottom_panel, text="", anchor="w")
+        self.status_label.pack(side="left", fill="x", expand=True, padx=5, pady=5)
+
         self.show_tab_content(self.tab_listbox.get(0))
 
     def on_tab_select(self, _event=None):
@@ -141,92 +196,370 @@ class Application(tk.Tk):
         selected_tab = self.tab_listbox.get(self.tab_listbox.curselection())
         self.show_tab_content(selected_tab)
 
+    def on_search(self):
+        """
+        Lists the settings matching the search box, or the tabs again once it is cleared.
+        """
+        query = self.search_var.get()
+        if not query.strip():
+            self.results_listbox.pack_forget()
+            self.tab_listbox.pack(expand=True, fill="both")
+            return
+        started = time.perf_counter()
+        self.search_results = self.search_index.search(query, limit=SEARCH_RESULT_LIMIT)
+        logging.debug("Search for %r found %d setting(s) in %.3fms", query,
+                      len(self.search_results), (time.perf_counter() - started) * 1000)
+        self.results_listbox.delete(0, "end")
+        for entry in self.search_results:
+            self.results_listbox.insert("end", f"{entry['setting']['label']}  ({entry['tab']})")
+        self.tab_listbox.pack_forget()
+        self.results_listbox.pack(expand=True, fill="both")
+
+    def on_search_result_select(self, _event=None):
+        """
+        Jumps to the selected search result, or to the first one when Return is pressed.
+        """
+        selection = self.results_listbox.curselection()
+        index = selection[0] if selection else 0
+        if index < len(self.search_results):
+            self.show_setting(self.search_results[index]['id'])
+
+    def show_setting(self, key):
+        """
+        Displays the tab of a setting, scrolls to the setting and focuses its input widget.
+        """
+        tab_name = self.settings_model.index.by_id[key]['tab']
+        tab_position = list(self.config_manager.get_schema()['tabs']).index(tab_name)
+        self.tab_listbox.selection_clear(0, "end")
+        self.tab_listbox.selection_set(tab_position)
+        self.show_tab_content(tab_name)
+
+        tab = self.tabs[tab_name]
+        if isinstance(tab, VirtualSettingsView):
+            tab.show_setting(key)
+            return
+        widget = self.setting_widgets.get(key)
+        if widget is None:
+            return
+        self.update_idletasks()
+        frame_height = max(1, self.scrollable_frame.winfo_height())
+        offset = widget.winfo_rooty() - self.scrollable_frame.winfo_rooty()
+        self.canvas.yview_moveto(max(0, offset - 40) / frame_height)
+        widget.focus_set()
+
     def show_tab_content(self, tab_name):
         """
-        Displays the content of the selected tab.
+        Displays the content of the selected tab, building it on first display.
         """
         for tab in self.tabs.values():
             tab.pack_forget()
-        self.tabs[tab_name].pack(side="top", fill="both", expand=True)
-
-    def create_widget(self, setting, parent):
-        ui_element = setting['ui_element']
-        inline_with_previous = ui_element.get('inline_with_previous', False)
-        if inline_with_previous:
-            row = len(parent.grid_slaves()) // 2 - 1
-            col = 2
+        if tab_name not in self.tabs:
+            self.build_tab(tab_name)
+        tab = self.tabs[tab_name]
+        if isinstance(tab, VirtualSettingsView):
+            self.grid_view.pack_forget()
+            self.scroll_target = tab
         else:
-            row = len(parent.grid_slaves()) // 2
-            col = 0
-
-        top_label_visible = ui_element.get('top_label_visible', False)
-        if top_label_visible:
-            top_label_sticky = ui_element.get('top_label_sticky', 'ew')  # Default to 'ew' if not specified
-            top_label = tk.Label(parent, text=ui_element.get('top_label', setting['label']))
-            top_label.grid(row=row * 2, column=col, columnspan=2, padx=5, pady=5, sticky=top_label_sticky)
-            if 'description' in setting:
-                Tooltip(top_label, setting['description'])
-            widget_row = row * 2 + 1
-        else:
-            widget_row = row * 2
-
-        left_label_visible = ui_element.get('left_label_visible', True)
-        if left_label_visible:
-            left_label_sticky = ui_element.get('left_label_sticky', 'w')  # Default to 'w' if not specified
-            left_label = tk.Label(parent, text=setting['label'])
-            left_label.grid(row=widget_row, column=col, padx=5, pady=5, sticky=left_label_sticky)
-            if 'description' in setting:
-                Tooltip(left_label, setting['description'])
-            widget_col = col + 1
-        else:
-            widget_col = col
-
-        if ui_element['type'] == 'entry':
-            entry = tk.Entry(parent, width=ui_element.get('widget_width', 20))
-            entry.grid(row=widget_row, column=widget_col, padx=5, pady=5, sticky="ew")
-            self.settings[setting['key_path']] = entry
-        elif ui_element['type'] == 'checkbox':
-            var = tk.BooleanVar()
-            checkbox = tk.Checkbutton(parent, variable=var)
-            checkbox.grid(row=widget_row, column=widget_col, padx=5, pady=5, sticky="w")
-            self.settings[setting['key_path']] = var
+            self.grid_view.pack(fill="both", expand=True)
+            self.scroll_target = self.canvas
+        tab.pack(side="top", fill="both", expand=True)
 
-        parent.grid_columnconfigure(col, weight=1)
-        parent.grid_columnconfigure(widget_col, weight=1)
+    def build_tab(self, tab_name):
+        """
+        Creates the frame, groups and widgets of a tab at their precomputed grid positions.
+
+        Tabs with more settings than 'gui.virtualize_threshold' are shown in a
+        VirtualSettingsView, which only creates widgets for the visible rows.
+        """
+        started = time.perf_counter()
+        groups = self.layout[tab_name]
+        threshold = self.config_manager.get_setting('gui.virtualize_threshold',
+                                                    VIRTUALIZE_THRESHOLD)
+        if count_settings(groups) > threshold:
+            self.tabs[tab_name] = VirtualSettingsView(self.right_panel, layout_rows(groups),
+                                                      self.ui_updater)
+            logging.debug("Built virtualized tab %s in %.3fs", tab_name,
+                          time.perf_counter() - started)
+            return
+
+        tab_frame = tk.Frame(self.scrollable_frame)
+        tab_frame.grid_columnconfigure(0, weight=1)
+        tab_frame.grid_columnconfigure(1, weight=1)
+        self.tabs[tab_name] = tab_frame
+
+        for group in groups:
+            group_frame = tk.LabelFrame(tab_frame, text=group['name'])
+            group_frame.grid(row=group['row'], column=group['column'],
+                             padx=5, pady=5, sticky="nsew")
+            for placement in group['settings']:
+                self.create_widget(placement, group_frame)
+            for column in group['weighted_columns']:
+                group_frame.grid_columnconfigure(column, weight=1)
+        logging.debug("Built tab %s in %.3fs", tab_name, time.perf_counter() - started)
+
+    def create_widget(self, placement, parent):
+        """
+        Creates the labels and input widget of a setting from its placement.
+
+        :param placement: The setting's placement from layout_engine.compute_layout().
+        :param parent: The group frame to grid the widgets into.
+        """
+        description = placement['description']
+        for label_options in (placement['top_label'], placement['left_label']):
+            if label_options is None:
+                continue
+            label = tk.Label(parent, text=label_options['text'])
+            label.grid(row=label_options['row'], column=label_options['column'],
+                       columnspan=label_options['columnspan'], padx=5, pady=5,
+                       sticky=label_options['sticky'])
+            if description:
+                Tooltip(label, description)
+
+        widget = placement['widget']
+        if widget['type'] == 'entry':
+            var = tk.StringVar(self)
+            self.ui_updater.bind_variable(placement['id'], var)
+            entry = tk.Entry(parent, width=widget['width'], textvariable=var)
+            entry.grid(row=widget['row'], column=widget['column'], padx=5, pady=5,
+                       sticky=widget['sticky'])
+            self.setting_widgets[placement['id']] = entry
+        elif widget['type'] == 'checkbox':
+            var = tk.BooleanVar(self)
+            self.ui_updater.bind_variable(placement['id'], var)
+            checkbox = tk.Checkbutton(parent, variable=var)
+            checkbox.grid(row=widget['row'], column=widget['column'], padx=5, pady=5,
+                          sticky=widget['sticky'])
+            self.setting_widgets[placement['id']] = checkbox
 
     def initialize_defaults(self):
         """
         Initializes the UI with default values.
         """
         logging.debug("Calling initialize_with_defaults")
-        self.ui_updater.initialize_with_defaults(self.settings)
+        self.ui_updater.initialize_with_defaults()
 
-    def apply_changes(self):
+    def load_current_values(self):
+        """
+        Starts reading the current values of all settings from the server files in the background.
+
+        Until they are loaded the UI shows the defaults; files already read are only read again
+        if they changed.
         """
-        Applies changes made in the GUI to the configuration files.
+        if self.load_future is not None and not self.load_future.done():
+            return
+        if self.apply_worker is not None and self.apply_worker.is_running():
+            return
+        self.apply_button.config(state="disabled")
+        self.reload_button.config(state="disabled")
+        self.status_label.config(text="Loading current values...")
+        self.load_future = self.value_loader.load_in_background(self.config_manager.get_schema())
+        self.after(APPLY_POLL_INTERVAL_MS, self.poll_value_loader)
+
+    def poll_value_loader(self):
         """
+        Waits for the background load of the current values without blocking the event loop.
+        """
+        if not self.load_future.done():
+            self.after(APPLY_POLL_INTERVAL_MS, self.poll_value_loader)
+            return
+        self.apply_button.config(state="normal")
+        self.reload_button.config(state="normal")
         try:
-            schema = self.config_manager.get_schema()
-            self.batch_apply.apply_changes(self.settings, schema)
-            messagebox.showinfo("Info", "Changes have been applied successfully.")
-        except FileNotFoundError as e:
-            logging.error("File not found: %s", str(e))
-            messagebox.showerror("Error", f"File not found: {str(e)}")
-        except json.JSONDecodeError as e:
-            logging.error("JSON decoding error: %s", str(e))
-            messagebox.showerror("Error", f"JSON decoding error: {str(e)}")
-        except KeyError as e:
-            logging.error("Key error: %s", str(e))
-            messagebox.showerror("Error", f"Key error: {str(e)}")
-        except Exception as e:   # pylint: disable=broad-exception-caught
-            logging.error("Error applying changes: %s", str(e))
-            messagebox.showerror("Error", f"Unexpected error: {str(e)}")
+            result = self.load_future.result()
+        except Exception as e:  # pylint: disable=broad-except
+            logging.error("Error loading current values: %s", str(e))
+            # Without the files' values, bulk settings must not overwrite their records
+            self.ui_updater.load_current_values({}, [
+                entry['id'] for entry in self.settings_model.index.entries if entry['complex']])
+            self.status_label.config(text="Could not load the current values; showing defaults")
+            return
+        self.on_values_loaded(result)
+
+    def on_values_loaded(self, result):
+        """
+        Shows the loaded values and reports complex settings whose records hold different values.
+
+        Complex settings without a loaded value are only applied once the user sets them.
+        """
+        self.ui_updater.load_current_values(result['values'], result['undetermined'])
+        self.update_dirty_state()
+        varied = []
+        for key, summary in result['summaries'].items():
+            if len(summary['values']) > 1:
+                label = self.settings_model.settings[key].get('label', key)
+                logging.info("%s differs across %d records: %s", label, summary['records'],
+                             ', '.join(f"{value!r} ({count})"
+                                       for value, count in summary['values'][:10]))
+                varied.append(f"{label} ({len(summary['values'])} values)")
+        text = f"Loaded {len(result['values'])} current value(s) from {result['files']} file(s)"
+        if result['failed']:
+            text += f", {len(result['failed'])} file(s) could not be read"
+        if varied:
+            text += f"; differs across records, not applied unless set: {', '.join(varied)}"
+        self.status_label.config(text=text)
+
+    def update_dirty_state(self):
+        """
+        Marks the window title while settings differ from their defaults or the last apply.
+        """
+        dirty = self.settings_model.dirty_ids()
+        self.title(f"Server Value Changer - {len(dirty)} unapplied change(s)" if dirty
+                   else "Server Value Changer")
+
+    def apply_changes(self):
+        """
+        Previews the GUI values in the background and applies them once the preview is confirmed.
+
+        The values are captured on the Tk thread; the preview and the apply run on a worker
+        thread and report back through poll_apply_worker().
+        """
+        if self.apply_worker is not None and self.apply_worker.is_running():
+            return
+        if self.load_future is not None and not self.load_future.done():
+            self.status_label.config(text="Still loading the current values; apply once they "
+                                          "are loaded")
+            return
+        values = self.ui_updater.capture_apply_values()
+        self.start_worker(ApplyWorker(self.batch_apply, values, self.config_manager.get_schema(),
+                                      preview=True), "Previewing changes...")
+
+    def start_apply(self, values):
+        """
+        Starts applying values to the configuration files in the background.
+        """
+        if self.apply_worker is not None and self.apply_worker.is_running():
+            return
+        self.start_worker(ApplyWorker(self.batch_apply, values, self.config_manager.get_schema()),
+                          "Applying changes...")
+
+    def start_worker(self, worker, status):
+        """
+        Disables the apply controls and starts a preview or apply worker.
+        """
+        self.apply_worker = worker
+        self.apply_button.config(state="disabled")
+        self.reload_button.config(state="disabled")
+        self.cancel_button.config(state="disabled" if worker.preview else "normal")
+        self.progress_bar.config(value=0, maximum=1)
+        self.status_label.config(text=status)
+        self.apply_worker.start()
+        self.after(APPLY_POLL_INTERVAL_MS, self.poll_apply_worker)
+
+    def poll_apply_worker(self):
+        """
+        Drains progress messages from the background apply and reschedules itself until the
+        apply has finished.
+        """
+        for kind, payload in self.apply_worker.poll():
+            if kind == 'progress':
+                self.on_apply_progress(payload)
+            elif kind == 'finished' and self.apply_worker.preview:
+                self.on_preview_finished(payload)
+                return
+            elif kind == 'finished':
+                self.on_apply_finished(payload)
+                return
+            else:
+                self.on_apply_error(payload)
+                return
+        self.after(APPLY_POLL_INTERVAL_MS, self.poll_apply_worker)
+
+    def on_apply_progress(self, event):
+        """
+        Updates the progress bar and status line for a progress event.
+        """
+        if event['event'] == 'started':
+            self.progress_bar.config(maximum=event['total'])
+            self.status_label.config(text=f"Applying {event['file']}...")
+        elif event['event'] == 'written':
+            self.status_label.config(text=f"Staged {event['file']} ({event['bytes']:,} bytes)")
+        elif event['event'] == 'done':
+            self.progress_bar.step(1)
+        elif event['event'] == 'committed':
+            self.status_label.config(text="Writing files...")
+
+    def on_preview_finished(self, preview):
+        """
+        Resets the apply controls and shows the planned changes for confirmation.
+        """
+        self.finish_apply()
+        if not preview['files']:
+            self.status_label.config(
+                text=f"No changes to apply, {len(preview['unchanged'])} file(s) unchanged")
+            messagebox.showinfo("Info", "The server files already hold these values.")
+            return
+        self.status_label.config(text=f"{len(preview['files'])} file(s) will change")
+        values = self.apply_worker.values
+        PreviewDialog(self, preview, lambda: self.start_apply(values))
+
+    def on_apply_finished(self, result):
+        """
+        Resets the apply controls and reports a successful apply.
+        """
+        self.finish_apply()
+        self.ui_updater.mark_applied(self.apply_worker.values)
+        self.update_dirty_state()
+        self.progress_bar.config(value=self.progress_bar.cget("maximum"))
+        summary = self.apply_worker.trace.summary()
+        self.status_label.config(
+            text=f"{len(result['touched'])} file(s) updated, {len(result['skipped'])} unchanged"
+                 + (f" ({summary})" if summary else "")
+        )
+        trace_file = self.config_manager.get_setting('tracing.file', None)
+        if trace_file:
+            self.apply_worker.trace.export(trace_file)
+        messagebox.showinfo("Info", "Changes have been applied successfully.")
+
+    def on_apply_error(self, error):
+        """
+        Resets the apply controls and reports a failed or cancelled apply.
+        """
+        self.finish_apply()
+        self.progress_bar.config(value=0)
+        if isinstance(error, ApplyCancelled):
+            self.status_label.config(text="Apply cancelled; no files were modified")
+        elif isinstance(error, ValidationError):
+            logging.error("Invalid setting values: %s", str(error))
+            details = '\n'.join(f"{item['label']}: {item['message']}" for item in error.errors)
+            messagebox.showerror("Invalid Values", f"No files were modified.\n\n{details}")
+        elif isinstance(error, FileNotFoundError):
+            logging.error("File not found: %s", str(error))
+            messagebox.showerror("Error", f"File not found: {str(error)}")
+        elif isinstance(error, json.JSONDecodeError):
+            logging.error("JSON decoding error: %s", str(error))
+            messagebox.showerror("Error", f"JSON decoding error: {str(error)}")
+        elif isinstance(error, KeyError):
+            logging.error("Key error: %s", str(error))
+            messagebox.showerror("Error", f"Key error: {str(error)}")
+        else:
+            logging.error("Error applying changes: %s", str(error))
+            messagebox.showerror("Error", f"Unexpected error: {str(error)}")
+        if not isinstance(error, ApplyCancelled):
+            self.status_label.config(text="Preview failed" if self.apply_worker.preview
+                                     else "Apply failed")
+
+    def cancel_apply(self):
+        """
+        Cancels a running apply, leaving all files untouched.
+        """
+        if self.apply_worker is not None and self.apply_worker.is_running():
+            self.apply_worker.cancel()
+            self.cancel_button.config(state="disabled")
+            self.status_label.config(text="Cancelling...")
+
+    def finish_apply(self):
+        """
+        Re-enables the apply controls after an apply ends.
+        """
+        self.apply_button.config(state="normal")
+        self.reload_button.config(state="normal")
+        self.cancel_button.config(state="disabled")
 
     def save_preset(self):
         """
         Saves the current settings as a preset.
         """
-        changes = self.ui_updater.capture_ui_state(self.settings)
+        changes = self.ui_updater.capture_ui_state()
         self.preset_manager.save_preset_dialog(changes)
 
     def load_preset(self):
@@ -236,11 +569,67 @@ class Application(tk.Tk):
         changes = self.preset_manager.load_preset_dialog()
         if changes:
             logging.info("Changes loaded: %s", changes)
-            self.ui_updater.update_ui_with_preset(self.settings, changes)
+            self.ui_updater.update_ui_with_preset(changes)
             messagebox.showinfo("Info", "Preset loaded successfully.")
         else:
             messagebox.showerror("Error", "Failed to load preset.")
 
+    def restore_backup(self):
+        """
+        Lists the backup snapshots and restores the selected one.
+
+        The current values are loaded again afterwards, so the next apply starts from the
+        restored files instead of writing the values shown before the restore back over them.
+        """
+        backup_store = self.batch_apply.backup_store
+        if backup_store is None:
+            messagebox.showerror("Error", "No backup directory is configured.")
+            return
+        if self.apply_worker is not None and self.apply_worker.is_running():
+            return
+        if self.load_future is not None and not self.load_future.done():
+            self.status_label.config(text="Still loading the current values; restore once they "
+                                          "are loaded")
+            return
+        snapshots = backup_store.list_snapshots()
+        if not snapshots:
+            messagebox.showinfo("Info", "No backups available.")
+            return
+
+        dialog = tk.Toplevel(self)
+        dialog.title("Restore Backup")
+        dialog.transient(self)
+        listbox = tk.Listbox(dialog, width=80, height=15)
+        listbox.pack(fill="both", expand=True, padx=5, pady=5)
+        for manifest in snapshots:
+            created = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(manifest['created']))
+            listbox.insert(tk.END, f"{created}  {manifest['label']}  ({', '.join(manifest['files'])})")
+        listbox.selection_set(0)
+
+        def restore_selected():
+            selection = listbox.curselection()
+            if not selection:
+                return
+            manifest = snapshots[selection[0]]
+            if not messagebox.askyesno(
+                    "Restore Backup",
+                    f"Restore {len(manifest['files'])} file(s) to their state before this apply?",
+                    parent=dialog):
+                return
+            try:
+                restored = backup_store.restore(manifest['id'], self.batch_apply.safe_writer)
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                logging.error("Error restoring backup %s: %s", manifest['id'], e)
+                messagebox.showerror("Error", f"Failed to restore backup: {str(e)}", parent=dialog)
+                return
+            dialog.destroy()
+            self.status_label.config(text=f"{len(restored)} file(s) restored from backup")
+            self.load_current_values()
+            messagebox.showinfo("Info", "Backup restored successfully.")
+
+        tk.Button(dialog, text="Restore", command=restore_selected).pack(side="left", padx=5, pady=5)
+        tk.Button(dialog, text="Close", command=dialog.destroy).pack(side="right", padx=5, pady=5)
+
     def center_window(self):
         """
         Centers the window on the screen.
@@ -259,7 +648,7 @@ class Application(tk.Tk):
 
     def bind_mouse_wheel(self):
         """
-        Binds the mouse wheel to the canvas scrollbar.
+        Binds the mouse wheel to the scrollbar of the shown tab.
         """
         self.canvas.bind_all("<MouseWheel>", self.on_mouse_wheel)
         self.canvas.bind_all("<Button-4>", self.on_mouse_wheel)
@@ -270,9 +659,9 @@ class Application(tk.Tk):
         Handles the mouse wheel event for scrolling.
         """
         if event.num == 5 or event.delta == -120:
-            self.canvas.yview_scroll(1, "units")
+            self.scroll_target.yview_scroll(1, "units")
         elif event.num == 4 or event.delta == 120:
-            self.canvas.yview_scroll(-1, "units")
+            self.scroll_target.yview_scroll(-1, "units")
 
 if __name__ == "__main__":
     logging.basicConfig(level=logging.DEBUG)
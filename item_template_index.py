@@ -0,0 +1,169 @@
+"""
+Module providing an index over SPT item templates (database/templates/items.json).
+
+The index is built once per loaded document and lets complex mutators address sets of items by
+parent or ancestor category without scanning every template again.
+
+Classes:
+    ItemTemplateIndex: Parent/child and ancestor lookups over a loaded items document.
+
+Methods (ItemTemplateIndex class):
+    __init__(self, items): Builds the parent-to-children map for the given items document.
+    get_children(self, parent_id): Returns the IDs of the direct children of a template.
+    get_ancestors(self, item_id): Returns the IDs of all ancestors of a template, nearest first.
+    is_descendant_of(self, item_id, ancestor_id): Checks whether a template descends from another.
+    get_descendants(self, ancestor_id): Returns the IDs of all transitive descendants of a template.
+    get_descendant_items(self, ancestor_id): Returns descendant IDs that are items rather than category nodes.
+    get_prop(self, item_id, prop_name, default=None): Looks up a field in a template's _props.
+    find_by_prop(self, prop_name, value): Returns the IDs of templates whose _props field equals a value of the same type.
+"""
+
+AMMO_CATEGORY_ID = '5485a8684bdc2da71d8b4567'
+
+class ItemTemplateIndex:
+    """
+    Parent/child and ancestor lookups over a loaded items document.
+    """
+
+    def __init__(self, items):
+        """
+        Builds the parent-to-children map for the given items document.
+
+        :param items: The loaded items document, mapping template IDs to template dictionaries.
+        """
+        self.items = items
+        self.children = {}
+        for item_id, item_data in items.items():
+            if not isinstance(item_data, dict):
+                continue
+            self.children.setdefault(item_data.get('_parent'), []).append(item_id)
+        self._ancestors = {}
+        self._descendants = {}
+        self._prop_values = {}
+
+    def get_children(self, parent_id):
+        """
+        Returns the IDs of the direct children of a template.
+
+        :param parent_id: The parent template ID.
+        :return: A list of child template IDs.
+        """
+        return self.children.get(parent_id, [])
+
+    def get_ancestors(self, item_id):
+        """
+        Returns the IDs of all ancestors of a template, nearest first.
+
+        :param item_id: The template ID.
+        :return: A tuple of ancestor template IDs.
+        """
+        if item_id in self._ancestors:
+            return self._ancestors[item_id]
+
+        ancestors = []
+        seen = {item_id}
+        item_data = self.items.get(item_id)
+        parent_id = item_data.get('_parent') if isinstance(item_data, dict) else None
+        while parent_id and parent_id not in seen:
+            if parent_id in self._ancestors:
+                ancestors.append(parent_id)
+                ancestors.extend(self._ancestors[parent_id])
+                break
+            ancestors.append(parent_id)
+            seen.add(parent_id)
+            parent_data = self.items.get(parent_id)
+            parent_id = parent_data.get('_parent') if isinstance(parent_data, dict) else None
+
+        self._ancestors[item_id] = tuple(ancestors)
+        return self._ancestors[item_id]
+
+    def is_descendant_of(self, item_id, ancestor_id):
+        """
+        Checks whether a template descends, directly or transitively, from another.
+
+        :param item_id: The template ID to check.
+        :param ancestor_id: The candidate ancestor template ID.
+        :return: True if ancestor_id is an ancestor of item_id.
+        """
+        return ancestor_id in self.get_ancestors(item_id)
+
+    def get_descendants(self, ancestor_id):
+        """
+        Returns the IDs of all transitive descendants of a template.
+
+        :param ancestor_id: The ancestor template ID.
+        :return: A list of descendant template IDs in breadth-first order.
+        """
+        if ancestor_id in self._descendants:
+            return self._descendants[ancestor_id]
+
+        descendants = []
+        seen = {ancestor_id}
+        pending = [ancestor_id]
+        while pending:
+            next_pending = []
+            for parent_id in pending:
+                for child_id in self.children.get(parent_id, []):
+                    if child_id not in seen:
+                        seen.add(child_id)
+                        descendants.append(child_id)
+                        next_pending.append(child_id)
+            pending = next_pending
+
+        self._descendants[ancestor_id] = descendants
+        return descendants
+
+    def get_descendant_items(self, ancestor_id):
+        """
+        Returns descendant IDs that are items rather than category nodes.
+
+        :param ancestor_id: The ancestor template ID.
+        :return: A list of descendant item IDs.
+        """
+        return [
+            item_id for item_id in self.get_descendants(ancestor_id)
+            if self.items[item_id].get('_type') != 'Node'
+        ]
+
+    def get_prop(self, item_id, prop_name, default=None):
+        """
+        Looks up a field in a template's _props.
+
+        :param item_id: The template ID.
+        :param prop_name: The name of the field inside _props.
+        :param default: The value returned when the template or field does not exist.
+        :return: The field value or the default.
+        """
+        item_data = self.items.get(item_id)
+        if not isinstance(item_data, dict):
+            return default
+        return item_data.get('_props', {}).get(prop_name, default)
+
+    def find_by_prop(self, prop_name, value):
+        """
+        Returns the IDs of templates whose _props field equals a value of the same type.
+
+        The value index for a field is built on first use and reused afterwards. It is keyed by
+        type and value, so true, 1 and 1.0 are kept apart as by key_path_trie.same_value().
+
+        :param prop_name: The name of the field inside _props.
+        :param value: The value to match.
+        :return: A list of matching template IDs.
+        """
+        if prop_name not in self._prop_values:
+            values = {}
+            for item_id, item_data in self.items.items():
+                if not isinstance(item_data, dict):
+                    continue
+                props = item_data.get('_props', {})
+                if prop_name in props:
+                    try:
+                        key = (type(props[prop_name]), props[prop_name])
+                        values.setdefault(key, []).append(item_id)
+                    except TypeError:
+                        continue  # Unhashable values (lists, objects) cannot be indexed
+            self._prop_values[prop_name] = values
+        try:
+            return self._prop_values[prop_name].get((type(value), value), [])
+        except TypeError:
+            return []
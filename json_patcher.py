@@ -0,0 +1,177 @@
+"""
+Module for patching scalar values into JSON text in place.
+
+Rewriting a large database file with json.dump after changing a handful of values is slow and
+produces whole-file diffs. JsonPatcher instead locates the byte spans of the targeted values with
+a tokenizer pass over the original text and splices new scalar values into those spans, streaming
+every other byte through unchanged. Subtrees that cannot contain a target are skipped with the C
+scanner of the json module, so only the path prefixes of the targets are walked in Python.
+
+Classes:
+    JsonPatcher: Locates value spans in JSON text and writes a patched copy.
+
+Methods (JsonPatcher class):
+    __init__(self, text): Initializes the patcher with the original JSON text.
+    plan(self, assignments): Computes the splices for a set of scalar assignments.
+    write(self, out, splices): Streams the patched text to a file object.
+    patch(self, assignments): Returns the patched text, or None if the structure would change.
+"""
+
+import json
+from json.decoder import scanstring
+
+WHITESPACE = ' \t\n\r'
+SCALAR_TYPES = (str, int, float, bool, type(None))
+
+class JsonPatcher:
+    """
+    Locates value spans in JSON text and writes a patched copy.
+    """
+
+    def __init__(self, text):
+        """
+        Initializes the patcher with the original JSON text.
+
+        :param text: The original JSON document as a string.
+        """
+        self.text = text
+        self._decoder = json.JSONDecoder()
+
+    def plan(self, assignments):
+        """
+        Computes the splices for a set of scalar assignments.
+
+        :param assignments: A mapping of key tuples (object keys as strings, array indices as
+                            integers or digit strings) to the new scalar values.
+        :return: A list of (start, end, replacement) splices sorted by position, or None if any
+                 assignment would change the document structure (missing path, non-scalar old or
+                 new value) and the document has to be rewritten instead.
+        """
+        if not assignments:
+            return []
+        trie = {}
+        targets = set()
+        for keys, value in assignments.items():
+            if not isinstance(value, SCALAR_TYPES) or not keys:
+                return None
+            node = trie
+            for key in keys:
+                node = node.setdefault(str(key), {})
+            node[None] = json.dumps(value, ensure_ascii=False)
+            targets.add(tuple(str(key) for key in keys))
+
+        splices = []
+        found = set()
+        self._scan(self._skip_whitespace(0), trie, (), splices, found)
+        if found != targets:
+            return None
+        splices.sort()
+        return splices
+
+    def write(self, out, splices):
+        """
+        Streams the patched text to a file object.
+
+        :param out: A writable text file object.
+        :param splices: The splices returned by plan().
+        :return: The number of characters written.
+        """
+        written = 0
+        position = 0
+        for start, end, replacement in splices:
+            written += out.write(self.text[position:start])
+            written += out.write(replacement)
+            position = end
+        written += out.write(self.text[position:])
+        return written
+
+    def patch(self, assignments):
+        """
+        Returns the patched text, or None if the structure would change.
+
+        :param assignments: A mapping of key tuples to the new scalar values.
+        :return: The patched JSON text or None.
+        """
+        splices = self.plan(assignments)
+        if splices is None:
+            return None
+        parts = []
+        position = 0
+        for start, end, replacement in splices:
+            parts.append(self.text[position:start])
+            parts.append(replacement)
+            position = end
+        parts.append(self.text[position:])
+        return ''.join(parts)
+
+    def _skip_whitespace(self, position):
+        """Return the position of the next non-whitespace character."""
+        text = self.text
+        while position < len(text) and text[position] in WHITESPACE:
+            position += 1
+        return position
+
+    def _skip_value(self, position):
+        """Return the end position of the value starting at position, using the C scanner."""
+        _, end = self._decoder.raw_decode(self.text, position)
+        return end
+
+    def _scan(self, position, node, path, splices, found):
+        """
+        Walks the value starting at position, descending only into subtrees in the target trie.
+
+        :return: The end position of the value.
+        """
+        if None in node:
+            value, end = self._decoder.raw_decode(self.text, position)
+            if isinstance(value, (dict, list)):
+                return end  # Replacing a container with a scalar changes the structure
+            splices.append((position, end, node[None]))
+            found.add(path)
+            return end
+
+        text = self.text
+        char = text[position] if position < len(text) else ''
+        if char == '{':
+            position = self._skip_whitespace(position + 1)
+            if text[position] == '}':
+                return position + 1
+            while True:
+                if text[position] != '"':
+                    raise json.JSONDecodeError("Expecting property name enclosed in double quotes",
+                                               text, position)
+                key, position = scanstring(text, position + 1)
+                position = self._skip_whitespace(position)
+                if text[position] != ':':
+                    raise json.JSONDecodeError("Expecting ':' delimiter", text, position)
+                position = self._skip_whitespace(position + 1)
+                child = node.get(key)
+                if child is None:
+                    position = self._skip_value(position)
+                else:
+                    position = self._scan(position, child, path + (key,), splices, found)
+                position = self._skip_whitespace(position)
+                if text[position] == '}':
+                    return position + 1
+                if text[position] != ',':
+                    raise json.JSONDecodeError("Expecting ',' delimiter", text, position)
+                position = self._skip_whitespace(position + 1)
+        if char == '[':
+            position = self._skip_whitespace(position + 1)
+            if text[position] == ']':
+                return position + 1
+            index = 0
+            while True:
+                child = node.get(str(index))
+                if child is None:
+                    position = self._skip_value(position)
+                else:
+                    position = self._scan(position, child, path + (str(index),), splices, found)
+                position = self._skip_whitespace(position)
+                if text[position] == ']':
+                    return position + 1
+                if text[position] != ',':
+                    raise json.JSONDecodeError("Expecting ',' delimiter", text, position)
+                position = self._skip_whitespace(position + 1)
+                index += 1
+        return self._skip_value(position)
@@ -0,0 +1,296 @@
+"""
+Module providing a trie of key paths for reading and writing many values of one document in one
+traversal.
+
+A file targeted by many settings used to be walked from its root once per setting, so the keys
+shared by their key paths (e.g. 'appearance.body' in the bot types) were looked up again for
+every setting. KeyPathTrie merges the key tuples of all settings of a file into a prefix trie;
+read() and apply() walk the document depth-first along the trie and visit every shared node once.
+
+Key paths are split on dots by parse_key_path(). A dot or backslash that is part of a key is
+escaped with a backslash ('filters\\.json.enabled' is the key 'filters.json' and then 'enabled').
+Keys stay strings; a key made of digits indexes into an array when the value it is applied to is
+one, as in 'chances.0.weight'. JSON object keys are always strings, so this is never ambiguous.
+
+Every writer of the editor, and the change preview, decides whether a value changes with
+same_value(): values are only equal if their types match too, so 60.0 replaces 60.
+
+Classes:
+    KeyPathTrie: Prefix trie of key tuples, each ending at one or more targets.
+
+Functions:
+    parse_key_path(key_path): Splits a key path into its keys, honouring escaped dots.
+    lookup(data, keys, default=None): Returns the value at a key tuple, or a default if missing.
+    same_value(current, value): Checks whether a value equals the current one, including its type.
+    assign(data, keys, value): Assigns the value at one key tuple unless it already holds it.
+
+Methods (KeyPathTrie class):
+    __init__(self, paths=()): Builds the trie from (keys, target) pairs.
+    add(self, keys, target): Adds a key tuple ending at a target.
+    read(self, data): Returns the value at every key path that exists in a document.
+    apply(self, data, values, assignments=None): Assigns the values of targets in one pass.
+"""
+
+# Returned by _child() for a key that does not exist
+_MISSING = object()
+
+def parse_key_path(key_path):
+    """
+    Splits a key path into its keys, honouring escaped dots.
+
+    :param key_path: The dot-separated key path; '\\.' stands for a dot and '\\\\' for a
+                     backslash inside a key.
+    :return: The tuple of keys.
+    :raises ValueError: If the key path is empty, has an empty key or ends with a lone backslash.
+    """
+    if '\\' not in key_path:
+        keys = tuple(key_path.split('.'))
+    else:
+        keys = []
+        key = []
+        characters = iter(key_path)
+        for character in characters:
+            if character == '\\':
+                escaped = next(characters, None)
+                if escaped not in ('.', '\\'):
+                    raise ValueError(f"Invalid escape in key path: {key_path!r}")
+                key.append(escaped)
+            elif character == '.':
+                keys.append(''.join(key))
+                key = []
+            else:
+                key.append(character)
+        keys.append(''.join(key))
+        keys = tuple(keys)
+    if '' in keys:
+        raise ValueError(f"Empty key in key path: {key_path!r}")
+    return keys
+
+def _index(container, key):
+    """Return the array index a key stands for in a list, or None if it is not a valid one."""
+    if isinstance(key, int) and not isinstance(key, bool):
+        index = key
+    elif isinstance(key, str) and key.isdigit():
+        index = int(key)
+    else:
+        return None
+    return index if index < len(container) else None
+
+def _child(value, key):
+    """Return the child of an object or array at a key, or _MISSING."""
+    if isinstance(value, dict):
+        return value.get(key, _MISSING)
+    if isinstance(value, list):
+        index = _index(value, key)
+        return _MISSING if index is None else value[index]
+    return _MISSING
+
+def lookup(data, keys, default=None):
+    """
+    Returns the value at a key tuple, or a default if the path does not exist.
+
+    :param data: The loaded JSON document or record.
+    :param keys: The tuple of keys; digit keys index into arrays.
+    :param default: The value returned for a missing path.
+    :return: The value at the path, or default.
+    """
+    value = data
+    for key in keys:
+        value = _child(value, key)
+        if value is _MISSING:
+            return default
+    return value
+
+def same_value(current, value):
+    """
+    Checks whether a value equals the current one, including its type.
+
+    :param current: The value held now.
+    :param value: The value to assign.
+    :return: True if assigning the value would not change the document, e.g. False for 60 and
+             60.0 or for 1 and True.
+    """
+    return current == value and type(current) is type(value)
+
+def _assign_index(container, key, keys, value):
+    """
+    Assigns a value to an element of an array unless it already holds it.
+
+    :return: True if the array changed.
+    :raises KeyError: If the key is not one of the array's indices.
+    """
+    index = _index(container, key)
+    if index is None:
+        raise KeyError(f"Cannot follow key path {'.'.join(keys)}: no such array index")
+    if same_value(container[index], value):
+        return False
+    container[index] = value
+    return True
+
+def assign(data, keys, value):
+    """
+    Assigns the value at one key tuple unless it already holds it.
+
+    The path is followed as by KeyPathTrie.apply(): missing objects along it are created, and
+    digit keys index into arrays.
+
+    :param data: The loaded JSON document or record to mutate in place.
+    :param keys: The non-empty tuple of keys.
+    :param value: The value to assign.
+    :return: True if the document changed.
+    :raises KeyError: If the key path leads through a scalar value or past the end of an array.
+    """
+    container = data
+    for depth, key in enumerate(keys[:-1]):
+        child = _child(container, key)
+        if child is _MISSING and isinstance(container, dict):
+            child = container[key] = {}
+        elif not isinstance(child, (dict, list)):
+            raise KeyError(f"Cannot follow key path {'.'.join(keys[:depth + 1])}: "
+                           f"not an object or array")
+        container = child
+    key = keys[-1]
+    if isinstance(container, dict):
+        if key in container and same_value(container[key], value):
+            return False
+        container[key] = value
+        return True
+    if isinstance(container, list):
+        return _assign_index(container, key, keys, value)
+    raise KeyError(f"Cannot follow key path {'.'.join(keys)}: not an object or array")
+
+class _Node:
+    """
+    Node of a KeyPathTrie.
+
+    Besides the child node per key, a node lists the children that are the end of a key path
+    ('leaves', with their key, targets and full key tuple) and those with children of their own
+    ('branches'), so that apply() does not have to inspect every child.
+    """
+
+    __slots__ = ('children', 'targets', 'keys', 'leaves', 'branches')
+
+    def __init__(self, keys):
+        self.children = {}
+        self.targets = []
+        self.keys = keys
+        self.leaves = []
+        self.branches = []
+
+    def has_target_in(self, values):
+        """Check whether a target at or below this node has a value to assign."""
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if any(target in values for target in node.targets):
+                return True
+            stack.extend(node.children.values())
+        return False
+
+class KeyPathTrie:
+    """
+    Prefix trie of key tuples, each ending at one or more targets, e.g. setting IDs.
+    """
+
+    def __init__(self, paths=()):
+        """
+        Builds the trie from (keys, target) pairs.
+
+        :param paths: An iterable of (key tuple, target) pairs.
+        """
+        self.root = _Node(())
+        self.size = 0
+        for keys, target in paths:
+            self.add(keys, target)
+
+    def add(self, keys, target):
+        """
+        Adds a key tuple ending at a target.
+
+        :param keys: The non-empty tuple of keys, e.g. ('difficulty', 'normal', 'Core').
+        :param target: The target the key path stands for; several targets may share a path.
+        :raises ValueError: If the key tuple is empty.
+        """
+        if not keys:
+            raise ValueError("A key path needs at least one key")
+        keys = tuple(keys)
+        parent = node = self.root
+        for depth, key in enumerate(keys):
+            child = node.children.get(key)
+            if child is None:
+                child = node.children[key] = _Node(keys[:depth + 1])
+            if depth + 1 < len(keys) and not child.children:
+                node.branches.append((key, child))
+            parent, node = node, child
+        if not node.targets:
+            parent.leaves.append((keys[-1], node.targets, node.keys))
+        node.targets.append(target)
+        self.size += 1
+
+    def read(self, data):
+        """
+        Returns the value at every key path that exists in a document.
+
+        :param data: The loaded JSON document.
+        :return: A dictionary mapping every target whose key path exists to its value; targets
+                 whose path is missing, or leads through a scalar value, are left out.
+        """
+        values = {}
+        stack = [(self.root, data)]
+        while stack:
+            node, value = stack.pop()
+            for target in node.targets:
+                values[target] = value
+            if node.children and isinstance(value, (dict, list)):
+                for key, child in node.children.items():
+                    child_value = _child(value, key)
+                    if child_value is not _MISSING:
+                        stack.append((child, child_value))
+        return values
+
+    def apply(self, data, values, assignments=None):
+        """
+        Assigns the values of targets in one depth-first pass over a document.
+
+        Missing objects along a key path are created, but only on paths that lead to a target
+        with a value; targets without a value are left untouched. A value equal to the current
+        one, including its type, is not assigned again. Targets sharing a path are assigned in
+        the order they were added, so the last one wins.
+
+        :param data: The loaded JSON document to mutate in place.
+        :param values: A dictionary of the values to assign, keyed by target.
+        :param assignments: An optional dictionary that receives the key tuple and value of every
+                            changed key.
+        :return: The number of values that changed the document.
+        :raises KeyError: If a key path leads through a scalar value or past the end of an array.
+        """
+        changed = 0
+        stack = [(self.root, data)]
+        while stack:
+            node, container = stack.pop()
+            is_object = isinstance(container, dict)
+            for key, targets, keys in node.leaves:
+                for target in targets:
+                    value = values.get(target, _MISSING)
+                    if value is _MISSING:
+                        continue
+                    if is_object:
+                        if key in container and same_value(container[key], value):
+                            continue
+                        container[key] = value
+                    elif not _assign_index(container, key, keys, value):
+                        continue
+                    changed += 1
+                    if assignments is not None:
+                        assignments[keys] = value
+            for key, child in node.branches:
+                value = container.get(key, _MISSING) if is_object else _child(container, key)
+                if value is _MISSING or not isinstance(value, (dict, list)):
+                    if not child.has_target_in(values):
+                        continue
+                    if value is not _MISSING or not is_object:
+                        raise KeyError(f"Cannot follow key path {'.'.join(child.keys)}: "
+                                       f"not an object or array")
+                    value = container[key] = {}
+                stack.append((child, value))
+        return changed
@@ -0,0 +1,151 @@
+"""
+Module computing the grid placement of every group and setting widget of the schema in one pass.
+
+Placing a widget used to ask Tk how many widgets its parent already holds (grid_slaves()), which
+walks every existing slave through Tcl and makes building a group quadratic in its size.
+compute_layout() instead walks the schema once and tracks the next free row of every tab column
+and group in Python, so the GUI only creates and grids widgets at precomputed positions.
+
+Every setting occupies one logical row of its group, spanning two grid rows: the optional top
+label is placed in the first and the left label and input widget in the second, or both in the
+first without a top label. A setting marked 'inline_with_previous' shares the logical row of the
+previous setting, starting at grid column 2.
+
+Very large tabs are shown as a virtualized single-column list instead (see
+virtual_settings_view.py); layout_rows() flattens their groups into the rows of that list.
+
+Functions:
+    compute_layout(schema): Returns the placement of every group and setting, per tab.
+    place_setting(setting, row, column): Returns the placement of one setting's widgets.
+    layout_rows(groups): Flattens the groups of a tab into the rows of a single-column list.
+    count_settings(groups): Returns the number of settings in the groups of a tab.
+"""
+
+from schema_index import setting_id
+
+# Grid column of a setting placed inline with the previous one
+INLINE_COLUMN = 2
+
+def place_setting(setting, row, column):
+    """
+    Returns the placement of one setting's widgets.
+
+    :param setting: The setting dictionary from the schema.
+    :param row: The logical row of the setting in its group.
+    :param column: The first grid column of the setting, 0 or INLINE_COLUMN.
+    :return: A dictionary with the setting's 'id', the 'setting' itself, its 'description' (or
+             None), and the 'top_label', 'left_label' and 'widget' grid options. The labels are
+             None when hidden; label options hold the 'text', 'row', 'column', 'columnspan' and
+             'sticky', and the widget options the 'type', 'width', 'row', 'column' and 'sticky'.
+    """
+    ui_element = setting['ui_element']
+    widget_row = row * 2
+    top_label = None
+    if ui_element.get('top_label_visible', False):
+        top_label = {
+            'text': ui_element.get('top_label', setting['label']),
+            'row': widget_row,
+            'column': column,
+            'columnspan': 2,
+            'sticky': ui_element.get('top_label_sticky', 'ew')
+        }
+        widget_row += 1
+
+    left_label = None
+    widget_column = column
+    if ui_element.get('left_label_visible', True):
+        left_label = {
+            'text': setting['label'],
+            'row': widget_row,
+            'column': column,
+            'columnspan': 1,
+            'sticky': ui_element.get('left_label_sticky', 'w')
+        }
+        widget_column += 1
+
+    return {
+        'id': setting_id(setting),
+        'setting': setting,
+        'description': setting.get('description'),
+        'top_label': top_label,
+        'left_label': left_label,
+        'widget': {
+            'type': ui_element['type'],
+            'width': ui_element.get('widget_width', 20),
+            'row': widget_row,
+            'column': widget_column,
+            'sticky': 'ew' if ui_element['type'] == 'entry' else 'w'
+        }
+    }
+
+def compute_layout(schema):
+    """
+    Returns the placement of every group and setting, per tab.
+
+    :param schema: The schema defining the tabs, groups and settings.
+    :return: A dictionary mapping each tab name to its list of groups in schema order. Every group
+             is a dictionary with its 'name', the tab grid 'row' and 'column' of its frame, the
+             'settings' placements from place_setting(), and the sorted grid columns of the group
+             that stretch with its width under 'weighted_columns'.
+    """
+    layout = {}
+    for tab_name, tab_data in schema['tabs'].items():
+        groups = []
+        next_group_row = {}
+        for group_name, group_data in tab_data['groups'].items():
+            column = group_data['column']
+            group_row = next_group_row.get(column, 0)
+            next_group_row[column] = group_row + 1
+
+            placements = []
+            weighted_columns = {0, 1}
+            next_row = 0
+            for setting in group_data['settings']:
+                if setting['ui_element'].get('inline_with_previous', False) and next_row > 0:
+                    placement = place_setting(setting, next_row - 1, INLINE_COLUMN)
+                    weighted_columns.add(INLINE_COLUMN)
+                else:
+                    placement = place_setting(setting, next_row, 0)
+                    next_row += 1
+                weighted_columns.add(placement['widget']['column'])
+                placements.append(placement)
+
+            groups.append({
+                'name': group_name,
+                'row': group_row,
+                'column': column,
+                'settings': placements,
+                'weighted_columns': sorted(weighted_columns)
+            })
+        layout[tab_name] = groups
+    return layout
+
+def layout_rows(groups):
+    """
+    Flattens the groups of a tab into the rows of a single-column list.
+
+    :param groups: The groups of a tab from compute_layout().
+    :return: A list with a row per group, followed by a row per setting of the group. Every row
+             is a dictionary with its 'kind' ('group' or 'setting') and 'text'; setting rows also
+             hold the setting's 'placement'.
+    """
+    rows = []
+    for group in groups:
+        rows.append({'kind': 'group', 'text': group['name']})
+        for placement in group['settings']:
+            label = placement['top_label'] or placement['left_label']
+            rows.append({
+                'kind': 'setting',
+                'text': label['text'] if label else placement['setting']['label'],
+                'placement': placement
+            })
+    return rows
+
+def count_settings(groups):
+    """
+    Returns the number of settings in the groups of a tab.
+
+    :param groups: The groups of a tab from compute_layout().
+    :return: The number of settings.
+    """
+    return sum(len(group['settings']) for group in groups)
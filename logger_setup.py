@@ -5,23 +5,65 @@ This module provides the LoggerSetup class, which configures logging for the app
 from a configuration manager. It sets up file and stream handlers, configures log levels, and ensures
 that log directories exist.
 
+Log records are written off the calling thread: the root logger only puts records on a queue, and a
+QueueListener thread formats them and writes them to the file and stream handlers. Bulk mutations
+log one summary line through BulkLog instead of a line per record; the per-record lines are only
+produced at the opt-in TRACE level ("level": "TRACE" in config.json).
+
 Classes:
     LoggerSetup: Configures logging based on settings from a configuration manager.
+    BulkLog: Collects the records changed by a bulk mutation and logs them as one summary.
 
 Methods:
     __init__(self, config_manager): Initializes LoggerSetup and configures logging.
     configure_logging(self): Configures logging settings.
+    flush(): Waits until all queued records are written.
     close_handlers(): Closes all handlers of the root logger.
+
+Methods (BulkLog class):
+    __init__(self, message, *args, sample_size=5): Starts a summary for a bulk mutation.
+    add(self, record_id): Counts a changed record.
+    log(self): Logs the summary line.
 """
 
+import atexit
 import logging
+import logging.handlers
 import os
+import queue
+
+# More detailed than DEBUG: one line per changed record of a bulk mutation
+TRACE = 5
+logging.addLevelName(TRACE, 'TRACE')
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that writes directly to the listener's handlers in forked worker processes,
+    where the listener thread does not run.
+    """
+
+    def __init__(self, log_queue, handlers):
+        super().__init__(log_queue)
+        self.handlers = handlers
+        self.pid = os.getpid()
+
+    def emit(self, record):
+        if os.getpid() == self.pid:
+            super().emit(record)
+            return
+        for handler in self.handlers:
+            if record.levelno >= handler.level:
+                handler.handle(record)
 
 class LoggerSetup:
     """
     LoggerSetup configures logging for the application using settings from a config manager.
     """
 
+    # The listener writing queued records; one per process
+    _listener = None
+    _exit_handler_registered = False
+
     def __init__(self, config_manager):
         """
         Initialize LoggerSetup with a config manager and configure logging.
@@ -38,7 +80,9 @@ class LoggerSetup:
         log_level = self.config_manager.get_setting('logging.level')
         log_file = self.config_manager.get_setting('logging.file')
 
-        log_level = getattr(logging, log_level.upper(), logging.INFO)
+        log_level = logging.getLevelName(log_level.upper())
+        if not isinstance(log_level, int):
+            log_level = logging.INFO
 
         log_dir = os.path.dirname(log_file)
         if log_dir and not os.path.exists(log_dir):
@@ -52,27 +96,113 @@ class LoggerSetup:
         file_handler.setFormatter(formatter)
         stream_handler.setFormatter(formatter)
 
+        # Stop the listener of an earlier configuration, writing what it still holds
+        LoggerSetup._stop_listener()
+
         root_logger = logging.getLogger()
         root_logger.setLevel(log_level)
 
         # Clear existing handlers
         root_logger.handlers = []
 
-        root_logger.addHandler(file_handler)
-        root_logger.addHandler(stream_handler)
+        log_queue = queue.Queue()
+        handlers = [file_handler, stream_handler]
+        root_logger.addHandler(_QueueHandler(log_queue, handlers))
+        LoggerSetup._listener = logging.handlers.QueueListener(
+            log_queue, *handlers, respect_handler_level=True
+        )
+        LoggerSetup._listener.start()
+        if not LoggerSetup._exit_handler_registered:
+            # The listener thread is a daemon; write what it still holds when the process exits
+            atexit.register(LoggerSetup._stop_listener)
+            LoggerSetup._exit_handler_registered = True
 
         # Debug statements to verify configuration
-        root_logger.debug("Logger configured with level: %s", log_level)
-        root_logger.debug("Logger handlers: %s", root_logger.handlers)
+        root_logger.debug("Logger configured with level: %s", logging.getLevelName(log_level))
+        root_logger.debug("Logger handlers: %s", handlers)
+
+    @staticmethod
+    def flush():
+        """
+        Wait until all queued records are written and flush the handlers.
+        """
+        listener = LoggerSetup._listener
+        if listener is None:
+            return
+        listener.queue.join()
+        for handler in listener.handlers:
+            handler.flush()
+
+    @staticmethod
+    def _stop_listener():
+        """
+        Stop the queue listener after it wrote all queued records, and close its handlers.
+        """
+        listener = LoggerSetup._listener
+        LoggerSetup._listener = None
+        if listener is not None:
+            listener.stop()
+            for handler in listener.handlers:
+                handler.flush()
+                handler.close()
 
     @staticmethod
     def close_handlers():
         """
         Close all handlers of the root logger.
+
+        Queued records are written before the handlers are closed.
         """
+        LoggerSetup._stop_listener()
         root_logger = logging.getLogger()
         handlers = root_logger.handlers[:]
         for handler in handlers:
             handler.flush()
             handler.close()
             root_logger.removeHandler(handler)
+
+class BulkLog:
+    """
+    Collects the records changed by a bulk mutation and logs them as one summary.
+
+    The summary line is logged at DEBUG with the number of changed records and a few sample IDs.
+    Every record is additionally logged at TRACE when that level is enabled; the check is made
+    once, so a disabled TRACE level costs nothing per record.
+    """
+
+    def __init__(self, message, *args, sample_size=5):
+        """
+        Starts a summary for a bulk mutation.
+
+        :param message: The %-format message describing the mutation, e.g. "Set %s to %s".
+        :param args: The arguments of the message.
+        :param sample_size: The number of record IDs included in the summary line.
+        """
+        self.message = message
+        self.args = args
+        self.sample_size = sample_size
+        self.count = 0
+        self.samples = []
+        self._trace = logging.getLogger().isEnabledFor(TRACE)
+
+    def add(self, record_id):
+        """
+        Counts a changed record.
+
+        :param record_id: The ID of the changed record.
+        """
+        self.count += 1
+        if len(self.samples) < self.sample_size:
+            self.samples.append(record_id)
+        if self._trace:
+            logging.log(TRACE, self.message + " on %s", *self.args, record_id)
+
+    def log(self):
+        """
+        Logs the summary line, e.g. "Set StackMaxSize to 60 on 812 record(s), e.g. a, b, c".
+        """
+        if not self.count or not logging.getLogger().isEnabledFor(logging.DEBUG):
+            return
+        more = ", ..." if self.count > len(self.samples) else ""
+        logging.debug(self.message + " on %d record(s), e.g. %s%s", *self.args, self.count,
+                      ', '.join(str(sample) for sample in self.samples), more)
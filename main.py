@@ -2,19 +2,27 @@
 Main module to initialize the configuration manager, set up logging, validate directories,
 and launch the GUI application.
 
+When command-line arguments are given, they are handled by the headless CLI instead (see cli.py),
+e.g. `python main.py apply --preset presets/cat.json`.
+
 Functions:
     main(): Main function to set up and launch the application.
 """
 
+import sys
+
 from config_manager import ConfigManager
 from logger_setup import LoggerSetup
 from directory_validator import DirectoryValidator
-from gui import Application
 
 def main():
     """
     Main function to set up and launch the application.
     """
+    if len(sys.argv) > 1:
+        import cli  # pylint: disable=import-outside-toplevel
+        sys.exit(cli.main(sys.argv[1:]))
+
     # Initialize the configuration manager
     config_manager = ConfigManager('config.json', 'config_schema.json')
 
@@ -35,7 +43,8 @@ def main():
         print(e)
         return
 
-    # Initialize and launch the GUI
+    # Initialize and launch the GUI; Tk is only imported when a display is needed
+    from gui import Application  # pylint: disable=import-outside-toplevel
     app = Application()
     app.mainloop()
 
@@ -7,7 +7,7 @@ Classes:
 
 Methods (PresetManager class):
     __init__(self, preset_directory='presets', config_schema_path='config_schema.json'): Initializes the PresetManager with a preset directory and loads the config schema.
-    _load_labels_mapping(self): Loads the labels mapping from the config schema file.
+    _load_labels_mapping(self): Loads the labels mapping from the config schema file via the shared document cache.
     save_preset(self, preset_path, changes): Saves the given changes to the specified preset path in JSON format, including labels.
     load_preset(self, preset_path): Loads and returns the changes from the specified preset path in JSON format.
     save_preset_dialog(self, changes): Opens a dialog to save the preset and saves the given changes.
@@ -18,6 +18,8 @@ import json
 import os
 import logging
 from tkinter import filedialog, messagebox
+from document_cache import get_document_cache
+from schema_index import SchemaError, get_schema_index
 
 class PresetManager:
     """
@@ -37,23 +39,14 @@ class PresetManager:
 
     def _load_labels_mapping(self):
         """
-        Loads the labels mapping from the config schema file.
+        Loads the labels mapping from the config schema file, keyed by setting ID like presets.
         """
         try:
-            with open(self.config_schema_path, 'r', encoding='utf-8') as f:
-                config_schema = json.load(f)
-
-            labels_mapping = {}
-            for tab_data in config_schema.get("tabs", {}).values():
-                for group_data in tab_data.get("groups", {}).values():
-                    for setting in group_data.get("settings", []):
-                        key_path = setting.get("key_path")
-                        label = setting.get("label")
-                        if key_path and label:
-                            labels_mapping[key_path] = label
-
-            return labels_mapping
-        except (IOError, json.JSONDecodeError) as e:
+            config_schema = get_document_cache().load(self.config_schema_path)
+            return {entry['id']: entry['setting']['label']
+                    for entry in get_schema_index(config_schema).entries
+                    if entry['setting'].get('label')}
+        except (IOError, json.JSONDecodeError, KeyError, SchemaError) as e:
             logging.error("Failed to load config schema: %s", str(e))
             return {}
 
@@ -63,9 +56,9 @@ class PresetManager:
         """
         try:
             annotated_changes = {}
-            for key_path, value in changes.items():
-                label = self.labels_mapping.get(key_path, "Unknown")
-                annotated_changes[key_path] = {
+            for key, value in changes.items():
+                label = self.labels_mapping.get(key, "Unknown")
+                annotated_changes[key] = {
                     "label": label,
                     "value": value
                 }
@@ -0,0 +1,112 @@
+"""
+preview_dialog.py
+
+This module provides the PreviewDialog class, which shows the changes an apply would make and asks
+for confirmation before any file is written.
+
+Classes:
+    PreviewDialog: Dialog listing the planned changes per file with Apply and Cancel buttons.
+
+Functions:
+    format_value(value, exists=True): Formats a JSON value for display.
+    preview_rows(preview): Returns the rows of the diff tree for a preview.
+
+Methods (PreviewDialog class):
+    __init__(self, parent, preview, on_confirm): Creates the dialog for a preview.
+    confirm(self): Closes the dialog and starts the apply.
+"""
+
+import json
+import tkinter as tk
+from tkinter import ttk
+
+MAX_VALUE_LENGTH = 60
+
+def format_value(value, exists=True):
+    """
+    Formats a JSON value for display.
+
+    :param value: The value; None is shown as null.
+    :param exists: False for a key that does not exist yet.
+    :return: The value as compact JSON, shortened to MAX_VALUE_LENGTH characters, or
+             "(missing)" for a key that does not exist.
+    """
+    if not exists:
+        return "(missing)"
+    text = json.dumps(value, ensure_ascii=False)
+    if len(text) > MAX_VALUE_LENGTH:
+        text = text[:MAX_VALUE_LENGTH - 3] + "..."
+    return text
+
+def preview_rows(preview):
+    """
+    Returns the rows of the diff tree for a preview.
+
+    :param preview: The result of BatchApply.preview_changes().
+    :return: A list of (file row, child rows) tuples, where every row is a (name, old, new)
+             tuple of display strings.
+    """
+    rows = []
+    for relative_path, file_plan in preview['files'].items():
+        file_row = (relative_path, f"{file_plan['values']} value(s)",
+                    f"~{file_plan['bytes']:,} bytes")
+        children = [(key_path, format_value(old, exists), format_value(new))
+                    for key_path, exists, old, new in file_plan['changes']]
+        children.extend((f"{bulk['label']} ({bulk['key_path']})",
+                         f"{bulk['records']} record(s)", format_value(bulk['value']))
+                        for bulk in file_plan['bulk'])
+        rows.append((file_row, children))
+    return rows
+
+class PreviewDialog(tk.Toplevel):
+    """
+    Dialog listing the planned changes per file with Apply and Cancel buttons.
+    """
+
+    def __init__(self, parent, preview, on_confirm):
+        """
+        Creates the dialog for a preview.
+
+        :param parent: The parent window.
+        :param preview: The result of BatchApply.preview_changes().
+        :param on_confirm: Callable starting the apply once the changes are confirmed.
+        """
+        super().__init__(parent)
+        self.on_confirm = on_confirm
+        self.title("Preview Changes")
+        self.transient(parent)
+
+        summary = (f"{len(preview['files'])} file(s) will change: {preview['values']} value(s), "
+                   f"about {preview['bytes']:,} bytes to write. "
+                   f"{len(preview['unchanged'])} file(s) are unchanged.")
+        tk.Label(self, text=summary, anchor="w").pack(fill="x", padx=5, pady=5)
+
+        tree_frame = tk.Frame(self)
+        tree_frame.pack(fill="both", expand=True, padx=5)
+        self.tree = ttk.Treeview(tree_frame, columns=("old", "new"), height=20)
+        self.tree.heading("#0", text="File / Setting")
+        self.tree.heading("old", text="Current")
+        self.tree.heading("new", text="New")
+        self.tree.column("#0", width=360)
+        self.tree.column("old", width=160)
+        self.tree.column("new", width=160)
+        scrollbar = tk.Scrollbar(tree_frame, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
+
+        for file_row, children in preview_rows(preview):
+            item = self.tree.insert("", "end", text=file_row[0], values=file_row[1:], open=True)
+            for name, old, new in children:
+                self.tree.insert(item, "end", text=name, values=(old, new))
+
+        tk.Button(self, text="Apply", command=self.confirm).pack(side="left", padx=5, pady=5)
+        tk.Button(self, text="Cancel", command=self.destroy).pack(side="right", padx=5, pady=5)
+        self.grab_set()
+
+    def confirm(self):
+        """
+        Closes the dialog and starts the apply.
+        """
+        self.destroy()
+        self.on_confirm()
@@ -0,0 +1,90 @@
+"""
+Module for crash-safe file replacement.
+
+Files are never truncated in place. New content is written to a temporary file in the target's
+directory, flushed and fsynced, and then moved over the target with os.replace, which is atomic
+on the same file system. Backups of the replaced versions are kept by BackupStore.
+
+Classes:
+    SafeWriter: Writes files atomically.
+
+Methods (SafeWriter class):
+    create_temp(self, file_path): Creates an empty temporary file next to a target file.
+    finish_temp(self, temp_path, file_path): Fsyncs a written temporary file and copies the target's mode.
+    commit(self, temp_path, file_path): Replaces the target with the temporary file.
+    write_text(self, file_path, text): Atomically replaces a file with the given text.
+"""
+
+import os
+import shutil
+import tempfile
+
+class SafeWriter:
+    """
+    Writes files atomically.
+    """
+
+    def create_temp(self, file_path):
+        """
+        Creates an empty temporary file next to a target file.
+
+        :param file_path: The target file.
+        :return: The path of the temporary file.
+        """
+        descriptor, temp_path = tempfile.mkstemp(
+            dir=os.path.dirname(file_path) or None,
+            prefix=f".{os.path.basename(file_path)}.", suffix='.tmp'
+        )
+        os.close(descriptor)
+        return temp_path
+
+    def finish_temp(self, temp_path, file_path):
+        """
+        Fsyncs a written temporary file and copies the target's permission bits to it.
+
+        :param temp_path: The written temporary file.
+        :param file_path: The target file it will replace.
+        """
+        with open(temp_path, 'rb+') as file:
+            os.fsync(file.fileno())
+        if os.path.exists(file_path):
+            shutil.copymode(file_path, temp_path)
+
+    def commit(self, temp_path, file_path):
+        """
+        Atomically replaces the target with the temporary file.
+
+        :param temp_path: The finished temporary file.
+        :param file_path: The target file.
+        """
+        os.replace(temp_path, file_path)
+        self._fsync_directory(os.path.dirname(file_path))
+
+    def write_text(self, file_path, text):
+        """
+        Atomically replaces a file with the given text.
+
+        :param file_path: The target file.
+        :param text: The new content.
+        """
+        temp_path = self.create_temp(file_path)
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as file:
+                file.write(text)
+            self.finish_temp(temp_path, file_path)
+            self.commit(temp_path, file_path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    @staticmethod
+    def _fsync_directory(directory):
+        """Persist a rename by fsyncing its directory where the platform supports it."""
+        if os.name == 'nt':
+            return
+        descriptor = os.open(directory or '.', os.O_RDONLY)
+        try:
+            os.fsync(descriptor)
+        finally:
+            os.close(descriptor)
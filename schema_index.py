@@ -0,0 +1,323 @@
+"""
+Module providing a compiled, flattened view of the settings schema.
+
+The schema nests settings under tabs and groups. SchemaIndex walks it once and keeps every setting
+as a flat entry with its ID, pre-split key tuple, target file and value coercer, grouped by file in
+schema order. The apply engine, the settings model and the complex handler read the index instead
+of walking the schema and splitting key paths on every apply.
+
+Before any file is opened, the apply engine passes all values through validate(), which coerces
+each one to its declared type and checks the setting's optional 'min' and 'max'. Every invalid
+value is reported together in one ValidationError.
+
+Setting IDs must be unique, since the settings model, presets and the apply engine key values by
+them. Two settings with the same ID, e.g. two settings without an 'id' sharing a key path, would
+share one value, so the index rejects such a schema with a SchemaError.
+
+Indexes are cached per schema object, so a schema loaded once through the document cache is indexed
+once; a schema must not be modified after it was indexed.
+
+Classes:
+    SchemaIndex: A flattened, per-file view of the settings in a schema.
+    ValidationError: Raised when values do not match the types or bounds of their settings.
+    SchemaError: Raised when the schema itself is invalid, e.g. has duplicate setting IDs.
+
+Functions:
+    setting_id(setting): Returns the stable ID of a schema setting.
+    resolve_path(file_path, base_paths): Resolves a schema file path against the server directories.
+    coerce_value(value, value_type): Coerces a value to a schema type.
+    get_schema_index(schema): Returns the cached SchemaIndex of a schema.
+
+Methods (SchemaIndex class):
+    __init__(self, schema): Flattens the settings of a schema and checks that their IDs are unique.
+    defaults(self): Returns the default value of every setting keyed by setting ID.
+    validate(self, values): Coerces values to their setting types and checks their bounds.
+    file_paths(self, base_paths): Returns the resolved path of every target file.
+    key_path_trie(self, file_path): Returns the KeyPathTrie of a file's simple settings.
+"""
+
+import math
+import os
+import threading
+from collections import OrderedDict
+from key_path_trie import KeyPathTrie, parse_key_path
+from tracing import span
+
+# The first component of a schema file path selects the server directory it lives in
+BASE_DIRECTORIES = {
+    'database': 'server_database',
+    'configs': 'server_config'
+}
+
+TRUE_STRINGS = frozenset({'true', '1', 'yes', 'on'})
+FALSE_STRINGS = frozenset({'false', '0', 'no', 'off', ''})
+
+def setting_id(setting):
+    """
+    Returns the stable ID of a schema setting.
+
+    :param setting: The setting dictionary from the schema.
+    :return: The 'id' field, or the key path if the setting has none.
+    """
+    return setting.get('id', setting['key_path'])
+
+def resolve_path(file_path, base_paths):
+    """
+    Resolves a schema file path such as 'database/templates/items.json' against the server
+    directories.
+
+    :param file_path: The relative file path from the schema.
+    :param base_paths: A mapping with the 'server_database' and 'server_config' directories, or a
+                       callable returning the directory for one of those names.
+    :return: The full file path.
+    :raises ValueError: If the base directory is unknown.
+    """
+    file_base, _, remainder = file_path.partition('/')
+    if file_base not in BASE_DIRECTORIES:
+        raise ValueError(f"Unknown base directory for file path: {file_path}")
+    name = BASE_DIRECTORIES[file_base]
+    base_path = base_paths(name) if callable(base_paths) else base_paths[name]
+    return os.path.join(base_path, remainder)
+
+def _coerce_integer(value):
+    """Coerce a value to an integer, accepting integral floats and numeric strings."""
+    if not isinstance(value, bool):
+        if isinstance(value, int):
+            return value
+        if isinstance(value, str):
+            try:
+                return int(value)
+            except ValueError:
+                pass
+        try:
+            number = float(value.strip() if isinstance(value, str) else value)
+        except (TypeError, ValueError):
+            number = None
+        if number is not None and number.is_integer():
+            return int(number)
+    raise ValueError(f"Expected an integer, got {value!r}")
+
+def _coerce_float(value):
+    """Coerce a value to a finite float."""
+    if not isinstance(value, bool):
+        try:
+            number = float(value.strip() if isinstance(value, str) else value)
+        except (TypeError, ValueError):
+            number = None
+        if number is not None and math.isfinite(number):
+            return number
+    raise ValueError(f"Expected a number, got {value!r}")
+
+def _coerce_boolean(value):
+    """Coerce a value to a boolean, parsing the usual true and false strings."""
+    if isinstance(value, str):
+        text = value.strip().lower()
+        if text in TRUE_STRINGS:
+            return True
+        if text in FALSE_STRINGS:
+            return False
+        raise ValueError(f"Expected a boolean, got {value!r}")
+    return bool(value)
+
+def _identity(value):
+    """Return a value unchanged."""
+    return value
+
+COERCERS = {
+    'integer': _coerce_integer,
+    'float': _coerce_float,
+    'boolean': _coerce_boolean
+}
+
+def coerce_value(value, value_type):
+    """
+    Coerces a value to a schema type.
+
+    :param value: The value, e.g. the text of an entry.
+    :param value_type: The schema type ('integer', 'float', 'boolean' or other).
+    :return: The coerced value; values of other types are returned unchanged.
+    :raises ValueError: If the value cannot be converted.
+    """
+    return COERCERS.get(value_type, _identity)(value)
+
+class ValidationError(ValueError):
+    """
+    Raised when values do not match the types or bounds of their settings.
+
+    The 'errors' attribute lists every invalid value as a dictionary with the setting's 'id' and
+    'label', the rejected 'value' and a 'message'.
+    """
+
+    def __init__(self, errors):
+        self.errors = errors
+        details = '; '.join(f"{error['label']}: {error['message']}" for error in errors)
+        super().__init__(f"{len(errors)} invalid value(s): {details}")
+
+class SchemaError(ValueError):
+    """
+    Raised when the schema itself is invalid, e.g. has duplicate setting IDs.
+    """
+
+class SchemaIndex:
+    """
+    A flattened, per-file view of the settings in a schema.
+
+    Every entry is a dictionary with the setting's 'id', the 'setting' itself, its 'key_path' and
+    pre-split 'keys' tuple, the relative target 'file', the 'complex' flag, the 'type' and its
+    'coerce' callable, and the 'tab' and 'group' it belongs to.
+    """
+
+    def __init__(self, schema):
+        """
+        Flattens the settings of a schema and checks that their IDs are unique.
+
+        :param schema: The schema defining the settings.
+        :raises SchemaError: If two settings have the same ID.
+        """
+        self.entries = []
+        self.by_id = {}
+        self.by_file = {}
+        self._file_paths = {}
+        self._tries = {}
+        self._lock = threading.Lock()
+        for tab_name, tab_data in schema['tabs'].items():
+            for group_name, group_data in tab_data['groups'].items():
+                for setting in group_data['settings']:
+                    value_type = setting.get('type')
+                    entry = {
+                        'id': setting_id(setting),
+                        'setting': setting,
+                        'key_path': setting['key_path'],
+                        'keys': parse_key_path(setting['key_path']),
+                        'file': setting['file'],
+                        'complex': setting.get('complex', False),
+                        'type': value_type,
+                        'coerce': COERCERS.get(value_type, _identity),
+                        'tab': tab_name,
+                        'group': group_name
+                    }
+                    duplicate = self.by_id.get(entry['id'])
+                    if duplicate is not None:
+                        raise SchemaError(
+                            f"Settings {duplicate['setting'].get('label', duplicate['id'])!r} and "
+                            f"{setting.get('label', entry['id'])!r} share the ID "
+                            f"{entry['id']!r}; give them distinct 'id' fields")
+                    self.entries.append(entry)
+                    self.by_id[entry['id']] = entry
+                    self.by_file.setdefault(entry['file'], []).append(entry)
+
+    def defaults(self):
+        """
+        Returns the default value of every setting keyed by setting ID.
+
+        :return: A dictionary of default values in schema order.
+        """
+        return {entry['id']: entry['setting'].get('default', None) for entry in self.entries}
+
+    def validate(self, values):
+        """
+        Coerces values to their setting types and checks their 'min' and 'max' bounds.
+
+        All values are checked before anything is reported, so one error lists every invalid
+        value. Values of IDs that are not in the schema are left out of the result.
+
+        :param values: A dictionary of values keyed by setting ID.
+        :return: A dictionary of the coerced values in schema order.
+        :raises ValidationError: If any value cannot be coerced or is out of bounds.
+        """
+        coerced = {}
+        errors = []
+        for entry in self.entries:
+            key = entry['id']
+            if key not in values:
+                continue
+            value = values[key]
+            try:
+                coerced[key] = entry['coerce'](value)
+                message = self._bounds_error(entry['setting'], coerced[key])
+            except ValueError as e:
+                message = str(e)
+            if message:
+                errors.append({'id': key, 'label': entry['setting'].get('label', key),
+                               'value': value, 'message': message})
+        if errors:
+            raise ValidationError(errors)
+        return coerced
+
+    @staticmethod
+    def _bounds_error(setting, value):
+        """
+        Checks a coerced value against the setting's optional 'min' and 'max'.
+
+        :return: An error message, or None if the value is within bounds.
+        """
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            return None
+        if 'min' in setting and value < setting['min']:
+            return f"{value} is below the minimum of {setting['min']}"
+        if 'max' in setting and value > setting['max']:
+            return f"{value} is above the maximum of {setting['max']}"
+        return None
+
+    def file_paths(self, base_paths):
+        """
+        Returns the resolved path of every target file.
+
+        The result is cached per pair of server directories.
+
+        :param base_paths: A mapping with the 'server_database' and 'server_config' directories.
+        :return: A dictionary mapping each relative file path to its full path.
+        :raises ValueError: If a file path has an unknown base directory.
+        """
+        key = (base_paths['server_database'], base_paths['server_config'])
+        with self._lock:
+            if key not in self._file_paths:
+                with span('resolve_paths', files=len(self.by_file)):
+                    self._file_paths[key] = {file_path: resolve_path(file_path, base_paths)
+                                             for file_path in self.by_file}
+            return self._file_paths[key]
+
+    def key_path_trie(self, file_path):
+        """
+        Returns the KeyPathTrie of the key paths of a file's simple settings, ending at their IDs.
+
+        The trie is compiled on first use and shared by every later read and apply of the file.
+
+        :param file_path: The relative file path from the schema.
+        :return: The KeyPathTrie; it is empty for a file without simple settings.
+        """
+        with self._lock:
+            trie = self._tries.get(file_path)
+            if trie is None:
+                trie = self._tries[file_path] = KeyPathTrie(
+                    (entry['keys'], entry['id']) for entry in self.by_file.get(file_path, ())
+                    if not entry['complex']
+                )
+            return trie
+
+# Indexes of recently used schemas, keyed by id() and holding the schema to detect reused ids
+_INDEX_CACHE_SIZE = 8
+_index_cache = OrderedDict()
+_index_cache_lock = threading.Lock()
+
+def get_schema_index(schema):
+    """
+    Returns the SchemaIndex of a schema, building it on first use.
+
+    :param schema: The schema defining the settings.
+    :return: The SchemaIndex shared by all users of this schema object.
+    """
+    key = id(schema)
+    with _index_cache_lock:
+        cached = _index_cache.get(key)
+        if cached is not None and cached[0] is schema:
+            _index_cache.move_to_end(key)
+            return cached[1]
+    with span('index_schema', 'startup'):
+        index = SchemaIndex(schema)
+    with _index_cache_lock:
+        _index_cache[key] = (schema, index)
+        _index_cache.move_to_end(key)
+        while len(_index_cache) > _INDEX_CACHE_SIZE:
+            _index_cache.popitem(last=False)
+    return index
@@ -0,0 +1,164 @@
+"""
+Module providing an incremental search over all settings of the schema.
+
+SearchIndex is built once from the flattened schema (see schema_index.py). The label, top label,
+description, key path, file and ID of every setting are split into lowercase tokens; camelCase and
+snake_case words are split as well, so "stack" finds "StackMaxSize". Every token is added to a
+prefix trie whose nodes hold, in ascending order, the positions of all settings with a token
+starting with that prefix. Looking up a partly typed word is a walk down the trie, and a search
+stops as soon as it has found as many results as it lists. A query matches the settings that
+contain every one of its words as a token prefix; settings matching on their label are listed
+first.
+
+Classes:
+    SearchIndex: Prefix-trie index over the searchable fields of every setting.
+
+Functions:
+    tokenize(text): Splits a text into lowercase search tokens.
+
+Methods (SearchIndex class):
+    __init__(self, schema_index): Indexes every setting of a SchemaIndex.
+    search(self, query, limit=None): Returns the entries of the settings matching a query.
+"""
+
+import re
+from itertools import islice
+
+_WORD = re.compile(r'[A-Za-z0-9]+')
+_CAMEL_PART = re.compile(r'[A-Z]+(?![a-z])|[A-Z]?[a-z]+|[0-9]+')
+
+def tokenize(text):
+    """
+    Splits a text into lowercase search tokens.
+
+    Every word is a token, and so is every part of a camelCase word, e.g. "StackMaxSize" gives
+    "stackmaxsize", "stack", "max" and "size".
+
+    :param text: The text, e.g. a label or key path; None gives no tokens.
+    :return: A list of distinct tokens in order of appearance.
+    """
+    if not text:
+        return []
+    tokens = []
+    for word in _WORD.findall(text):
+        tokens.append(word.lower())
+        parts = _CAMEL_PART.findall(word)
+        if len(parts) > 1:
+            tokens.extend(part.lower() for part in parts)
+    return list(dict.fromkeys(tokens))
+
+class _TrieNode:
+    """
+    Node of a prefix trie, holding the positions of every setting with a token below it.
+    """
+
+    __slots__ = ('children', 'positions', '_position_set')
+
+    def __init__(self):
+        self.children = {}
+        # Ascending, since settings are indexed in schema order
+        self.positions = []
+        self._position_set = None
+
+    def position_set(self):
+        """Return the positions as a set, built on first use."""
+        if self._position_set is None:
+            self._position_set = frozenset(self.positions)
+        return self._position_set
+
+_EMPTY_NODE = _TrieNode()
+
+class _PrefixTrie:
+    """
+    Trie of tokens whose nodes hold the positions of every token below them.
+    """
+
+    __slots__ = ('root',)
+
+    def __init__(self):
+        self.root = _TrieNode()
+
+    def add(self, token, position):
+        """Add a token of the setting at a position; positions must be added in order."""
+        node = self.root
+        for char in token:
+            child = node.children.get(char)
+            if child is None:
+                child = node.children[char] = _TrieNode()
+            if not child.positions or child.positions[-1] != position:
+                child.positions.append(position)
+            node = child
+
+    def lookup(self, prefix):
+        """Return the node of a prefix, or an empty node if no token starts with it."""
+        node = self.root
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return _EMPTY_NODE
+        return node
+
+def _matching(nodes):
+    """
+    Yields, in ascending order, the positions held by every one of the trie nodes.
+
+    The smallest node is walked and the others are only probed, so the cost depends on the
+    smallest node and stops as soon as the caller stops iterating.
+    """
+    nodes = sorted(nodes, key=lambda node: len(node.positions))
+    if len(nodes) == 1:
+        yield from nodes[0].positions
+        return
+    others = [node.position_set() for node in nodes[1:]]
+    for position in nodes[0].positions:
+        if all(position in other for other in others):
+            yield position
+
+class SearchIndex:
+    """
+    Prefix-trie index over the searchable fields of every setting.
+    """
+
+    def __init__(self, schema_index):
+        """
+        Indexes every setting of a SchemaIndex.
+
+        :param schema_index: The SchemaIndex of the schema.
+        """
+        self.entries = schema_index.entries
+        self._all = _PrefixTrie()
+        self._labels = _PrefixTrie()
+        for position, entry in enumerate(self.entries):
+            setting = entry['setting']
+            label_text = f"{setting.get('label', '')} " \
+                         f"{setting.get('ui_element', {}).get('top_label', '')}"
+            for token in tokenize(label_text):
+                self._labels.add(token, position)
+                self._all.add(token, position)
+            for text in (setting.get('description'), entry['key_path'], entry['file'],
+                         str(entry['id'])):
+                for token in tokenize(text):
+                    self._all.add(token, position)
+
+    def search(self, query, limit=None):
+        """
+        Returns the entries of the settings matching a query.
+
+        :param query: The text typed by the user; every word must be the start of a token.
+        :param limit: The maximum number of results, or None for all.
+        :return: A list of SchemaIndex entries; label matches first, each part in schema order.
+                 An empty query matches nothing.
+        """
+        words = [word.lower() for word in _WORD.findall(query)]
+        if not words:
+            return []
+        if limit is None:
+            limit = len(self.entries)
+        # A setting matching every word on its label matches every word on all fields too
+        ranked = list(islice(_matching([self._labels.lookup(word) for word in words]), limit))
+        if len(ranked) < limit:
+            label_matches = set(ranked)
+            others = (position for position in _matching([self._all.lookup(word) for word in words])
+                      if position not in label_matches)
+            ranked.extend(islice(others, limit - len(ranked)))
+        return [self.entries[position] for position in ranked]
@@ -0,0 +1,155 @@
+"""
+Module providing the widget-independent model of setting values.
+
+SettingsModel holds the value of every setting in the schema as plain data, keyed by a stable
+setting ID, together with dirty flags that record which values differ from the last clean state
+(the defaults or the values last applied). The GUI binds its Tk variables to the model; the apply
+engine, presets and benchmarks read and write plain values through it, so they run without Tk.
+
+A setting's ID is its 'id' field in the schema, or its key path if it has none, so presets saved
+before IDs existed keep loading. IDs are unique; SchemaIndex rejects a schema in which two
+settings would share one value.
+
+Classes:
+    SettingsModel: Holds setting values and dirty flags keyed by setting ID.
+
+Functions:
+    setting_id(setting): Returns the stable ID of a schema setting (defined in schema_index).
+
+Methods (SettingsModel class):
+    __init__(self, schema): Initializes the model with the schema's default values.
+    get(self, key): Returns the value of a setting.
+    set(self, key, value): Sets the value of a setting and notifies subscribers.
+    update(self, values): Sets several values, ignoring unknown IDs.
+    reset_to_defaults(self): Sets every setting to its schema default.
+    values(self): Returns a copy of all values keyed by setting ID.
+    is_dirty(self, key): Checks whether a value differs from the last clean state.
+    dirty_ids(self): Returns the IDs of all dirty settings.
+    mark_clean(self, values=None): Records the current or given values as the clean state.
+    subscribe(self, callback): Registers a callable notified of every value change.
+"""
+
+import logging
+from key_path_trie import same_value
+from schema_index import get_schema_index, setting_id  # pylint: disable=unused-import
+
+class SettingsModel:
+    """
+    Holds setting values and dirty flags keyed by setting ID.
+    """
+
+    def __init__(self, schema):
+        """
+        Initializes the model with the schema's default values.
+
+        :param schema: The schema defining the settings.
+        :raises SchemaError: If two settings of the schema have the same ID.
+        """
+        self.index = get_schema_index(schema)
+        self.settings = {key: entry['setting'] for key, entry in self.index.by_id.items()}
+        self._values = {}
+        self._clean_values = {}
+        self._subscribers = []
+        self.reset_to_defaults()
+        self.mark_clean()
+
+    def get(self, key):
+        """
+        Returns the value of a setting.
+
+        :param key: The ID of the setting.
+        :return: The current value.
+        :raises KeyError: If the ID is unknown.
+        """
+        return self._values[key]
+
+    def set(self, key, value):
+        """
+        Sets the value of a setting and notifies subscribers if it changed.
+
+        :param key: The ID of the setting.
+        :param value: The new value.
+        :return: True if the value changed.
+        :raises KeyError: If the ID is unknown.
+        """
+        if key not in self.settings:
+            raise KeyError(key)
+        current = self._values.get(key)
+        if key in self._values and same_value(current, value):
+            return False
+        self._values[key] = value
+        for callback in self._subscribers:
+            callback(key, value)
+        return True
+
+    def update(self, values):
+        """
+        Sets several values, ignoring IDs that are not in the schema.
+
+        :param values: A dictionary of values keyed by setting ID.
+        :return: The list of IDs whose value changed.
+        """
+        changed = []
+        for key, value in values.items():
+            if key not in self.settings:
+                logging.debug("Ignoring value for unknown setting %s", key)
+                continue
+            if self.set(key, value):
+                changed.append(key)
+        return changed
+
+    def reset_to_defaults(self):
+        """
+        Sets every setting to its schema default.
+        """
+        for key, value in self.index.defaults().items():
+            self.set(key, value)
+
+    def values(self):
+        """
+        Returns a copy of all values keyed by setting ID.
+
+        :return: A dictionary of plain values.
+        """
+        return dict(self._values)
+
+    def is_dirty(self, key):
+        """
+        Checks whether a value differs from the last clean state.
+
+        Values are compared by their text as well, so an entry holding "60" is not dirty
+        against a clean value of 60.
+
+        :param key: The ID of the setting.
+        :return: True if the value changed since the last clean state.
+        """
+        value = self._values[key]
+        clean = self._clean_values.get(key)
+        if same_value(value, clean):
+            return False
+        return isinstance(value, bool) or isinstance(clean, bool) or str(value) != str(clean)
+
+    def dirty_ids(self):
+        """
+        Returns the IDs of all dirty settings.
+
+        :return: A list of setting IDs in schema order.
+        """
+        return [key for key in self.settings if self.is_dirty(key)]
+
+    def mark_clean(self, values=None):
+        """
+        Records the current or given values as the clean state.
+
+        :param values: The values that are now clean, e.g. the ones just applied; defaults to
+                       all current values.
+        """
+        self._clean_values.update(self._values if values is None else values)
+
+    def subscribe(self, callback):
+        """
+        Registers a callable notified of every value change.
+
+        :param callback: A callable receiving the setting ID and the new value.
+        """
+        self._subscribers.append(callback)
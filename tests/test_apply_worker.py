@@ -0,0 +1,110 @@
+import unittest
+import os
+import json
+import shutil
+from apply_worker import ApplyWorker
+from batch_apply import BatchApply, ApplyCancelled
+from config_manager import ConfigManager
+
+class TestApplyWorker(unittest.TestCase):
+    """Test cases for the ApplyWorker class."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Set up test environment."""
+        cls.test_config_path = 'test_config.json'
+        with open(cls.test_config_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({
+                "paths": {
+                    "server_database": "database",
+                    "server_config": "configs"
+                }
+            }))
+
+        cls.test_schema_path = 'test_schema.json'
+        with open(cls.test_schema_path, 'w', encoding='utf-8') as f:
+            f.write('{}')
+
+        os.makedirs('database', exist_ok=True)
+        cls.schema = {
+            'tabs': {
+                'Tab1': {
+                    'groups': {
+                        'Group1': {
+                            'column': 1,
+                            'settings': [
+                                {
+                                    'label': 'Value',
+                                    'file': 'database/test_worker.json',
+                                    'key_path': 'value',
+                                    'type': 'integer',
+                                    'default': 0,
+                                    'complex': False
+                                }
+                            ]
+                        }
+                    }
+                }
+            }
+        }
+
+    @classmethod
+    def tearDownClass(cls):
+        """Clean up test environment."""
+        if os.path.exists(cls.test_config_path):
+            os.remove(cls.test_config_path)
+        if os.path.exists(cls.test_schema_path):
+            os.remove(cls.test_schema_path)
+        if os.path.exists('database'):
+            shutil.rmtree('database')
+
+    def setUp(self):
+        """Set up for each test."""
+        with open('database/test_worker.json', 'w', encoding='utf-8') as f:
+            json.dump({'value': 0}, f)
+        self.batch_apply = BatchApply(ConfigManager(self.test_config_path, self.test_schema_path))
+
+    def run_worker(self, worker):
+        """Run a worker to completion and return its messages."""
+        worker.start()
+        worker._thread.join(timeout=30)  # pylint: disable=protected-access
+        return worker.poll()
+
+    def test_progress_and_result(self):
+        """Test that progress events and the result are queued."""
+        messages = self.run_worker(ApplyWorker(self.batch_apply, {'value': 5}, self.schema))
+
+        events = [payload['event'] for kind, payload in messages if kind == 'progress']
+        self.assertEqual(events, ['started', 'written', 'done', 'committed'])
+        kind, result = messages[-1]
+        self.assertEqual(kind, 'finished')
+        self.assertEqual(result['touched'], ['database/test_worker.json'])
+        with open('database/test_worker.json', 'r', encoding='utf-8') as f:
+            self.assertEqual(json.load(f), {'value': 5})
+
+    def test_preview_leaves_files_untouched(self):
+        """Test that a preview worker queues the planned changes and modifies nothing."""
+        messages = self.run_worker(ApplyWorker(self.batch_apply, {'value': 5}, self.schema,
+                                               preview=True))
+
+        kind, preview = messages[-1]
+        self.assertEqual(kind, 'finished')
+        self.assertEqual(preview['files']['database/test_worker.json']['changes'],
+                         [('value', True, 0, 5)])
+        with open('database/test_worker.json', 'r', encoding='utf-8') as f:
+            self.assertEqual(json.load(f), {'value': 0})
+
+    def test_cancel_leaves_files_untouched(self):
+        """Test that a cancelled apply reports ApplyCancelled and modifies nothing."""
+        worker = ApplyWorker(self.batch_apply, {'value': 7}, self.schema)
+        worker.cancel()
+        messages = self.run_worker(worker)
+
+        kind, error = messages[-1]
+        self.assertEqual(kind, 'error')
+        self.assertIsInstance(error, ApplyCancelled)
+        with open('database/test_worker.json', 'r', encoding='utf-8') as f:
+            self.assertEqual(json.load(f), {'value': 0})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+import os
+import json
+import shutil
+from unittest import mock
+from backup_store import BackupStore
+
+class TestBackupStore(unittest.TestCase):
+    """Test cases for the BackupStore class."""
+
+    def setUp(self):
+        """Set up for each test."""
+        self.directory = 'test_backup_store'
+        self.backup_directory = 'test_backup_store_backup'
+        os.makedirs(self.directory, exist_ok=True)
+        self.items_path = os.path.join(self.directory, 'items.json')
+        self.bots_path = os.path.join(self.directory, 'bots.json')
+        self.write(self.items_path, {'value': 1})
+        self.write(self.bots_path, {'bots': 1})
+
+    def tearDown(self):
+        """Clean up after each test."""
+        for directory in (self.directory, self.backup_directory):
+            if os.path.exists(directory):
+                shutil.rmtree(directory)
+
+    @staticmethod
+    def write(path, data):
+        """Write a JSON document to a file."""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+
+    @staticmethod
+    def read(path):
+        """Read a JSON document from a file."""
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def count_objects(self):
+        """Count the stored objects."""
+        objects_directory = os.path.join(self.backup_directory, 'objects')
+        return sum(len(files) for _, _, files in os.walk(objects_directory))
+
+    def test_identical_content_is_stored_once(self):
+        """Test that snapshots of unchanged files share their compressed objects."""
+        store = BackupStore(self.backup_directory)
+        first = store.create_snapshot({'database/items.json': self.items_path,
+                                       'database/bots.json': self.bots_path}, 'first')
+        self.write(self.items_path, {'value': 2})
+        store.create_snapshot({'database/items.json': self.items_path,
+                               'database/bots.json': self.bots_path}, 'second')
+
+        self.assertEqual(self.count_objects(), 3)
+        snapshots = store.list_snapshots()
+        self.assertEqual([manifest['label'] for manifest in snapshots], ['second', 'first'])
+        self.assertEqual(snapshots[1]['files']['database/bots.json']['sha256'],
+                         first['files']['database/bots.json']['sha256'])
+        self.assertIsNone(store.create_snapshot({'missing.json': 'missing.json'}))
+
+    def test_restore_puts_files_back(self):
+        """Test that restoring a snapshot rewrites its files and snapshots the current state."""
+        store = BackupStore(self.backup_directory)
+        manifest = store.create_snapshot({'database/items.json': self.items_path,
+                                          'database/bots.json': self.bots_path})
+        self.write(self.items_path, {'value': 2})
+        self.write(self.bots_path, {'bots': 2})
+
+        restored = store.restore(manifest['id'])
+
+        self.assertEqual(len(restored), 2)
+        self.assertEqual(self.read(self.items_path), {'value': 1})
+        self.assertEqual(self.read(self.bots_path), {'bots': 1})
+        self.assertEqual(sorted(os.listdir(self.directory)), ['bots.json', 'items.json'])
+        self.assertEqual(len(store.list_snapshots()), 2)
+
+    def test_prune_applies_retention(self):
+        """Test that old snapshots beyond the limits are removed with their unused objects."""
+        store = BackupStore(self.backup_directory, max_snapshots=2, max_age_days=1)
+        with mock.patch('backup_store.time.time', return_value=1000.0):
+            store.create_snapshot({'database/items.json': self.items_path}, 'ancient')
+        for value in (2, 3):
+            self.write(self.items_path, {'value': value})
+            store.create_snapshot({'database/items.json': self.items_path}, f"value {value}")
+        self.write(self.items_path, {'value': 4})
+        store.create_snapshot({'database/items.json': self.items_path}, 'value 4')
+
+        removed = store.prune()
+
+        self.assertEqual(len(removed), 2)
+        self.assertEqual([manifest['label'] for manifest in store.list_snapshots()],
+                         ['value 4', 'value 3'])
+        self.assertEqual(self.count_objects(), 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,8 +2,11 @@ import unittest
 import os
 import json
 import shutil
-import tkinter as tk
+from unittest import mock
 from batch_apply import BatchApply
+from preview_dialog import preview_rows
+from schema_index import ValidationError
+from tracing import Trace
 from config_manager import ConfigManager
 
 class TestBatchApply(unittest.TestCase):
@@ -66,8 +69,7 @@ class TestBatchApply(unittest.TestCase):
 
     def test_apply_changes(self):
         """Test applying changes."""
-        settings = {'key1.subkey1': tk.Entry()}
-        settings['key1.subkey1'].insert(0, 'new_value1')
+        settings = {'key1.subkey1': 'new_value1'}
         schema = {
             'tabs': {
                 'Tab1': {
@@ -96,5 +98,356 @@ class TestBatchApply(unittest.TestCase):
             data = json.load(f)
         self.assertEqual(data['key1']['subkey1'], 'new_value1')
 
+    def test_apply_changes_single_pass(self):
+        """Test that simple and complex changes to one file parse and write it once."""
+        items_path = 'database/test_single_pass.json'
+        with open(items_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'ammo1': {'_parent': '5485a8684bdc2da71d8b4567', '_props': {'StackMaxSize': 10}},
+                'other': {'_parent': 'some_other_parent', '_props': {'StackMaxSize': 30}}
+            }, f)
+        settings = {
+            '_props.StackMaxSize': '75',
+            'other._props.StackMaxSize': 40
+        }
+        schema = {
+            'tabs': {
+                'Tab1': {
+                    'groups': {
+                        'Group1': {
+                            'column': 1,
+                            'settings': [
+                                {
+                                    'label': 'Ammo Stack Size',
+                                    'file': 'database/test_single_pass.json',
+                                    'key_path': '_props.StackMaxSize',
+                                    'type': 'integer',
+                                    'default': 10,
+                                    'complex': True
+                                },
+                                {
+                                    'label': 'Other Stack Size',
+                                    'file': 'database/test_single_pass.json',
+                                    'key_path': 'other._props.StackMaxSize',
+                                    'type': 'integer',
+                                    'default': 30,
+                                    'complex': False
+                                }
+                            ]
+                        }
+                    }
+                }
+            }
+        }
+
+        with mock.patch('batch_apply.json.loads', wraps=json.loads) as loads, \
+                mock.patch.object(self.batch_apply, 'write_document',
+                                  wraps=self.batch_apply.write_document) as write:
+            result = self.batch_apply.apply_changes(settings, schema)
+
+        self.assertEqual(loads.call_count, 1)
+        self.assertEqual(write.call_count, 1)
+        self.assertEqual(set(result['timings']['database/test_single_pass.json']),
+                         {'parse', 'mutate', 'write'})
+        with open(items_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        self.assertEqual(data['ammo1']['_props']['StackMaxSize'], 75)
+        self.assertEqual(data['other']['_props']['StackMaxSize'], 40)
+
+    def test_apply_changes_with_list_indices_and_escaped_dots(self):
+        """Test applying key paths through arrays and keys containing dots in one pass."""
+        bot_path = 'database/test_key_paths.json'
+        with open(bot_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'appearance': {'body': {'a': 1, 'b': 2}},
+                'chances': [{'weight': 1}, {'weight': 2}],
+                'filters.json': {'enabled': False}
+            }, f, indent=4)
+
+        def setting(key_path, value_type):
+            return {'label': key_path, 'file': 'database/test_key_paths.json',
+                    'key_path': key_path, 'type': value_type, 'default': None, 'complex': False}
+        schema = {'tabs': {'Tab1': {'groups': {'Group1': {'column': 1, 'settings': [
+            setting('appearance.body.a', 'integer'),
+            setting('appearance.body.b', 'integer'),
+            setting('chances.1.weight', 'integer'),
+            setting('filters\\.json.enabled', 'boolean')
+        ]}}}}}
+        settings = {'appearance.body.a': 1, 'appearance.body.b': '5', 'chances.1.weight': 7,
+                    'filters\\.json.enabled': True}
+
+        preview = self.batch_apply.preview_changes(settings, schema)
+        self.assertEqual(preview['files']['database/test_key_paths.json']['changes'], [
+            ('appearance.body.b', True, 2, 5), ('chances.1.weight', True, 2, 7),
+            ('filters\\.json.enabled', True, False, True)
+        ])
+        result = self.batch_apply.apply_changes(settings, schema)
+
+        self.assertEqual(result['touched'], ['database/test_key_paths.json'])
+        with open(bot_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        self.assertEqual(data, {
+            'appearance': {'body': {'a': 1, 'b': 5}},
+            'chances': [{'weight': 1}, {'weight': 7}],
+            'filters.json': {'enabled': True}
+        })
+        os.remove(bot_path)
+
+    def test_apply_changes_keeps_crlf_line_endings(self):
+        """Test that patching a CRLF file changes only the bytes of the target value."""
+        crlf_path = 'database/test_crlf.json'
+        original = b'{\r\n    "key": {\r\n        "value": 10,\r\n        "other": "a"\r\n    }\r\n}\r\n'
+        with open(crlf_path, 'wb') as f:
+            f.write(original)
+        schema = {'tabs': {'Tab1': {'groups': {'Group1': {'column': 1, 'settings': [
+            {'label': 'Value', 'file': 'database/test_crlf.json', 'key_path': 'key.value',
+             'type': 'integer', 'default': 10, 'complex': False}
+        ]}}}}}
+
+        self.batch_apply.apply_changes({'key.value': 250}, schema)
+
+        with open(crlf_path, 'rb') as f:
+            self.assertEqual(f.read(), original.replace(b'10', b'250'))
+        os.remove(crlf_path)
+
+    def test_apply_changes_skips_unchanged_files(self):
+        """Test that files whose values already match are reported as skipped and not rewritten."""
+        file_path = 'database/test_incremental.json'
+        with open(file_path, 'w', encoding='utf-8') as f:
+            json.dump({'key': 1}, f)
+        settings = {'key': 1}
+        schema = {
+            'tabs': {
+                'Tab1': {
+                    'groups': {
+                        'Group1': {
+                            'column': 1,
+                            'settings': [
+                                {
+                                    'label': 'Key',
+                                    'file': 'database/test_incremental.json',
+                                    'key_path': 'key',
+                                    'type': 'integer',
+                                    'default': 1,
+                                    'complex': False
+                                }
+                            ]
+                        }
+                    }
+                }
+            }
+        }
+
+        with mock.patch.object(self.batch_apply, 'write_document') as write:
+            result = self.batch_apply.apply_changes(settings, schema)
+        self.assertEqual(write.call_count, 0)
+        self.assertEqual(result['skipped'], ['database/test_incremental.json'])
+        self.assertEqual(result['touched'], [])
+
+        # A second apply with the same values skips the file without parsing it again
+        with mock.patch('batch_apply.json.loads', wraps=json.loads) as loads:
+            result = self.batch_apply.apply_changes(settings, schema)
+        self.assertEqual(loads.call_count, 0)
+        self.assertEqual(result['skipped'], ['database/test_incremental.json'])
+
+        settings['key'] = 2
+        result = self.batch_apply.apply_changes(settings, schema)
+        self.assertEqual(result['touched'], ['database/test_incremental.json'])
+
+    def _two_file_schema(self):
+        """Return a schema with one simple setting in each of two files."""
+        settings = []
+        for name in ('first', 'second'):
+            settings.append({
+                'label': name,
+                'file': f'database/test_{name}.json',
+                'key_path': f'{name}.value',
+                'type': 'integer',
+                'default': 0,
+                'complex': False
+            })
+        return {'tabs': {'Tab1': {'groups': {'Group1': {'column': 1, 'settings': settings}}}}}
+
+    def test_apply_changes_in_process_pool(self):
+        """Test staging files in parallel worker processes."""
+        for name in ('first', 'second'):
+            with open(f'database/test_{name}.json', 'w', encoding='utf-8') as f:
+                json.dump({name: {'value': 0}}, f)
+        settings = {'first.value': 1, 'second.value': 2}
+
+        trace = Trace()
+        with mock.patch.object(self.batch_apply, '_configured_workers', return_value=2):
+            result = self.batch_apply.apply_changes(settings, self._two_file_schema(), trace=trace)
+
+        self.assertEqual(result['workers'], 2)
+        # Spans recorded in the worker processes are merged into the trace
+        self.assertTrue(any(event['pid'] != os.getpid() for event in trace.events
+                            if event['name'] == 'parse'))
+        self.assertTrue({'apply', 'organize', 'stage', 'parse', 'mutate', 'write', 'backup',
+                         'commit'} <= set(trace.totals()))
+        self.assertEqual(result['touched'], ['database/test_first.json', 'database/test_second.json'])
+        with open('database/test_first.json', 'r', encoding='utf-8') as f:
+            self.assertEqual(json.load(f), {'first': {'value': 1}})
+        with open('database/test_second.json', 'r', encoding='utf-8') as f:
+            self.assertEqual(json.load(f), {'second': {'value': 2}})
+
+        # Both previous versions are recorded in a single backup snapshot
+        snapshots = self.batch_apply.backup_store.list_snapshots()
+        self.assertEqual(len(snapshots), 1)
+        self.assertEqual(sorted(snapshots[0]['files']),
+                         ['database/test_first.json', 'database/test_second.json'])
+
+    def test_apply_changes_dry_run(self):
+        """Test that a dry run reports touched files without modifying them."""
+        with open('database/test_first.json', 'w', encoding='utf-8') as f:
+            json.dump({'first': {'value': 0}}, f)
+        with open('database/test_second.json', 'w', encoding='utf-8') as f:
+            json.dump({'second': {'value': 2}}, f)
+        settings = {'first.value': 1, 'second.value': 2}
+
+        with mock.patch.object(self.batch_apply.safe_writer, 'create_temp') as create_temp:
+            result = self.batch_apply.apply_changes(settings, self._two_file_schema(),
+                                                    dry_run=True)
+        create_temp.assert_not_called()
+
+        self.assertEqual(result['touched'], ['database/test_first.json'])
+        self.assertEqual(result['skipped'], ['database/test_second.json'])
+        self.assertEqual(result['values'], 1)
+        self.assertEqual(result['files']['database/test_first.json']['changes'],
+                         [('first.value', True, 0, 1)])
+        with open('database/test_first.json', 'r', encoding='utf-8') as f:
+            self.assertEqual(json.load(f), {'first': {'value': 0}})
+        self.assertEqual([name for name in os.listdir('database') if name.endswith('.tmp')], [])
+
+    def test_preview_changes(self):
+        """Test that a preview lists old and new values and bulk counts without writing."""
+        items_path = 'database/test_preview.json'
+        items = {
+            'ammo1': {'_parent': '5485a8684bdc2da71d8b4567', '_props': {'StackMaxSize': 10}},
+            'ammo2': {'_parent': '5485a8684bdc2da71d8b4567', '_props': {'StackMaxSize': 75}},
+            'other': {'_parent': 'some_other_parent', '_props': {'StackMaxSize': 30}}
+        }
+        with open(items_path, 'w', encoding='utf-8') as f:
+            json.dump(items, f)
+        with open('database/test_second.json', 'w', encoding='utf-8') as f:
+            json.dump({'second': {'value': 2}}, f)
+        schema = self._two_file_schema()
+        schema['tabs']['Tab1']['groups']['Group1']['settings'].extend([
+            {'label': 'Ammo Stack Size', 'file': items_path, 'key_path': '_props.StackMaxSize',
+             'type': 'integer', 'default': 10, 'complex': True},
+            {'label': 'Other Stack Size', 'file': items_path,
+             'key_path': 'other._props.StackMaxSize', 'type': 'integer', 'default': 30,
+             'complex': False}
+        ])
+        settings = {'second.value': 2, '_props.StackMaxSize': '75',
+                    'other._props.StackMaxSize': 40}
+        modified = os.stat(items_path).st_mtime_ns
+
+        with mock.patch.object(self.batch_apply, 'write_document') as write:
+            preview = self.batch_apply.preview_changes(settings, schema)
+
+        self.assertEqual(write.call_count, 0)
+        self.assertEqual(os.stat(items_path).st_mtime_ns, modified)
+        self.assertEqual(list(preview['files']), [items_path])
+        self.assertEqual(preview['unchanged'], ['database/test_second.json'])
+        file_plan = preview['files'][items_path]
+        self.assertEqual(file_plan['changes'], [('other._props.StackMaxSize', True, 30, 40)])
+        self.assertEqual(file_plan['bulk'], [{'key_path': '_props.StackMaxSize',
+                                              'label': 'Ammo Stack Size', 'value': 75,
+                                              'records': 1}])
+        self.assertEqual(preview['values'], 2)
+
+        # The cached document was not modified, and the estimate matches the applied file
+        self.assertEqual(self.batch_apply.document_cache.load(items_path), items)
+        result = self.batch_apply.apply_changes(settings, schema)
+        self.assertEqual(result['touched'], [items_path])
+        self.assertEqual(preview['bytes'], os.path.getsize(items_path))
+        os.remove(items_path)
+
+    def test_preview_tells_null_from_missing(self):
+        """Test that a preview shows an old JSON null as null and only absent keys as missing."""
+        null_path = 'database/test_null.json'
+        with open(null_path, 'w', encoding='utf-8') as f:
+            json.dump({'name': None}, f)
+        schema = {'tabs': {'Tab1': {'groups': {'Group1': {'column': 1, 'settings': [
+            {'label': key_path, 'file': null_path, 'key_path': key_path, 'type': 'string',
+             'default': None, 'complex': False} for key_path in ('name', 'title')
+        ]}}}}}
+
+        preview = self.batch_apply.preview_changes({'name': 'a', 'title': 'b'}, schema)
+
+        self.assertEqual(preview['files'][null_path]['changes'],
+                         [('name', True, None, 'a'), ('title', False, None, 'b')])
+        self.assertEqual(preview_rows(preview)[0][1],
+                         [('name', 'null', '"a"'), ('title', '(missing)', '"b"')])
+        os.remove(null_path)
+
+    def test_failed_commit_rolls_back(self):
+        """Test that files replaced before a failing replace are put back, with or without backups."""
+        commit = self.batch_apply.safe_writer.commit
+
+        def fail_second(temp_path, file_path):
+            if file_path.endswith('test_second.json'):
+                raise PermissionError(f"File is locked: {file_path}")
+            commit(temp_path, file_path)
+
+        for backup_store in (self.batch_apply.backup_store, None):
+            self.batch_apply.backup_store = backup_store
+            for name in ('first', 'second'):
+                with open(f'database/test_{name}.json', 'w', encoding='utf-8') as f:
+                    json.dump({name: {'value': 0}}, f)
+            with mock.patch.object(self.batch_apply.safe_writer, 'commit',
+                                   side_effect=fail_second):
+                with self.assertRaises(PermissionError):
+                    self.batch_apply.apply_changes({'first.value': 1, 'second.value': 2},
+                                                   self._two_file_schema())
+
+            for name in ('first', 'second'):
+                with open(f'database/test_{name}.json', 'r', encoding='utf-8') as f:
+                    self.assertEqual(json.load(f), {name: {'value': 0}})
+            self.assertEqual([name for name in os.listdir('database') if name.endswith('.tmp')],
+                             [])
+        # The rolled back files are applied again on the next attempt
+        result = self.batch_apply.apply_changes({'first.value': 1, 'second.value': 2},
+                                                self._two_file_schema())
+        self.assertEqual(result['touched'], ['database/test_first.json',
+                                             'database/test_second.json'])
+
+    def test_apply_changes_is_all_or_nothing(self):
+        """Test that a failing file leaves every other file untouched."""
+        with open('database/test_first.json', 'w', encoding='utf-8') as f:
+            json.dump({'first': {'value': 0}}, f)
+        with open('database/test_second.json', 'w', encoding='utf-8') as f:
+            f.write('{not json')
+        settings = {'first.value': 1, 'second.value': 2}
+
+        with self.assertRaises(json.JSONDecodeError):
+            self.batch_apply.apply_changes(settings, self._two_file_schema())
+
+        with open('database/test_first.json', 'r', encoding='utf-8') as f:
+            self.assertEqual(json.load(f), {'first': {'value': 0}})
+        self.assertEqual([name for name in os.listdir('database') if name.endswith('.tmp')], [])
+
+    def test_apply_changes_validates_before_loading(self):
+        """Test that values are coerced to their types and invalid values rejected up front."""
+        for name in ('first', 'second'):
+            with open(f'database/test_{name}.json', 'w', encoding='utf-8') as f:
+                json.dump({name: {'value': 0}}, f)
+        schema = self._two_file_schema()
+        schema['tabs']['Tab1']['groups']['Group1']['settings'][1]['max'] = 10
+
+        with mock.patch.object(self.batch_apply.document_cache, 'load') as load:
+            with self.assertRaises(ValidationError) as context:
+                self.batch_apply.apply_changes({'first.value': 'abc', 'second.value': '11'}, schema)
+        load.assert_not_called()
+        self.assertEqual([error['id'] for error in context.exception.errors],
+                         ['first.value', 'second.value'])
+
+        self.batch_apply.apply_changes({'first.value': '5', 'second.value': ' 10 '}, schema)
+        with open('database/test_first.json', 'r', encoding='utf-8') as f:
+            self.assertEqual(json.load(f), {'first': {'value': 5}})
+        with open('database/test_second.json', 'r', encoding='utf-8') as f:
+            self.assertEqual(json.load(f), {'second': {'value': 10}})
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+import json
+from change_plan import ChangePlan, MISSING
+
+class TestChangePlan(unittest.TestCase):
+    """Test cases for the ChangePlan class."""
+
+    def setUp(self):
+        """Set up for each test."""
+        self.document = {'item': {'_props': {'StackMaxSize': 10, 'Name': 'round'}}, 'flag': 1}
+        self.plan = ChangePlan(self.document)
+
+    def test_assign_records_changes_without_modifying(self):
+        """Test that assignments are planned with their old values and the document is untouched."""
+        self.assertTrue(self.plan.assign(('item', '_props', 'StackMaxSize'), 60))
+        self.assertFalse(self.plan.assign(('item', '_props', 'Name'), 'round'))
+        self.assertTrue(self.plan.assign(('flag',), True))  # Same value, different type
+        self.assertTrue(self.plan.assign(('item', '_props', 'Weight'), 0.5))
+
+        self.assertEqual(self.plan.diff(('item', '_props', 'StackMaxSize')), (10, 60))
+        self.assertIsNone(self.plan.diff(('item', '_props', 'Name')))
+        self.assertEqual(self.plan.diff(('flag',)), (1, True))
+        self.assertEqual(self.plan.diff(('item', '_props', 'Weight')), (MISSING, 0.5))
+        self.assertEqual(self.document,
+                         {'item': {'_props': {'StackMaxSize': 10, 'Name': 'round'}}, 'flag': 1})
+
+    def test_later_assignments_see_planned_values(self):
+        """Test that repeated assignments keep the original old value and can cancel out."""
+        keys = ('item', '_props', 'StackMaxSize')
+        self.plan.assign(keys, 60)
+        self.assertEqual(self.plan.current(keys), 60)
+        self.assertFalse(self.plan.assign(keys, 60))
+        self.plan.assign(keys, 80)
+        self.assertEqual(self.plan.diff(keys), (10, 80))
+        self.plan.assign(keys, 10)
+        self.assertIsNone(self.plan.diff(keys))
+
+    def test_estimate_bytes(self):
+        """Test that the size estimate matches an in-place patch of the changed values."""
+        text = json.dumps(self.document)
+        self.plan.assign(('item', '_props', 'StackMaxSize'), 1000)
+        self.plan.assign(('item', '_props', 'Name'), 'long round')
+
+        self.document['item']['_props'].update({'StackMaxSize': 1000, 'Name': 'long round'})
+        self.assertEqual(self.plan.estimate_bytes(len(text)), len(json.dumps(self.document)))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import unittest
+import os
+import io
+import json
+import shutil
+from contextlib import redirect_stdout
+from logger_setup import LoggerSetup
+import cli
+
+class TestCli(unittest.TestCase):
+    """Test cases for the headless command-line interface."""
+
+    def setUp(self):
+        """Set up for each test."""
+        self.directory = 'test_cli'
+        os.makedirs(os.path.join(self.directory, 'database'), exist_ok=True)
+        os.makedirs(os.path.join(self.directory, 'configs'), exist_ok=True)
+        self.config_path = os.path.join(self.directory, 'config.json')
+        self.schema_path = os.path.join(self.directory, 'schema.json')
+        self.preset_path = os.path.join(self.directory, 'preset.json')
+        self.data_path = os.path.join(self.directory, 'database', 'data.json')
+        self.write(self.config_path, {
+            "paths": {
+                "server_database": os.path.join(self.directory, 'database'),
+                "server_config": os.path.join(self.directory, 'configs')
+            },
+            "logging": {"level": "INFO", "file": os.path.join(self.directory, 'test_app.log')}
+        })
+        setting = {
+            'label': 'Value',
+            'file': 'database/data.json',
+            'key_path': 'value',
+            'type': 'integer',
+            'default': 1,
+            'complex': False,
+            'ui_element': {'type': 'entry'}
+        }
+        self.write(self.schema_path, {
+            'tabs': {'Tab1': {'groups': {'Group1': {'column': 0, 'settings': [setting]}}}}
+        })
+        self.write(self.preset_path, {'value': {'label': 'Value', 'value': 5}})
+        self.write(self.data_path, {'value': 1})
+
+    def tearDown(self):
+        """Clean up after each test."""
+        LoggerSetup.close_handlers()
+        if os.path.exists(self.directory):
+            shutil.rmtree(self.directory)
+
+    @staticmethod
+    def write(path, data):
+        """Write a JSON document to a file."""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+
+    def run_cli(self, *extra):
+        """Run the apply command and return the exit code and parsed JSON output."""
+        output = io.StringIO()
+        with redirect_stdout(output):
+            code = cli.main(['apply', '--preset', self.preset_path, '--config', self.config_path,
+                             '--schema', self.schema_path, '--json', *extra])
+        return code, json.loads(output.getvalue())
+
+    def test_apply_preset(self):
+        """Test that a preset is applied and reported with timings."""
+        code, report = self.run_cli('--jobs', '1')
+
+        self.assertEqual(code, 0)
+        self.assertEqual(report['status'], 'ok')
+        self.assertEqual(report['touched'], ['database/data.json'])
+        self.assertEqual(set(report['timings']['database/data.json']), {'parse', 'mutate', 'write'})
+        with open(self.data_path, 'r', encoding='utf-8') as f:
+            self.assertEqual(json.load(f), {'value': 5})
+
+    def test_dry_run_leaves_files_untouched(self):
+        """Test that a dry run reports the changes without writing them."""
+        code, report = self.run_cli('--dry-run')
+
+        self.assertEqual(code, 0)
+        self.assertTrue(report['dry_run'])
+        self.assertEqual(report['touched'], ['database/data.json'])
+        self.assertEqual(report['files']['database/data.json']['changes'], [['value', True, 1, 5]])
+        with open(self.data_path, 'r', encoding='utf-8') as f:
+            self.assertEqual(json.load(f), {'value': 1})
+        self.assertEqual(os.listdir(os.path.join(self.directory, 'database')), ['data.json'])
+
+    def test_failure_exits_non_zero(self):
+        """Test that a failing apply and an invalid configuration exit with an error code."""
+        with open(self.data_path, 'w', encoding='utf-8') as f:
+            f.write('{not json')
+        code, report = self.run_cli()
+        self.assertEqual(code, 1)
+        self.assertEqual(report['status'], 'error')
+        self.assertEqual(report['error_type'], 'JSONDecodeError')
+
+        # Invalid values are rejected before the unreadable file is opened
+        self.write(self.preset_path, {'value': {'label': 'Value', 'value': 'abc'}})
+        code, report = self.run_cli()
+        self.assertEqual(code, 2)
+        self.assertEqual([error['id'] for error in report['errors']], ['value'])
+
+        # Presets that are valid JSON but not made of {"label", "value"} entries
+        for preset in ({'value': 5}, {'value': {'label': 'Value'}}, [1, 2]):
+            self.write(self.preset_path, preset)
+            code, report = self.run_cli()
+            self.assertEqual(code, 2)
+            self.assertIn('Invalid preset', report['error'])
+
+        os.remove(self.config_path)
+        code, report = self.run_cli()
+        self.assertEqual(code, 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,8 +2,8 @@ import unittest
 import os
 import json
 import shutil  # Import shutil for file and directory operations
-import tkinter as tk
 from complex_config_handler import ComplexConfigHandler
+from change_plan import ChangePlan
 from config_manager import ConfigManager
 
 class TestComplexConfigHandler(unittest.TestCase):
@@ -57,8 +57,7 @@ class TestComplexConfigHandler(unittest.TestCase):
 
     def test_update_ammo_stack_size(self):
         """Test updating the ammo stack size."""
-        settings = {'_props.StackMaxSize': tk.Entry()}
-        settings['_props.StackMaxSize'].insert(0, '50')
+        settings = {'_props.StackMaxSize': '50'}
         schema = {
             'tabs': {
                 'Tab1': {
@@ -89,5 +88,19 @@ class TestComplexConfigHandler(unittest.TestCase):
         self.assertEqual(data['item2']['_props']['StackMaxSize'], 50)
         self.assertEqual(data['item3']['_props']['StackMaxSize'], 30)
 
+    def test_plan_matches_apply(self):
+        """Test that planning and applying the stack size count the same changed records."""
+        data = {
+            'item1': {'_parent': '5485a8684bdc2da71d8b4567', '_props': {'StackMaxSize': 50.0}},
+            'item2': {'_parent': '5485a8684bdc2da71d8b4567', '_props': {'StackMaxSize': 50}},
+            'item3': {'_parent': '5485a8684bdc2da71d8b4567', '_props': {}}
+        }
+        change = {'key_path': '_props.StackMaxSize', 'value': '50', 'setting': {}}
+        planned = self.handler.plan_complex_change(data, change, ChangePlan(data))
+        applied = self.handler.apply_complex_change(data, change)
+        self.assertEqual((planned, applied), (2, 2))
+        self.assertEqual([type(data[item_id]['_props']['StackMaxSize']) for item_id in data],
+                         [int, int, int])
+
 if __name__ == '__main__':
     unittest.main()
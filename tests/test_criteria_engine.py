@@ -0,0 +1,77 @@
+import unittest
+from criteria_engine import CriteriaEngine
+from item_template_index import ItemTemplateIndex
+
+class TestCriteriaEngine(unittest.TestCase):
+    """Test cases for the CriteriaEngine class."""
+
+    def setUp(self):
+        """Set up for each test."""
+        self.data = {
+            'ammo': {'_parent': 'root', '_type': 'Node', '_props': {}},
+            'round1': {'_parent': 'ammo', '_type': 'Item', '_props': {'StackMaxSize': 60, 'Weight': 0.01}},
+            'round2': {'_parent': 'ammo', '_type': 'Item', '_props': {'StackMaxSize': 20, 'Weight': 0.5}},
+            'key1': {'_parent': 'keys', '_type': 'Item', '_props': {'StackMaxSize': 1, 'Weight': 0.05}}
+        }
+        self.index = ItemTemplateIndex(self.data)
+        self.engine = CriteriaEngine()
+
+    def test_select(self):
+        """Test selecting records by ancestor, type, props, ranges and ID lists."""
+        self.assertEqual(sorted(self.engine.select(self.data, {'ancestor': 'ammo', 'type': 'Item'}, self.index)),
+                         ['round1', 'round2'])
+        self.assertEqual(self.engine.select(self.data, {'props': {'StackMaxSize': 1}}, self.index), ['key1'])
+        self.assertEqual(sorted(self.engine.select(self.data, {'ranges': {'Weight': {'max': 0.1}}}, self.index)),
+                         ['key1', 'round1'])
+        self.assertEqual(self.engine.select(
+            self.data, {'parent': 'ammo', 'exclude_ids': ['round1']}, self.index), ['round2'])
+
+    def test_apply(self):
+        """Test applying a value to every matching record."""
+        updated = self.engine.apply(self.data, {'ancestor': 'ammo', 'type': 'Item'},
+                                    '_props.StackMaxSize', 100, self.index)
+        self.assertEqual(updated, 2)
+        self.assertEqual(self.data['round1']['_props']['StackMaxSize'], 100)
+        self.assertEqual(self.data['round2']['_props']['StackMaxSize'], 100)
+        self.assertEqual(self.data['key1']['_props']['StackMaxSize'], 1)
+
+    def test_apply_list_indices_and_types(self):
+        """Test that key paths through arrays are followed and equal values of another type are set."""
+        self.data['round1']['_props']['Slots'] = [{'max': 1}, {'max': 2}]
+        self.data['round2']['_props']['StackMaxSize'] = 100.0
+        self.data['round2']['_props']['Slots'] = [{'max': 5}]
+        updated = self.engine.apply(self.data, {'ancestor': 'ammo'}, '_props.Slots.0.max', 5,
+                                    self.index)
+        self.assertEqual(updated, 1)
+        self.assertEqual(self.data['round1']['_props']['Slots'], [{'max': 5}, {'max': 2}])
+        updated = self.engine.apply(self.data, {'ancestor': 'ammo'}, '_props.StackMaxSize', 100,
+                                    self.index)
+        self.assertEqual(updated, 2)
+        self.assertIs(type(self.data['round2']['_props']['StackMaxSize']), int)
+        with self.assertRaises(KeyError):
+            self.engine.apply(self.data, {'ancestor': 'ammo'}, '_props.Slots.1.max', 3, self.index)
+        with self.assertRaises(KeyError):
+            self.engine.apply(self.data, {'ancestor': 'ammo'}, '_props.Weight.max', 3, self.index)
+
+    def test_props_match_types(self):
+        """Test that props criteria only match values of the same type, with or without the index."""
+        self.data['key2'] = {'_parent': 'keys', '_type': 'Item', '_props': {'StackMaxSize': True}}
+        self.data['key3'] = {'_parent': 'keys', '_type': 'Item', '_props': {'StackMaxSize': 1.0}}
+        self.index = ItemTemplateIndex(self.data)
+        self.assertEqual(self.engine.select(self.data, {'props': {'StackMaxSize': 1}}, self.index),
+                         ['key1'])
+        self.assertEqual(self.engine.select(self.data, {'props': {'StackMaxSize': True}},
+                                            self.index), ['key2'])
+        self.assertEqual(self.engine.select(
+            self.data, {'ids': ['key1', 'key2', 'key3'], 'props': {'StackMaxSize': 1.0}},
+            self.index), ['key3'])
+
+    def test_compile_is_cached(self):
+        """Test that equal criteria reuse the compiled predicate and unknown keys are rejected."""
+        first = self.engine.compile({'parent': 'ammo', 'type': 'Item'})
+        self.assertIs(first, self.engine.compile({'type': 'Item', 'parent': 'ammo'}))
+        with self.assertRaises(ValueError):
+            self.engine.compile({'colour': 'red'})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+import os
+import json
+from document_cache import DocumentCache, MEMORY_FACTOR
+
+class TestDocumentCache(unittest.TestCase):
+    """Test cases for the DocumentCache class."""
+
+    def setUp(self):
+        """Set up for each test."""
+        self.first_path = 'test_cache_first.json'
+        self.second_path = 'test_cache_second.json'
+        for path in (self.first_path, self.second_path):
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump({'value': 1}, f)
+        self.cache = DocumentCache()
+
+    def tearDown(self):
+        """Clean up after each test."""
+        for path in (self.first_path, self.second_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_hits_and_misses(self):
+        """Test that unchanged files are served from the cache."""
+        first = self.cache.load(self.first_path)
+        second = self.cache.load(self.first_path)
+        self.assertIs(first, second)
+        self.assertEqual(self.cache.stats()['hits'], 1)
+        self.assertEqual(self.cache.stats()['misses'], 1)
+
+    def test_changed_file_is_reparsed(self):
+        """Test that a change to the file's size or mtime invalidates the entry."""
+        self.cache.load(self.first_path)
+        with open(self.first_path, 'w', encoding='utf-8') as f:
+            json.dump({'value': 12345}, f)
+        self.assertEqual(self.cache.load(self.first_path), {'value': 12345})
+        self.assertEqual(self.cache.stats()['misses'], 2)
+
+    def test_verify_hash_detects_same_size_edit(self):
+        """Test that the optional content hash catches edits that keep mtime and size."""
+        cache = DocumentCache(verify_hash=True)
+        cache.load(self.first_path)
+        stat = os.stat(self.first_path)
+        with open(self.first_path, 'w', encoding='utf-8') as f:
+            json.dump({'value': 2}, f)
+        os.utime(self.first_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        self.assertEqual(cache.load(self.first_path), {'value': 2})
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted beyond the memory budget."""
+        size = os.path.getsize(self.first_path)
+        cache = DocumentCache(max_bytes=size * MEMORY_FACTOR)
+        cache.load(self.first_path)
+        cache.load(self.second_path)
+        self.assertEqual(cache.stats()['entries'], 1)
+        cache.load(self.second_path)
+        cache.load(self.first_path)
+        self.assertEqual(cache.stats()['hits'], 1)
+        self.assertEqual(cache.stats()['misses'], 3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+import unittest
+import copy
+import os
+import json
+import shutil
+from config_manager import ConfigManager
+from fleet_apply import FleetApply, load_server_profiles, format_result_table
+
+class TestFleetApply(unittest.TestCase):
+    """Test cases for the FleetApply class."""
+
+    def setUp(self):
+        """Set up for each test."""
+        self.directory = 'test_fleet_apply'
+        self.servers = ('alpha', 'beta', 'gamma')
+        for name in self.servers:
+            os.makedirs(os.path.join(self.directory, name, 'database'), exist_ok=True)
+            os.makedirs(os.path.join(self.directory, name, 'configs'), exist_ok=True)
+            self.write(self.data_path(name), {'value': 1})
+        self.config_path = os.path.join(self.directory, 'config.json')
+        self.schema_path = os.path.join(self.directory, 'schema.json')
+        self.write(self.config_path, {
+            'paths': {'server_database': 'unused', 'server_config': 'unused'},
+            'servers': [
+                {
+                    'name': name,
+                    'server_database': os.path.join(self.directory, name, 'database'),
+                    'server_config': os.path.join(self.directory, name, 'configs')
+                }
+                for name in self.servers + ('missing',)
+            ],
+            'backup': {'directory': os.path.join(self.directory, 'backup')},
+            'apply': {'server_workers': 2}
+        })
+        self.schema = {'tabs': {'Tab1': {'groups': {'Group1': {'column': 0, 'settings': [{
+            'label': 'Value',
+            'file': 'database/data.json',
+            'key_path': 'value',
+            'type': 'integer',
+            'default': 1,
+            'complex': False
+        }]}}}}}
+        self.write(self.schema_path, self.schema)
+        self.config_manager = ConfigManager(self.config_path, self.schema_path)
+
+    def tearDown(self):
+        """Clean up after each test."""
+        if os.path.exists(self.directory):
+            shutil.rmtree(self.directory)
+
+    def data_path(self, name):
+        """Return the path of a server's data file."""
+        return os.path.join(self.directory, name, 'database', 'data.json')
+
+    @staticmethod
+    def write(path, data):
+        """Write a JSON document to a file."""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+
+    def test_apply_to_all_servers(self):
+        """Test that every server is applied to and a failing server does not stop the others."""
+        fleet_apply = FleetApply(self.config_manager)
+        result = fleet_apply.apply({'value': 7}, self.schema)
+
+        self.assertEqual([row['server'] for row in result['servers']],
+                         ['alpha', 'beta', 'gamma', 'missing'])
+        self.assertEqual([row['status'] for row in result['servers']], ['ok', 'ok', 'ok', 'error'])
+        self.assertEqual(result['servers'][3]['error_type'], 'FileNotFoundError')
+        self.assertEqual(result['aggregate']['succeeded'], 3)
+        self.assertEqual(result['aggregate']['files_touched'], 3)
+        for name in self.servers:
+            with open(self.data_path(name), 'r', encoding='utf-8') as f:
+                self.assertEqual(json.load(f), {'value': 7})
+        # Every server has its own snapshot; identical previous versions are stored once
+        for name in self.servers:
+            backup_store = fleet_apply.batch_applies[name].backup_store
+            self.assertEqual(len(backup_store.list_snapshots()), 1)
+        self.assertEqual(fleet_apply.backup_store.list_snapshots(), [])
+        objects = os.path.join(self.directory, 'backup', 'objects')
+        self.assertEqual(sum(len(files) for _, _, files in os.walk(objects)), 1)
+        self.assertIn('3/4 server(s) succeeded', format_result_table(result))
+
+    def test_prune_keeps_other_servers_snapshots(self):
+        """Test that the snapshot limit is applied to each server on its own."""
+        self.config_manager.config = copy.deepcopy(self.config_manager.config)
+        self.config_manager.config['backup']['max_snapshots'] = 1
+        fleet_apply = FleetApply(self.config_manager)
+        fleet_apply.apply({'value': 2}, self.schema, ['alpha', 'beta'])
+        for value in (3, 4):
+            fleet_apply.apply({'value': value}, self.schema, ['alpha'])
+
+        alpha = fleet_apply.batch_applies['alpha'].backup_store.list_snapshots()
+        beta = fleet_apply.batch_applies['beta'].backup_store.list_snapshots()
+        self.assertEqual(len(alpha), 1)
+        self.assertEqual(len(beta), 1)
+        # beta's only restore point, and the object it refers to, survive alpha's pruning
+        fleet_apply.batch_applies['beta'].backup_store.restore(beta[0]['id'])
+        with open(self.data_path('beta'), 'r', encoding='utf-8') as f:
+            self.assertEqual(json.load(f), {'value': 1})
+
+    def test_selected_servers_and_profiles(self):
+        """Test applying to selected servers and validating profiles."""
+        fleet_apply = FleetApply(self.config_manager)
+        result = fleet_apply.apply({'value': 3}, self.schema, ['beta'], dry_run=True)
+        self.assertEqual(result['servers'][0]['touched'], ['database/data.json'])
+        with open(self.data_path('beta'), 'r', encoding='utf-8') as f:
+            self.assertEqual(json.load(f), {'value': 1})
+        with self.assertRaises(KeyError):
+            fleet_apply.apply({'value': 3}, self.schema, ['unknown'])
+
+        # The loaded configuration is shared through the document cache; change a copy
+        self.config_manager.config = copy.deepcopy(self.config_manager.config)
+        self.config_manager.config['servers'].append({'name': 'alpha'})
+        with self.assertRaises(ValueError):
+            load_server_profiles(self.config_manager)
+        del self.config_manager.config['servers']
+        self.assertEqual([profile['name'] for profile in load_server_profiles(self.config_manager)],
+                         ['default'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+import unittest
+from item_template_index import ItemTemplateIndex, AMMO_CATEGORY_ID
+
+class TestItemTemplateIndex(unittest.TestCase):
+    """Test cases for the ItemTemplateIndex class."""
+
+    def setUp(self):
+        """Set up for each test."""
+        self.items = {
+            AMMO_CATEGORY_ID: {'_parent': 'root', '_type': 'Node', '_props': {}},
+            'ammo_box': {'_parent': AMMO_CATEGORY_ID, '_type': 'Node', '_props': {}},
+            'round1': {'_parent': AMMO_CATEGORY_ID, '_type': 'Item', '_props': {'StackMaxSize': 60}},
+            'round2': {'_parent': 'ammo_box', '_type': 'Item', '_props': {'StackMaxSize': 20}},
+            'key1': {'_parent': 'keys', '_type': 'Item', '_props': {'MaximumNumberOfUsage': 10}}
+        }
+        self.index = ItemTemplateIndex(self.items)
+
+    def test_get_children(self):
+        """Test direct parent to child lookups."""
+        self.assertEqual(sorted(self.index.get_children(AMMO_CATEGORY_ID)), ['ammo_box', 'round1'])
+        self.assertEqual(self.index.get_children('missing'), [])
+
+    def test_ancestors_and_descendants(self):
+        """Test transitive ancestor and descendant resolution across nested categories."""
+        self.assertEqual(self.index.get_ancestors('round2'), ('ammo_box', AMMO_CATEGORY_ID, 'root'))
+        self.assertTrue(self.index.is_descendant_of('round2', AMMO_CATEGORY_ID))
+        self.assertFalse(self.index.is_descendant_of('key1', AMMO_CATEGORY_ID))
+        self.assertEqual(sorted(self.index.get_descendant_items(AMMO_CATEGORY_ID)), ['round1', 'round2'])
+
+    def test_prop_lookups(self):
+        """Test _props field lookups."""
+        self.assertEqual(self.index.get_prop('round1', 'StackMaxSize'), 60)
+        self.assertIsNone(self.index.get_prop('missing', 'StackMaxSize'))
+        self.assertEqual(self.index.find_by_prop('StackMaxSize', 20), ['round2'])
+        self.assertEqual(self.index.find_by_prop('StackMaxSize', 20.0), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+import io
+import json
+from json_patcher import JsonPatcher
+
+class TestJsonPatcher(unittest.TestCase):
+    """Test cases for the JsonPatcher class."""
+
+    def setUp(self):
+        """Set up for each test."""
+        self.document = {
+            'item1': {'_props': {'StackMaxSize': 10, 'Name': 'round "one"'}},
+            'item2': {'_props': {'StackMaxSize': 20}, 'tags': [1, 2, {'deep': False}]},
+            'other': {'nested': {'values': [1, 2, 3]}}
+        }
+        self.text = json.dumps(self.document, ensure_ascii=False, indent=4)
+        self.patcher = JsonPatcher(self.text)
+
+    def test_patch_scalars_in_place(self):
+        """Test that scalar values are spliced in without touching the rest of the text."""
+        assignments = {
+            ('item1', '_props', 'StackMaxSize'): 100,
+            ('item1', '_props', 'Name'): 'round one',
+            ('item2', 'tags', 2, 'deep'): True
+        }
+        patched = self.patcher.patch(assignments)
+
+        expected = json.loads(self.text)
+        expected['item1']['_props']['StackMaxSize'] = 100
+        expected['item1']['_props']['Name'] = 'round one'
+        expected['item2']['tags'][2]['deep'] = True
+        self.assertEqual(patched, json.dumps(expected, ensure_ascii=False, indent=4))
+
+    def test_write_streams_to_file(self):
+        """Test that write() streams the same text that patch() returns."""
+        assignments = {('item2', '_props', 'StackMaxSize'): 5}
+        out = io.StringIO()
+        written = self.patcher.write(out, self.patcher.plan(assignments))
+        self.assertEqual(out.getvalue(), self.patcher.patch(assignments))
+        self.assertEqual(written, len(out.getvalue()))
+
+    def test_structure_change_falls_back(self):
+        """Test that missing paths and container values cannot be patched."""
+        self.assertIsNone(self.patcher.plan({('item1', '_props', 'Missing'): 1}))
+        self.assertIsNone(self.patcher.plan({('other', 'nested'): 1}))
+        self.assertIsNone(self.patcher.plan({('item1', '_props', 'StackMaxSize'): [1]}))
+
+if __name__ == '__main__':
+    unittest.main()
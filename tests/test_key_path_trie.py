@@ -0,0 +1,105 @@
+import unittest
+from key_path_trie import KeyPathTrie, assign, lookup, parse_key_path, same_value
+
+class TestKeyPathTrie(unittest.TestCase):
+    """Test cases for the KeyPathTrie class."""
+
+    def test_read_shared_prefixes(self):
+        """Test reading every key path of a trie in one traversal."""
+        trie = KeyPathTrie([
+            (('difficulty', 'normal', 'Core', 'VisibleAngle'), 'angle'),
+            (('difficulty', 'normal', 'Core', 'VisibleDistance'), 'distance'),
+            (('difficulty', 'normal', 'Core', 'VisibleDistance'), 'distance_copy'),
+            (('difficulty', 'hard', 'Core', 'VisibleAngle'), 'hard_angle'),
+            (('enabled',), 'enabled')
+        ])
+        data = {
+            'difficulty': {'normal': {'Core': {'VisibleAngle': 160, 'VisibleDistance': 142.5}},
+                           'hard': 'not an object'},
+            'enabled': False
+        }
+
+        self.assertEqual(trie.size, 5)
+        self.assertEqual(trie.read(data), {'angle': 160, 'distance': 142.5,
+                                           'distance_copy': 142.5, 'enabled': False})
+
+    def test_missing_and_empty_paths(self):
+        """Test that missing key paths are left out and empty ones are rejected."""
+        trie = KeyPathTrie([(('a', 'b'), 'ab'), (('a', 'c'), 'ac')])
+
+        self.assertEqual(trie.read({'a': {'c': None}}), {'ac': None})
+        self.assertEqual(trie.read({}), {})
+        self.assertEqual(trie.read([1, 2]), {})
+        with self.assertRaises(ValueError):
+            trie.add((), 'root')
+
+    def test_parse_key_path(self):
+        """Test splitting key paths with escaped dots and backslashes."""
+        self.assertEqual(parse_key_path('a.b.0'), ('a', 'b', '0'))
+        self.assertEqual(parse_key_path('filters\\.json.enabled'), ('filters.json', 'enabled'))
+        self.assertEqual(parse_key_path('back\\\\slash.x'), ('back\\slash', 'x'))
+        for invalid in ('', 'a..b', 'a.', 'a\\b', 'a\\'):
+            with self.assertRaises(ValueError):
+                parse_key_path(invalid)
+
+    def test_list_indices(self):
+        """Test reading and writing array elements through digit keys."""
+        data = {'chances': [{'weight': 1}, {'weight': 2}], '0': {'weight': 3}}
+        trie = KeyPathTrie([(('chances', '1', 'weight'), 'second'), (('0', 'weight'), 'key'),
+                            (('chances', '0'), 'first')])
+
+        self.assertEqual(lookup(data, ('chances', '1', 'weight')), 2)
+        self.assertIsNone(lookup(data, ('chances', '2', 'weight')))
+        self.assertEqual(trie.read(data), {'second': 2, 'key': 3, 'first': {'weight': 1}})
+
+        assignments = {}
+        self.assertEqual(trie.apply(data, {'second': 5, 'key': 3}, assignments), 1)
+        self.assertEqual(data['chances'][1]['weight'], 5)
+        self.assertEqual(assignments, {('chances', '1', 'weight'): 5})
+
+        with self.assertRaises(KeyError):
+            KeyPathTrie([(('chances', '2', 'weight'), 'third')]).apply(data, {'third': 1})
+        with self.assertRaises(KeyError):
+            KeyPathTrie([(('chances', '5'), 'sixth')]).apply(data, {'sixth': 1})
+
+    def test_apply_in_one_pass(self):
+        """Test assigning values, creating objects only on paths that get a value."""
+        data = {'appearance': {'body': {'a': 1, 'b': 2}}, 'flag': 1, 'name': 'x'}
+        trie = KeyPathTrie([
+            (('appearance', 'body', 'a'), 'a'),
+            (('appearance', 'body', 'b'), 'b'),
+            (('appearance', 'head', 'c'), 'c'),
+            (('missing', 'd'), 'd'),
+            (('flag',), 'flag'),
+            (('flag',), 'flag_copy')
+        ])
+        assignments = {}
+
+        changed = trie.apply(data, {'a': 1, 'b': 3, 'c': 4, 'flag': True, 'flag_copy': 2},
+                             assignments)
+        self.assertEqual(changed, 4)
+        self.assertEqual(data, {'appearance': {'body': {'a': 1, 'b': 3}, 'head': {'c': 4}},
+                                'flag': 2, 'name': 'x'})
+        # Equal values of another type are assigned; the later target of a path wins
+        self.assertEqual(assignments, {('appearance', 'body', 'b'): 3,
+                                       ('appearance', 'head', 'c'): 4, ('flag',): 2})
+
+        with self.assertRaises(KeyError):
+            KeyPathTrie([(('name', 'first'), 'first')]).apply(data, {'first': 'y'})
+
+    def test_assign_and_same_value(self):
+        """Test assigning a single key path and comparing values by type."""
+        self.assertTrue(same_value(60, 60))
+        self.assertFalse(same_value(60, 60.0))
+        self.assertFalse(same_value(1, True))
+        data = {'slots': [{'max': 1}], 'weight': 0.5}
+        self.assertTrue(assign(data, ('slots', '0', 'max'), 2))
+        self.assertFalse(assign(data, ('slots', '0', 'max'), 2))
+        self.assertTrue(assign(data, ('new', 'nested'), 1))
+        self.assertEqual(data, {'slots': [{'max': 2}], 'weight': 0.5, 'new': {'nested': 1}})
+        for keys in (('slots', '1', 'max'), ('weight', 'max'), ('slots', 'first')):
+            with self.assertRaises(KeyError):
+                assign(data, keys, 3)
+
+if __name__ == '__main__':
+    unittest.main()
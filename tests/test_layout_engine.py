@@ -0,0 +1,71 @@
+import unittest
+import json
+from layout_engine import compute_layout, INLINE_COLUMN
+
+def _setting(name, **ui_element):
+    """Return a schema setting with an entry UI element."""
+    return {'label': name, 'key_path': name, 'file': 'configs/core.json',
+            'ui_element': {'type': 'entry', **ui_element}}
+
+class TestLayoutEngine(unittest.TestCase):
+    """Test cases for the layout_engine module."""
+
+    def test_group_rows_per_column(self):
+        """Test that groups stack per tab column in schema order."""
+        schema = {'tabs': {'Tab1': {'groups': {
+            'A': {'column': 1, 'settings': []},
+            'B': {'column': 2, 'settings': []},
+            'C': {'column': 1, 'settings': []}
+        }}}}
+        groups = compute_layout(schema)['Tab1']
+
+        self.assertEqual([(group['name'], group['row'], group['column']) for group in groups],
+                         [('A', 0, 1), ('B', 0, 2), ('C', 1, 1)])
+
+    def test_setting_placement(self):
+        """Test the grid positions of labels and widgets, including inline settings."""
+        settings = [
+            _setting('first'),
+            _setting('second', top_label_visible=True, top_label='Second', left_label_visible=False),
+            _setting('inline', inline_with_previous=True),
+            _setting('checkbox', type='checkbox', left_label_sticky='e')
+        ]
+        schema = {'tabs': {'Tab1': {'groups': {'A': {'column': 1, 'settings': settings}}}}}
+        group = compute_layout(schema)['Tab1'][0]
+        first, second, inline, checkbox = group['settings']
+
+        self.assertIsNone(first['top_label'])
+        self.assertEqual((first['left_label']['row'], first['left_label']['column']), (0, 0))
+        self.assertEqual((first['widget']['row'], first['widget']['column']), (0, 1))
+
+        self.assertEqual(second['top_label']['text'], 'Second')
+        self.assertEqual((second['top_label']['row'], second['top_label']['columnspan']), (2, 2))
+        self.assertIsNone(second['left_label'])
+        self.assertEqual((second['widget']['row'], second['widget']['column']), (3, 0))
+
+        # Shares the logical row of the previous setting, to its right
+        self.assertEqual((inline['widget']['row'], inline['widget']['column']),
+                         (2, INLINE_COLUMN + 1))
+
+        self.assertEqual(checkbox['left_label']['sticky'], 'e')
+        self.assertEqual((checkbox['widget']['row'], checkbox['widget']['sticky']), (4, 'w'))
+        self.assertEqual(group['weighted_columns'], [0, 1, 2, 3])
+
+    def test_layout_of_shipped_schema_has_no_overlaps(self):
+        """Test that no two widgets of the shipped schema share a grid cell."""
+        with open('config_schema.json', 'r', encoding='utf-8') as f:
+            schema = json.load(f)
+        for groups in compute_layout(schema).values():
+            for group in groups:
+                cells = set()
+                for placement in group['settings']:
+                    for options in (placement['top_label'], placement['left_label'],
+                                    placement['widget']):
+                        if options is None:
+                            continue
+                        cell = (options['row'], options['column'])
+                        self.assertNotIn(cell, cells)
+                        cells.add(cell)
+
+if __name__ == '__main__':
+    unittest.main()
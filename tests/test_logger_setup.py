@@ -1,8 +1,9 @@
 import unittest
 import logging
+import logging.handlers
 import os
 from config_manager import ConfigManager
-from logger_setup import LoggerSetup
+from logger_setup import LoggerSetup, BulkLog, TRACE
 
 class TestLoggerSetup(unittest.TestCase):
     """Test cases for the LoggerSetup class."""
@@ -51,23 +52,42 @@ class TestLoggerSetup(unittest.TestCase):
     def test_logging_setup(self):
         """Test logging setup."""
         logger = logging.getLogger()  # Get the root logger
-        log_file_handler = None
+        queue_handler = None
         for handler in logger.handlers:
-            if isinstance(handler, logging.FileHandler):
-                log_file_handler = handler
+            if isinstance(handler, logging.handlers.QueueHandler):
+                queue_handler = handler
                 break
 
-        self.assertIsNotNone(log_file_handler, "FileHandler not found in logger.handlers")
+        self.assertIsNotNone(queue_handler, "QueueHandler not found in logger.handlers")
 
         logger.info('This is a test log message')
 
-        # Ensure all handlers flush their buffers
-        for handler in logger.handlers:
-            handler.flush()
+        # Wait until the listener thread has written all queued records
+        LoggerSetup.flush()
 
         with open('test_app.log', 'r', encoding='utf-8') as f:
             log_content = f.read()
         self.assertIn('This is a test log message', log_content)
 
+    def test_bulk_log_summary_and_trace_level(self):
+        """Test that bulk mutations log one summary line, and every record only at TRACE."""
+        logger = logging.getLogger()
+        logger.setLevel(logging.DEBUG)
+        bulk_log = BulkLog("Set %s to %s", 'StackMaxSize', 60, sample_size=2)
+        for record_id in ('a', 'b', 'c'):
+            bulk_log.add(record_id)
+        bulk_log.log()
+
+        logger.setLevel(TRACE)
+        bulk_log = BulkLog("Set %s to %s", 'Weight', 1)
+        bulk_log.add('traced')
+        LoggerSetup.flush()
+
+        with open('test_app.log', 'r', encoding='utf-8') as f:
+            log_content = f.read()
+        self.assertIn('Set StackMaxSize to 60 on 3 record(s), e.g. a, b, ...', log_content)
+        self.assertNotIn('StackMaxSize to 60 on a', log_content)
+        self.assertIn('TRACE - Set Weight to 1 on traced', log_content)
+
 if __name__ == '__main__':
     unittest.main()
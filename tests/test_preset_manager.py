@@ -45,5 +45,32 @@ class TestPresetManager(unittest.TestCase):
         loaded_changes = self.preset_manager.load_preset(preset_path)
         self.assertEqual(changes, loaded_changes)
 
+    def test_save_preset_labels_by_setting_id(self):
+        """Test that saved values are labelled by setting ID, also for settings sharing a key path."""
+        schema_path = 'test_preset_schema.json'
+        with open(schema_path, 'w', encoding='utf-8') as f:
+            json.dump({'tabs': {'Tab1': {'groups': {'Group1': {'column': 1, 'settings': [
+                {'id': 'keys_examined', 'label': 'Keys Examined', 'file': 'configs/a.json',
+                 'key_path': 'spot', 'type': 'boolean', 'default': False},
+                {'id': 'price', 'label': 'Price', 'file': 'configs/a.json', 'key_path': 'spot',
+                 'type': 'float', 'default': 1.0},
+                {'label': 'Plain', 'file': 'configs/a.json', 'key_path': 'plain.value',
+                 'type': 'integer', 'default': 1}
+            ]}}}}}, f)
+        try:
+            preset_manager = PresetManager(self.preset_directory, schema_path)
+            preset_path = os.path.join(self.preset_directory, 'test_labels.json')
+            preset_manager.save_preset(preset_path, {'keys_examined': True, 'price': 2.0,
+                                                     'plain.value': 3})
+            with open(preset_path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+        finally:
+            os.remove(schema_path)
+        self.assertEqual(saved, {
+            'keys_examined': {'label': 'Keys Examined', 'value': True},
+            'price': {'label': 'Price', 'value': 2.0},
+            'plain.value': {'label': 'Plain', 'value': 3}
+        })
+
 if __name__ == '__main__':
     unittest.main()
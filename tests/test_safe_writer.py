@@ -0,0 +1,44 @@
+import unittest
+import os
+import shutil
+from safe_writer import SafeWriter
+
+class TestSafeWriter(unittest.TestCase):
+    """Test cases for the SafeWriter class."""
+
+    def setUp(self):
+        """Set up for each test."""
+        self.directory = 'test_safe_writer'
+        os.makedirs(self.directory, exist_ok=True)
+        self.file_path = os.path.join(self.directory, 'data.json')
+        with open(self.file_path, 'w', encoding='utf-8') as f:
+            f.write('{"value": 1}')
+
+    def tearDown(self):
+        """Clean up after each test."""
+        if os.path.exists(self.directory):
+            shutil.rmtree(self.directory)
+
+    def test_write_text_replaces_file(self):
+        """Test that the new content replaces the file and no temporary files remain."""
+        os.chmod(self.file_path, 0o644)
+        writer = SafeWriter()
+        writer.write_text(self.file_path, '{"value": 2}')
+
+        with open(self.file_path, 'r', encoding='utf-8') as f:
+            self.assertEqual(f.read(), '{"value": 2}')
+        self.assertEqual(os.stat(self.file_path).st_mode & 0o777, 0o644)
+        self.assertEqual(os.listdir(self.directory), ['data.json'])
+
+    def test_failed_write_leaves_target_untouched(self):
+        """Test that an error while writing removes the temporary file and keeps the target."""
+        writer = SafeWriter()
+        with self.assertRaises(TypeError):
+            writer.write_text(self.file_path, None)
+
+        with open(self.file_path, 'r', encoding='utf-8') as f:
+            self.assertEqual(f.read(), '{"value": 1}')
+        self.assertEqual(os.listdir(self.directory), ['data.json'])
+
+if __name__ == '__main__':
+    unittest.main()
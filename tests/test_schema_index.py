@@ -0,0 +1,141 @@
+import unittest
+import json
+import os
+from schema_index import (SchemaIndex, SchemaError, ValidationError, get_schema_index,
+                          resolve_path, coerce_value)
+
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                           'config_schema.json')
+
+class TestSchemaIndex(unittest.TestCase):
+    """Test cases for the SchemaIndex class."""
+
+    def setUp(self):
+        """Set up for each test."""
+        self.schema = {
+            'tabs': {
+                'Tab1': {
+                    'groups': {
+                        'Group1': {
+                            'column': 1,
+                            'settings': [
+                                {
+                                    'label': 'Stack Size',
+                                    'file': 'database/templates/items.json',
+                                    'key_path': '_props.StackMaxSize',
+                                    'type': 'integer',
+                                    'default': 60,
+                                    'min': 1,
+                                    'max': 1000,
+                                    'complex': True
+                                },
+                                {
+                                    'id': 'bots.enabled',
+                                    'label': 'Enabled',
+                                    'file': 'configs/bot.json',
+                                    'key_path': 'bots.enabled',
+                                    'type': 'boolean',
+                                    'default': True
+                                }
+                            ]
+                        }
+                    }
+                },
+                'Tab2': {
+                    'groups': {
+                        'Group2': {
+                            'column': 1,
+                            'settings': [
+                                {
+                                    'label': 'Max Level',
+                                    'file': 'database/templates/items.json',
+                                    'key_path': 'globals.level.max',
+                                    'type': 'float',
+                                    'default': 1.5
+                                }
+                            ]
+                        }
+                    }
+                }
+            }
+        }
+
+    def test_flattened_entries(self):
+        """Test that settings are flattened in schema order and grouped by file."""
+        index = SchemaIndex(self.schema)
+        self.assertEqual([entry['id'] for entry in index.entries],
+                         ['_props.StackMaxSize', 'bots.enabled', 'globals.level.max'])
+        self.assertEqual(index.by_id['globals.level.max']['keys'], ('globals', 'level', 'max'))
+        self.assertEqual(index.by_id['globals.level.max']['tab'], 'Tab2')
+        self.assertTrue(index.by_id['_props.StackMaxSize']['complex'])
+        self.assertFalse(index.by_id['bots.enabled']['complex'])
+        self.assertEqual(list(index.by_file), ['database/templates/items.json', 'configs/bot.json'])
+        self.assertEqual([entry['id'] for entry in index.by_file['database/templates/items.json']],
+                         ['_props.StackMaxSize', 'globals.level.max'])
+        self.assertEqual(index.defaults(),
+                         {'_props.StackMaxSize': 60, 'bots.enabled': True, 'globals.level.max': 1.5})
+
+    def test_file_paths_and_cache(self):
+        """Test that file paths are resolved once per server and indexes once per schema."""
+        index = get_schema_index(self.schema)
+        self.assertIs(get_schema_index(self.schema), index)
+        base_paths = {'server_database': os.path.join('srv', 'database'),
+                      'server_config': os.path.join('srv', 'configs')}
+        file_paths = index.file_paths(base_paths)
+        self.assertEqual(file_paths['configs/bot.json'], os.path.join('srv', 'configs', 'bot.json'))
+        self.assertEqual(file_paths['database/templates/items.json'],
+                         os.path.join('srv', 'database', 'templates/items.json'))
+        self.assertIs(index.file_paths(dict(base_paths)), file_paths)
+        with self.assertRaises(ValueError):
+            resolve_path('other/file.json', base_paths)
+
+    def test_coercers(self):
+        """Test that values are coerced to their schema types."""
+        self.assertEqual(coerce_value('75', 'integer'), 75)
+        self.assertEqual(coerce_value(' 75.0 ', 'integer'), 75)
+        self.assertEqual(coerce_value('0.25', 'float'), 0.25)
+        self.assertIs(coerce_value('False', 'boolean'), False)
+        self.assertIs(coerce_value('yes', 'boolean'), True)
+        self.assertEqual(coerce_value('text', 'string'), 'text')
+        for value, value_type in (('7.5', 'integer'), (True, 'integer'), ('abc', 'float'),
+                                  ('maybe', 'boolean')):
+            with self.assertRaises(ValueError):
+                coerce_value(value, value_type)
+
+    def test_validate_reports_all_errors(self):
+        """Test that validation coerces values and reports every invalid value together."""
+        index = SchemaIndex(self.schema)
+        self.assertEqual(index.validate({'_props.StackMaxSize': '100', 'bots.enabled': 'false',
+                                         'unknown': 1}),
+                         {'_props.StackMaxSize': 100, 'bots.enabled': False})
+        with self.assertRaises(ValidationError) as context:
+            index.validate({'_props.StackMaxSize': '0', 'bots.enabled': True,
+                            'globals.level.max': 'high'})
+        errors = context.exception.errors
+        self.assertEqual([error['id'] for error in errors], ['_props.StackMaxSize', 'globals.level.max'])
+        self.assertIn('minimum of 1', errors[0]['message'])
+        self.assertEqual(errors[1]['value'], 'high')
+        self.assertIn('Stack Size', str(context.exception))
+
+    def test_duplicate_ids_are_rejected(self):
+        """Test that two settings sharing an ID make the schema invalid."""
+        settings = self.schema['tabs']['Tab2']['groups']['Group2']['settings']
+        settings.append({'label': 'Level Enabled', 'file': 'configs/bot.json',
+                         'key_path': 'globals.level.max', 'type': 'boolean', 'default': False})
+        with self.assertRaises(SchemaError) as context:
+            SchemaIndex(self.schema)
+        self.assertIn("'globals.level.max'", str(context.exception))
+        settings[-1]['id'] = 'globals.level.enabled'
+        index = SchemaIndex(self.schema)
+        self.assertEqual(index.validate({'globals.level.max': 2, 'globals.level.enabled': False}),
+                         {'globals.level.max': 2.0, 'globals.level.enabled': False})
+
+    def test_shipped_schema_has_unique_ids(self):
+        """Test that every setting of the shipped config_schema.json has its own ID."""
+        with open(SCHEMA_PATH, 'r', encoding='utf-8') as file:
+            schema = json.load(file)
+        index = SchemaIndex(schema)
+        self.assertEqual(len(index.by_id), len(index.entries))
+
+if __name__ == '__main__':
+    unittest.main()
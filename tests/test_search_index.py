@@ -0,0 +1,59 @@
+import unittest
+from schema_index import SchemaIndex
+from search_index import SearchIndex, tokenize
+
+def _setting(key_path, label, description=None, top_label=None):
+    """Return a schema setting of configs/core.json."""
+    ui_element = {'type': 'entry'}
+    if top_label is not None:
+        ui_element['top_label'] = top_label
+    return {'label': label, 'description': description, 'key_path': key_path,
+            'file': 'configs/core.json', 'type': 'integer', 'ui_element': ui_element}
+
+class TestSearchIndex(unittest.TestCase):
+    """Test cases for the search_index module."""
+
+    def setUp(self):
+        settings = [
+            _setting('Ammo._props.StackMaxSize', 'Ammo stack size', 'Max rounds per stack.'),
+            _setting('Insurance.returnChancePercent', 'Insurance return chance'),
+            _setting('Raid.timeLimit', 'Raid time', 'Minutes until the raid ends.',
+                     top_label='Raid length'),
+            _setting('Trader.stackBonus', 'Trader bonus', 'Extra stock per restock.')
+        ]
+        schema = {'tabs': {'Tab1': {'groups': {'A': {'column': 1, 'settings': settings}}}}}
+        self.index = SearchIndex(SchemaIndex(schema))
+
+    def _search(self, query, limit=None):
+        """Return the key paths of the settings matching a query."""
+        return [entry['key_path'] for entry in self.index.search(query, limit)]
+
+    def test_tokenize(self):
+        """Test that words and camelCase parts become lowercase tokens once each."""
+        self.assertEqual(tokenize('Ammo._props.StackMaxSize'),
+                         ['ammo', 'props', 'stackmaxsize', 'stack', 'max', 'size'])
+        self.assertEqual(tokenize('HTTPPort port'), ['httpport', 'http', 'port'])
+        self.assertEqual(tokenize(None), [])
+
+    def test_prefix_matching_across_fields(self):
+        """Test that every query word must be the prefix of a token of any field."""
+        self.assertEqual(self._search('insur'), ['Insurance.returnChancePercent'])
+        self.assertEqual(self._search('RETURN CHA'), ['Insurance.returnChancePercent'])
+        self.assertEqual(self._search('minutes'), ['Raid.timeLimit'])
+        self.assertEqual(self._search('length'), ['Raid.timeLimit'])
+        self.assertEqual(self._search('raid ammo'), [])
+        self.assertEqual(self._search('xyz'), [])
+        self.assertEqual(self._search('  '), [])
+
+    def test_label_matches_first_and_limit(self):
+        """Test that label matches are listed before other matches, within the limit."""
+        # 'stack' is in the label of the ammo setting but only in the key path of the trader one
+        self.assertEqual(self._search('stack'), ['Ammo._props.StackMaxSize', 'Trader.stackBonus'])
+        self.assertEqual(self._search('restock'), ['Trader.stackBonus'])
+        self.assertEqual(len(self._search('core')), 4)
+        self.assertEqual(self._search('core', limit=2),
+                         ['Ammo._props.StackMaxSize', 'Insurance.returnChancePercent'])
+        self.assertEqual(self._search('t', limit=1), ['Raid.timeLimit'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+from settings_model import SettingsModel, setting_id
+
+class TestSettingsModel(unittest.TestCase):
+    """Test cases for the SettingsModel class."""
+
+    def setUp(self):
+        """Set up for each test."""
+        self.schema = {
+            'tabs': {
+                'Tab1': {
+                    'groups': {
+                        'Group1': {
+                            'column': 1,
+                            'settings': [
+                                {
+                                    'label': 'Stack Size',
+                                    'file': 'database/test_file.json',
+                                    'key_path': 'stack',
+                                    'type': 'integer',
+                                    'default': 60,
+                                    'complex': False
+                                },
+                                {
+                                    'id': 'bots.enabled',
+                                    'label': 'Enabled',
+                                    'file': 'configs/test_file.json',
+                                    'key_path': 'enabled',
+                                    'type': 'boolean',
+                                    'default': True,
+                                    'complex': False
+                                }
+                            ]
+                        }
+                    }
+                }
+            }
+        }
+        self.model = SettingsModel(self.schema)
+
+    def test_values_are_keyed_by_setting_id(self):
+        """Test that settings are keyed by their ID, falling back to the key path."""
+        settings = self.schema['tabs']['Tab1']['groups']['Group1']['settings']
+        self.assertEqual([setting_id(setting) for setting in settings], ['stack', 'bots.enabled'])
+        self.assertEqual(self.model.values(), {'stack': 60, 'bots.enabled': True})
+        self.assertEqual(self.model.update({'unknown': 1, 'stack': 70}), ['stack'])
+        with self.assertRaises(KeyError):
+            self.model.set('unknown', 1)
+
+    def test_dirty_flags(self):
+        """Test that dirty flags track changes since the last clean state."""
+        self.assertEqual(self.model.dirty_ids(), [])
+        self.model.set('stack', '60')
+        self.assertEqual(self.model.dirty_ids(), [])
+        self.model.set('stack', '75')
+        self.model.set('bots.enabled', False)
+        self.assertEqual(self.model.dirty_ids(), ['stack', 'bots.enabled'])
+
+        self.model.mark_clean({'stack': '75'})
+        self.assertEqual(self.model.dirty_ids(), ['bots.enabled'])
+        self.model.reset_to_defaults()
+        self.assertEqual(self.model.dirty_ids(), ['stack'])
+
+    def test_subscribers_are_notified_of_changes(self):
+        """Test that subscribers receive changed values only."""
+        changes = []
+        self.model.subscribe(lambda key, value: changes.append((key, value)))
+        self.model.set('stack', 60)
+        self.model.update({'stack': 80, 'bots.enabled': True})
+        self.assertEqual(changes, [('stack', 80)])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+import os
+import json
+import threading
+from tracing import Trace, span, active_trace, add_events
+
+class TestTracing(unittest.TestCase):
+    """Test cases for the tracing module."""
+
+    def setUp(self):
+        """Set up for each test."""
+        self.trace_path = 'test_trace.json'
+
+    def tearDown(self):
+        """Clean up after each test."""
+        if os.path.exists(self.trace_path):
+            os.remove(self.trace_path)
+
+    def test_spans_nest_in_the_active_trace(self):
+        """Test that spans are recorded with their details only while a trace is active."""
+        with span('ignored'):
+            pass
+        self.assertIsNone(active_trace())
+
+        trace = Trace('apply')
+        with trace.activate():
+            self.assertIs(active_trace(), trace)
+            with span('write', file='a.json'):
+                with span('parse', file='a.json'):
+                    pass
+            with self.assertRaises(ValueError):
+                with span('mutate'):
+                    raise ValueError("bad value")
+        self.assertIsNone(active_trace())
+
+        names = [event['name'] for event in trace.events]
+        self.assertEqual(names, ['parse', 'write', 'mutate'])
+        parse, write, mutate = trace.events
+        self.assertEqual(parse['args'], {'file': 'a.json'})
+        self.assertEqual(mutate['args'], {'error': 'ValueError'})
+        self.assertGreaterEqual(parse['ts'], write['ts'])
+        self.assertLessEqual(parse['ts'] + parse['dur'], write['ts'] + write['dur'])
+        self.assertEqual(trace.summary(), ', '.join(
+            f"{name} {trace.totals()[name]:.3f}s" for name in ('parse', 'mutate', 'write')))
+
+    def test_traces_are_per_thread(self):
+        """Test that other threads do not record into a trace they did not activate."""
+        trace = Trace()
+
+        def worker():
+            with span('other'):
+                pass
+            add_events([{'name': 'lost', 'ph': 'X', 'ts': 0, 'dur': 1, 'pid': 1, 'tid': 1}])
+
+        with trace.activate():
+            thread = threading.Thread(target=worker)
+            thread.start()
+            thread.join()
+            add_events([{'name': 'worker', 'cat': 'apply', 'ph': 'X', 'ts': 0, 'dur': 2000000,
+                         'pid': os.getpid() + 1, 'tid': 1, 'args': {}}])
+        self.assertEqual([event['name'] for event in trace.events], ['worker'])
+        self.assertEqual(trace.totals(), {'worker': 2.0})
+
+    def test_export_chrome_trace(self):
+        """Test that a trace is exported as a Chrome trace-event file."""
+        trace = Trace('apply')
+        with trace.span('commit', files=2):
+            pass
+        trace.export(self.trace_path)
+
+        with open(self.trace_path, 'r', encoding='utf-8') as f:
+            document = json.load(f)
+        events = document['traceEvents']
+        self.assertEqual(events[0]['ph'], 'M')
+        self.assertEqual(events[0]['args'], {'name': 'apply'})
+        self.assertEqual(events[1]['name'], 'commit')
+        self.assertEqual(events[1]['ph'], 'X')
+        self.assertEqual(events[1]['args'], {'files': 2})
+
+if __name__ == '__main__':
+    unittest.main()
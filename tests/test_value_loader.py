@@ -0,0 +1,121 @@
+import unittest
+import os
+import json
+import shutil
+from unittest import mock
+from document_cache import DocumentCache
+from value_loader import ValueLoader, summarize_values
+
+AMMO_CATEGORY_ID = '5485a8684bdc2da71d8b4567'
+
+def _setting(label, file, key_path, value_type, **extra):
+    """Return a schema setting."""
+    setting = {'label': label, 'file': file, 'key_path': key_path, 'type': value_type,
+               'default': None, 'complex': False}
+    setting.update(extra)
+    return setting
+
+class TestValueLoader(unittest.TestCase):
+    """Test cases for the ValueLoader class."""
+
+    def setUp(self):
+        """Set up for each test."""
+        self.directory = 'value_loader_test'
+        self.paths = {'server_database': os.path.join(self.directory, 'database'),
+                      'server_config': os.path.join(self.directory, 'configs')}
+        self._write('configs/core.json', {
+            'features': {'chatbot': {'enabled': True, 'interval': '30'}},
+            'name': 'Server',
+            'maxCount': 'many'
+        })
+        self._write('database/templates/items.json', {
+            'ammo1': {'_parent': AMMO_CATEGORY_ID, '_props': {'StackMaxSize': 60}},
+            'ammo2': {'_parent': AMMO_CATEGORY_ID, '_props': {'StackMaxSize': 60}},
+            'other': {'_parent': 'some_other_parent', '_props': {'StackMaxSize': 1}},
+            'key1': {'_parent': 'keys', '_type': 'Item', '_props': {'ExaminedByDefault': True}},
+            'key2': {'_parent': 'keys', '_type': 'Item', '_props': {'ExaminedByDefault': False}},
+            'key3': {'_parent': 'keys', '_type': 'Item', '_props': {}}
+        })
+        settings = [
+            _setting('Chatbot', 'configs/core.json', 'features.chatbot.enabled', 'boolean'),
+            _setting('Interval', 'configs/core.json', 'features.chatbot.interval', 'integer'),
+            _setting('Name', 'configs/core.json', 'name', 'string', id='server.name'),
+            _setting('Max Count', 'configs/core.json', 'maxCount', 'integer'),
+            _setting('Missing', 'configs/core.json', 'features.missing', 'integer'),
+            _setting('Ammo Stack Size', 'database/templates/items.json', '_props.StackMaxSize',
+                     'integer', complex=True),
+            _setting('Keys Examined', 'database/templates/items.json', '_props.ExaminedByDefault',
+                     'boolean', complex=True, criteria={'parent': 'keys'})
+        ]
+        self.schema = {'tabs': {'Tab1': {'groups': {'Group1': {'column': 1,
+                                                               'settings': settings}}}}}
+        self.loader = ValueLoader(None, DocumentCache(), paths=self.paths)
+
+    def tearDown(self):
+        """Clean up after each test."""
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def _write(self, relative_path, document):
+        """Write a server file below the test directory."""
+        path = os.path.join(self.directory, relative_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(document, f)
+
+    def test_load_values_and_summaries(self):
+        """Test loading simple values in one traversal and summarizing complex settings."""
+        result = self.loader.load(self.schema)
+
+        # Coerced to the setting types; missing and invalid values are not loaded
+        self.assertEqual(result['values'], {
+            'features.chatbot.enabled': True,
+            'features.chatbot.interval': 30,
+            'server.name': 'Server',
+            '_props.StackMaxSize': 60
+        })
+        self.assertEqual(result['summaries']['_props.StackMaxSize'],
+                         {'records': 2, 'values': [(60, 2)]})
+        # The records disagree and one lacks the key, so only the summary is loaded
+        self.assertEqual(result['summaries']['_props.ExaminedByDefault'],
+                         {'records': 3, 'values': [(True, 1), (False, 1)]})
+        self.assertEqual(result['undetermined'], ['_props.ExaminedByDefault'])
+        self.assertEqual((result['files'], result['cached'], result['failed']), (2, 0, {}))
+
+    def test_unchanged_files_are_cached(self):
+        """Test that loading again only reads the files that changed."""
+        self.loader.load(self.schema)
+        with mock.patch.object(self.loader.document_cache, 'load',
+                               wraps=self.loader.document_cache.load) as load:
+            result = self.loader.load(self.schema)
+            load.assert_not_called()
+            self.assertEqual(result['cached'], 2)
+
+            self._write('configs/core.json', {'features': {'chatbot': {'enabled': False}},
+                                              'name': 'Renamed server'})
+            result = self.loader.load(self.schema)
+            load.assert_called_once()
+        self.assertEqual(result['cached'], 1)
+        self.assertFalse(result['values']['features.chatbot.enabled'])
+        self.assertEqual(result['values']['server.name'], 'Renamed server')
+
+    def test_failed_file_is_reported(self):
+        """Test that a missing file is reported without stopping the other files."""
+        os.remove(os.path.join(self.directory, 'database/templates/items.json'))
+        future = self.loader.load_in_background(self.schema)
+        result = future.result(timeout=10)
+
+        self.assertEqual(list(result['failed']), ['database/templates/items.json'])
+        self.assertEqual(result['files'], 1)
+        self.assertEqual(result['values']['server.name'], 'Server')
+        self.assertEqual(result['summaries'], {})
+        self.assertEqual(result['undetermined'],
+                         ['_props.StackMaxSize', '_props.ExaminedByDefault'])
+
+    def test_summarize_values(self):
+        """Test counting distinct values, keeping equal values of different types apart."""
+        self.assertEqual(summarize_values([20, 60, 60, True, 1, [1], [1]]),
+                         [(60, 2), ([1], 2), (20, 1), (True, 1), (1, 1)])
+        self.assertEqual(summarize_values([]), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+import unittest
+from virtual_settings_view import visible_range
+from layout_engine import compute_layout, layout_rows, count_settings
+
+class TestVirtualSettingsView(unittest.TestCase):
+    """Test cases for the row bookkeeping of the virtual_settings_view module."""
+
+    def test_visible_range(self):
+        """Test which rows are visible for a scroll position and view height."""
+        self.assertEqual(visible_range(0, 100, 32, 1000), (0, 4))
+        self.assertEqual(visible_range(320, 100, 32, 1000), (10, 14))
+        self.assertEqual(visible_range(330, 1, 32, 1000), (10, 11))
+        self.assertEqual(visible_range(31900, 500, 32, 1000), (996, 1000))
+        self.assertEqual(visible_range(0, 100, 32, 0), (0, 0))
+
+    def test_layout_rows(self):
+        """Test that groups are flattened into header and setting rows."""
+        settings = [
+            {'label': 'Plain', 'key_path': 'a', 'ui_element': {'type': 'entry'}},
+            {'label': 'Hidden', 'key_path': 'b', 'ui_element': {
+                'type': 'checkbox', 'top_label_visible': True, 'top_label': 'Shown',
+                'left_label_visible': False}},
+            {'label': 'No Labels', 'key_path': 'c', 'ui_element': {
+                'type': 'entry', 'left_label_visible': False}}
+        ]
+        schema = {'tabs': {'Tab1': {'groups': {
+            'Group1': {'column': 1, 'settings': settings[:2]},
+            'Group2': {'column': 2, 'settings': settings[2:]}
+        }}}}
+        groups = compute_layout(schema)['Tab1']
+        rows = layout_rows(groups)
+
+        self.assertEqual(count_settings(groups), 3)
+        self.assertEqual([(row['kind'], row['text']) for row in rows], [
+            ('group', 'Group1'), ('setting', 'Plain'), ('setting', 'Shown'),
+            ('group', 'Group2'), ('setting', 'No Labels')
+        ])
+        self.assertEqual(rows[2]['placement']['id'], 'b')
+
+if __name__ == '__main__':
+    unittest.main()
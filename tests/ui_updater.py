@@ -1,6 +1,6 @@
 import unittest
-import tkinter as tk
 from ui_updater import UIUpdater
+from settings_model import SettingsModel
 from config_manager import ConfigManager
 import os
 import json
@@ -42,15 +42,7 @@ class TestUIUpdater(unittest.TestCase):
     def setUp(self):
         """Set up for each test."""
         self.config_manager = ConfigManager(self.test_config_path, self.test_schema_path)
-        self.ui_updater = UIUpdater(self.config_manager)
-        self.settings = {
-            'key1': tk.Entry(),
-            'key2': tk.BooleanVar()
-        }
-
-    def test_initialize_with_defaults(self):
-        """Test initializing the UI with default settings."""
-        schema = {
+        self.config_manager.schema = {
             'tabs': {
                 'Tab1': {
                     'groups': {
@@ -79,18 +71,25 @@ class TestUIUpdater(unittest.TestCase):
                 }
             }
         }
-        self.config_manager.schema = schema
+        self.model = SettingsModel(self.config_manager.get_schema())
+        self.ui_updater = UIUpdater(self.config_manager, self.model)
+
+    def test_initialize_with_defaults(self):
+        """Test initializing the UI with default settings."""
+        self.model.set('key1', 'other_value')
+        self.model.set('key2', False)
 
-        self.ui_updater.initialize_with_defaults(self.settings)
-        self.assertEqual(self.settings['key1'].get(), 'default_value')
-        self.assertTrue(self.settings['key2'].get())
+        self.ui_updater.initialize_with_defaults()
+        self.assertEqual(self.model.get('key1'), 'default_value')
+        self.assertTrue(self.model.get('key2'))
+        self.assertEqual(self.model.dirty_ids(), [])
 
     def test_capture_ui_state(self):
         """Test capturing the current state of the UI."""
-        self.settings['key1'].insert(0, 'current_value')
-        self.settings['key2'].set(False)
+        self.model.set('key1', 'current_value')
+        self.model.set('key2', False)
 
-        state = self.ui_updater.capture_ui_state(self.settings)
+        state = self.ui_updater.capture_ui_state()
         self.assertEqual(state['key1'], 'current_value')
         self.assertFalse(state['key2'])
 
@@ -101,9 +100,36 @@ class TestUIUpdater(unittest.TestCase):
             'key2': True
         }
 
-        self.ui_updater.update_ui_with_preset(self.settings, changes)
-        self.assertEqual(self.settings['key1'].get(), 'preset_value')
-        self.assertTrue(self.settings['key2'].get())
+        self.ui_updater.update_ui_with_preset(changes)
+        self.assertEqual(self.model.get('key1'), 'preset_value')
+        self.assertTrue(self.model.get('key2'))
+
+    def test_load_current_values(self):
+        """Test that loaded file values become the clean state without losing edits."""
+        self.model.set('key2', False)  # Edited while the files were being read
+
+        changed = self.ui_updater.load_current_values({'key1': 'file_value', 'key2': True})
+        self.assertEqual(changed, ['key1'])
+        self.assertEqual(self.model.get('key1'), 'file_value')
+        self.assertFalse(self.model.get('key2'))
+        self.assertEqual(self.model.dirty_ids(), ['key2'])
+
+    def test_undetermined_settings_are_not_applied(self):
+        """Test that undetermined settings are only applied once the user sets them."""
+        self.ui_updater.load_current_values({'key1': 'file_value'}, undetermined=['key2'])
+        self.assertEqual(self.ui_updater.capture_apply_values(), {'key1': 'file_value'})
+        self.assertIn('key2', self.ui_updater.capture_ui_state())
+
+        self.model.set('key2', False)
+        values = self.ui_updater.capture_apply_values()
+        self.assertEqual(values, {'key1': 'file_value', 'key2': False})
+        self.ui_updater.mark_applied(values)
+        self.model.set('key2', True)
+        self.assertIn('key2', self.ui_updater.capture_apply_values())
+
+        self.ui_updater.load_current_values({}, undetermined=['key2'])
+        self.ui_updater.update_ui_with_preset({'key2': True})
+        self.assertIn('key2', self.ui_updater.capture_apply_values())
 
 if __name__ == '__main__':
     unittest.main()
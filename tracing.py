@@ -0,0 +1,248 @@
+"""
+Module providing lightweight timing spans for the load, mutate and write hot paths.
+
+Code marks a region with `with span('parse', file=path):`. Spans are only recorded while a Trace
+is active on the current thread, so instrumented code costs next to nothing otherwise. Spans nest:
+a span opened inside another one is recorded as its child, which Chrome's trace viewer
+(chrome://tracing or https://ui.perfetto.dev) shows as a flame chart.
+
+A Trace collects the spans of one operation, such as an apply, from the thread that activated it.
+Worker processes record into their own Trace and hand its events back with add_events().
+
+Classes:
+    Trace: Collects the timing spans of one operation.
+
+Functions:
+    span(name, category='apply', **args): Returns a context manager recording a span in the active trace.
+    active_trace(): Returns the Trace active on the current thread, or None.
+    add_events(events): Adds events recorded elsewhere to the active trace.
+
+Methods (Trace class):
+    __init__(self, name='trace'): Initializes an empty trace.
+    activate(self): Returns a context manager making the trace active on the current thread.
+    span(self, name, category='apply', **args): Returns a context manager recording a span.
+    record(self, name, category, started_ns, duration_ns, args=None): Records a finished span.
+    add_events(self, events): Adds events recorded elsewhere, e.g. in a worker process.
+    totals(self): Returns the total seconds spent per span name.
+    summary(self, names=SUMMARY_SPANS): Formats the totals of the main phases as one line.
+    to_chrome(self): Returns the trace as a Chrome trace-event document.
+    export(self, path): Writes the trace as a Chrome trace-event JSON file.
+"""
+
+import json
+import os
+import threading
+import time
+
+# The phases shown by Trace.summary(), in the order they happen during an apply
+SUMMARY_SPANS = ('organize', 'parse', 'mutate', 'write', 'backup', 'commit')
+
+_local = threading.local()
+
+class _Span:
+    """
+    Context manager recording one span into a trace.
+    """
+
+    __slots__ = ('trace', 'name', 'category', 'args', 'started')
+
+    def __init__(self, trace, name, category, args):
+        self.trace = trace
+        self.name = name
+        self.category = category
+        self.args = args
+        self.started = 0
+
+    def __enter__(self):
+        self.started = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        finished = time.perf_counter_ns()
+        if exc_type is not None:
+            self.args['error'] = exc_type.__name__
+        self.trace.record(self.name, self.category, self.started, finished - self.started,
+                          self.args)
+        return False
+
+class _NullSpan:
+    """
+    Context manager used when no trace is active; it records nothing.
+    """
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+class Trace:
+    """
+    Collects the timing spans of one operation.
+
+    Events are stored in Chrome's complete-event format: 'name', 'cat', 'ph' ('X'), 'ts' and
+    'dur' in microseconds, 'pid', 'tid' and 'args'.
+    """
+
+    def __init__(self, name='trace'):
+        """
+        Initializes an empty trace.
+
+        :param name: The name of the traced operation, shown as the process name in the viewer.
+        """
+        self.name = name
+        self.events = []
+        self._lock = threading.Lock()
+
+    def activate(self):
+        """
+        Returns a context manager making the trace active on the current thread.
+
+        The previously active trace is restored on exit, so activations nest.
+
+        :return: A context manager.
+        """
+        return _Activation(self)
+
+    def span(self, name, category='apply', **args):
+        """
+        Returns a context manager recording a span, whether or not the trace is active.
+
+        :param name: The span name, e.g. 'parse'.
+        :param category: The span category.
+        :param args: Additional details shown with the span, e.g. the file.
+        :return: A context manager.
+        """
+        return _Span(self, name, category, args)
+
+    def record(self, name, category, started_ns, duration_ns, args=None):
+        """
+        Records a finished span.
+
+        :param name: The span name.
+        :param category: The span category.
+        :param started_ns: The start time from time.perf_counter_ns().
+        :param duration_ns: The duration in nanoseconds.
+        :param args: Additional details shown with the span.
+        """
+        event = {'name': name, 'cat': category, 'ph': 'X', 'ts': started_ns / 1000,
+                 'dur': duration_ns / 1000, 'pid': os.getpid(), 'tid': threading.get_ident(),
+                 'args': args or {}}
+        with self._lock:
+            self.events.append(event)
+
+    def add_events(self, events):
+        """
+        Adds events recorded elsewhere, e.g. in a worker process.
+
+        :param events: A list of events in the format of Trace.events.
+        """
+        with self._lock:
+            self.events.extend(events)
+
+    def totals(self):
+        """
+        Returns the total seconds spent per span name.
+
+        Spans of the same name on parallel workers are added up, so a total can exceed the
+        wall time of the operation.
+
+        :return: A dictionary mapping span names to seconds.
+        """
+        totals = {}
+        with self._lock:
+            for event in self.events:
+                totals[event['name']] = totals.get(event['name'], 0.0) + event['dur'] / 1e6
+        return totals
+
+    def summary(self, names=SUMMARY_SPANS):
+        """
+        Formats the totals of the main phases as one line, e.g. for a status bar.
+
+        :param names: The span names to include, in order; names never recorded are left out.
+        :return: A line such as "parse 0.412s, mutate 0.051s, write 0.230s".
+        """
+        totals = self.totals()
+        return ', '.join(f"{name} {totals[name]:.3f}s" for name in names if name in totals)
+
+    def to_chrome(self):
+        """
+        Returns the trace as a Chrome trace-event document.
+
+        :return: A dictionary with the 'traceEvents' and their 'displayTimeUnit'.
+        """
+        with self._lock:
+            events = sorted(self.events, key=lambda event: event['ts'])
+        processes = {event['pid'] for event in events}
+        metadata = [{'name': 'process_name', 'ph': 'M', 'pid': pid, 'tid': 0,
+                     'args': {'name': self.name if pid == os.getpid() else f"{self.name} worker"}}
+                    for pid in sorted(processes)]
+        return {'traceEvents': metadata + events, 'displayTimeUnit': 'ms'}
+
+    def export(self, path):
+        """
+        Writes the trace as a Chrome trace-event JSON file.
+
+        :param path: The file to write.
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(self.to_chrome(), file)
+
+class _Activation:
+    """
+    Context manager making a trace active on the current thread.
+    """
+
+    def __init__(self, trace):
+        self.trace = trace
+        self.previous = None
+
+    def __enter__(self):
+        self.previous = getattr(_local, 'trace', None)
+        _local.trace = self.trace
+        return self.trace
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _local.trace = self.previous
+        return False
+
+def active_trace():
+    """
+    Returns the Trace active on the current thread.
+
+    :return: The active Trace, or None.
+    """
+    return getattr(_local, 'trace', None)
+
+def span(name, category='apply', **args):
+    """
+    Returns a context manager recording a span in the trace active on the current thread.
+
+    Without an active trace the returned context manager does nothing.
+
+    :param name: The span name, e.g. 'parse'.
+    :param category: The span category.
+    :param args: Additional details shown with the span, e.g. the file.
+    :return: A context manager.
+    """
+    trace = getattr(_local, 'trace', None)
+    if trace is None:
+        return _NULL_SPAN
+    return _Span(trace, name, category, args)
+
+def add_events(events):
+    """
+    Adds events recorded elsewhere to the trace active on the current thread, if any.
+
+    :param events: A list of events in the format of Trace.events.
+    """
+    trace = getattr(_local, 'trace', None)
+    if trace is not None and events:
+        trace.add_events(events)
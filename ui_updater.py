@@ -1,15 +1,28 @@
 """
-This module provides the UIUpdater class to handle updating and capturing the state of a Tkinter UI
-based on a given configuration.
+This module provides the UIUpdater class to keep a Tkinter UI and the SettingsModel in sync.
+
+The model holds every setting's value; UIUpdater binds the Tk variables of built widgets to it in
+both directions, so editing a widget updates the model and loading defaults or a preset into the
+model updates any widget showing the setting.
+
+Complex settings whose current value could not be read from the server files, e.g. because their
+records hold different values, are undetermined: the UI shows their default, but
+capture_apply_values() leaves them out until the user sets them, so an apply does not overwrite
+the records with that default.
 
 Classes:
-    UIUpdater: Handles updating and capturing the state of a Tkinter UI based on a given configuration.
+    UIUpdater: Keeps the Tk variables of a UI and a SettingsModel in sync.
 
 Methods (UIUpdater class):
-    __init__(self, config_manager): Initialize the UIUpdater with a configuration manager.
-    initialize_with_defaults(self, settings): Initialize the UI with default settings from the configuration schema.
-    capture_ui_state(self, settings): Capture the current state of the UI.
-    update_ui_with_preset(self, settings, changes): Update the UI with a given preset of changes.
+    __init__(self, config_manager, model): Initialize the UIUpdater with a configuration manager and a settings model.
+    bind_variable(self, key, variable): Bind a Tk variable to a setting of the model.
+    unbind_variable(self, key, variable): Stop syncing a Tk variable with a setting.
+    initialize_with_defaults(self): Initialize the model and bound widgets with the schema defaults.
+    load_current_values(self, values, undetermined=()): Update the model and bound widgets with the values held by the server files.
+    capture_ui_state(self): Capture the current values of all settings.
+    capture_apply_values(self): Capture the values to apply, leaving out unedited undetermined settings.
+    mark_applied(self, values): Record applied values as the clean state.
+    update_ui_with_preset(self, changes): Update the model and bound widgets with a preset of changes.
 """
 
 import logging
@@ -17,62 +30,153 @@ import tkinter as tk
 
 class UIUpdater:
     """
-    Class to handle updating and capturing the state of a Tkinter UI based on a given configuration.
+    Class to keep the Tk variables of a UI and a SettingsModel in sync.
     """
-    def __init__(self, config_manager):
+    def __init__(self, config_manager, model):
         """
-        Initialize the UIUpdater with a configuration manager.
+        Initialize the UIUpdater with a configuration manager and a settings model.
 
         :param config_manager: The configuration manager to use for schema retrieval.
+        :param model: The SettingsModel holding the setting values.
         """
         self.config_manager = config_manager
+        self.model = model
+        self.variables = {}
+        self.undetermined = set()
+        self._trace_ids = {}
+        model.subscribe(self._on_model_change)
+
+    def bind_variable(self, key, variable):
+        """
+        Bind a Tk variable to a setting of the model.
+
+        The variable is set to the model's value; later writes to it update the model.
+
+        :param key: The ID of the setting.
+        :param variable: A Tkinter BooleanVar or StringVar.
+        """
+        self.variables.setdefault(key, []).append(variable)
+        self._set_value(variable, self.model.get(key))
+        self._trace_ids[(key, str(variable))] = variable.trace_add(
+            'write', lambda *_: self._on_variable_write(key, variable)
+        )
+
+    def unbind_variable(self, key, variable):
+        """
+        Stop syncing a Tk variable with a setting, e.g. before a recycled widget shows another one.
+
+        :param key: The ID of the setting.
+        :param variable: A Tkinter variable bound with bind_variable().
+        """
+        trace_id = self._trace_ids.pop((key, str(variable)), None)
+        if trace_id is None:
+            return
+        variable.trace_remove('write', trace_id)
+        self.variables[key].remove(variable)
+
+    def _on_variable_write(self, key, variable):
+        """
+        Copy a written Tk variable's value into the model.
+        """
+        try:
+            self.model.set(key, variable.get())
+        except tk.TclError as e:
+            logging.debug("Ignoring unreadable value for %s: %s", key, e)
+
+    def _on_model_change(self, key, value):
+        """
+        Copy a changed model value into the Tk variables bound to it.
+        """
+        for variable in self.variables.get(key, []):
+            self._set_value(variable, value)
 
-    def initialize_with_defaults(self, settings):
+    def initialize_with_defaults(self):
         """
-        Initialize the UI with default settings from the configuration schema.
+        Initialize the model and bound widgets with the default settings from the schema.
+        """
+        logging.debug("Setting %d setting(s) to their defaults", len(self.model.settings))
+        self.model.reset_to_defaults()
+        self.model.mark_clean()
 
-        :param settings: A dictionary of Tkinter widgets keyed by their setting paths.
+    def load_current_values(self, values, undetermined=()):
         """
-        schema = self.config_manager.get_schema()
-        for tab_data in schema['tabs'].values():
-            for group_data in tab_data['groups'].values():
-                for setting in group_data['settings']:
-                    default_value = setting.get('default', None)
-                    key_path = setting['key_path']
-                    logging.debug("Setting default for %s to %s", key_path, default_value)
-                    if key_path in settings:
-                        if isinstance(settings[key_path], tk.Entry):
-                            settings[key_path].delete(0, 'end')
-                            settings[key_path].insert(0, str(default_value))  # Ensure the value is a string
-                        elif isinstance(settings[key_path], tk.BooleanVar):
-                            settings[key_path].set(default_value)
+        Update the model and bound widgets with the values currently held by the server files.
+
+        The loaded values become the clean state, so only later edits count as unapplied
+        changes. Settings edited while the files were being read keep their edited value.
 
-    def capture_ui_state(self, settings):
+        :param values: A dictionary of values keyed by setting ID, e.g. from ValueLoader.load().
+        :param undetermined: The IDs of the settings whose current value could not be read, e.g.
+                             the 'undetermined' list from ValueLoader.load().
+        :return: The list of setting IDs whose value changed.
         """
-        Capture the current state of the UI.
+        self.undetermined = set(undetermined)
+        edited = set(self.model.dirty_ids())
+        changed = self.model.update({key: value for key, value in values.items()
+                                     if key not in edited})
+        self.model.mark_clean({key: value for key, value in values.items()
+                               if key in self.model.settings})
+        logging.debug("Loaded %d current value(s), %d differed from the UI", len(values),
+                      len(changed))
+        return changed
+
+    def capture_ui_state(self):
+        """
+        Capture the current values of all settings, including those of tabs never displayed.
+
+        :return: A dictionary of plain values keyed by setting ID.
+        """
+        return self.model.values()
+
+    def capture_apply_values(self):
+        """
+        Capture the values to apply, leaving out undetermined settings the user has not set.
+
+        :return: A dictionary of plain values keyed by setting ID.
+        """
+        skipped = {key for key in self.undetermined if not self.model.is_dirty(key)}
+        if skipped:
+            logging.info("Not applying %d setting(s) whose current value is unknown: %s",
+                         len(skipped), ', '.join(sorted(map(str, skipped))))
+        return {key: value for key, value in self.model.values().items() if key not in skipped}
+
+    def mark_applied(self, values):
+        """
+        Record applied values as the clean state; their settings are no longer undetermined.
+
+        :param values: The values just applied, keyed by setting ID.
+        """
+        self.model.mark_clean(values)
+        self.undetermined.difference_update(values)
+
+    def update_ui_with_preset(self, changes):
+        """
+        Update the model and bound widgets with a given preset of changes.
+
+        A preset sets its values explicitly, so they are applied even if they equal the value
+        an undetermined setting already shows.
 
-        :param settings: A dictionary of Tkinter widgets keyed by their setting paths.
-        :return: A dictionary representing the captured state.
+        :param changes: A dictionary of values keyed by setting ID.
+        :return: The list of setting IDs whose value changed.
         """
-        changes = {}
-        for key_path, widget in settings.items():
-            if isinstance(widget, tk.Entry):
-                changes[key_path] = widget.get()
-            elif isinstance(widget, tk.BooleanVar):
-                changes[key_path] = widget.get()
-        return changes
+        self.undetermined.difference_update(changes)
+        return self.model.update(changes)
 
-    def update_ui_with_preset(self, settings, changes):
+    @staticmethod
+    def _set_value(variable, value):
         """
-        Update the UI with a given preset of changes.
+        Set a Tk variable to a value unless it already shows it.
 
-        :param settings: A dictionary of Tkinter widgets keyed by their setting paths.
-        :param changes: A dictionary of changes to apply to the UI.
+        :param variable: A Tkinter BooleanVar or StringVar.
+        :param value: The value to set.
         """
-        for key_path, new_value in changes.items():
-            if key_path in settings:
-                if isinstance(settings[key_path], tk.Entry):
-                    settings[key_path].delete(0, 'end')
-                    settings[key_path].insert(0, str(new_value))  # Ensure the value is a string
-                elif isinstance(settings[key_path], tk.BooleanVar):
-                    settings[key_path].set(new_value)
+        if isinstance(variable, tk.BooleanVar):
+            value = bool(value)
+        else:
+            value = '' if value is None else str(value)  # Ensure the value is a string
+        try:
+            if variable.get() == value:
+                return
+        except tk.TclError:
+            pass
+        variable.set(value)
@@ -0,0 +1,229 @@
+"""
+Module loading the current value of every setting from the server files.
+
+The GUI used to start from the schema defaults, so applying right after startup silently
+overwrote whatever the server files held. ValueLoader reads every target file once through the
+document cache and looks up the key paths of all its simple settings in one traversal of the
+file's KeyPathTrie, which the SchemaIndex compiles once. Complex settings target many records, so
+they get a summary of the distinct values across those records instead, e.g. the StackMaxSize of
+every ammo item; their value is only loaded when all records agree. The complex settings without
+a loaded value are listed as undetermined, so the GUI does not write their default over records
+it could not read.
+
+Files are read in parallel on a thread pool. The values read from a file are kept together with
+its (st_mtime_ns, st_size) signature, so loading again, e.g. after an apply, only reads the files
+that changed since.
+
+Classes:
+    ValueLoader: Reads the current value of every setting from the server files.
+
+Functions:
+    summarize_values(values): Counts the distinct values of a complex setting's records.
+
+Methods (ValueLoader class):
+    __init__(self, config_manager, document_cache=None, workers=None, paths=None): Initializes the loader.
+    load(self, schema): Reads the current value of every setting from its file.
+    load_file(self, index, relative_path, file_path): Reads the current values of one file's settings.
+    load_in_background(self, schema): Runs load() on a background thread.
+"""
+
+import json
+import logging
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from complex_config_handler import ComplexConfigHandler
+from document_cache import get_document_cache
+from item_template_index import ItemTemplateIndex
+from schema_index import get_schema_index
+from tracing import span
+
+# Files read at the same time by load()
+DEFAULT_WORKERS = 4
+
+def summarize_values(values):
+    """
+    Counts the distinct values of a complex setting's records.
+
+    :param values: The values of the records, e.g. from read_complex_values().
+    :return: A list of (value, number of records) tuples, most common first and otherwise in
+             order of appearance. Values of different types, such as 1 and True, are kept apart.
+    """
+    counts = {}
+    for value in values:
+        try:
+            key = (type(value), value)
+            hash(key)
+        except TypeError:
+            key = (type(value), json.dumps(value, sort_keys=True))
+        if key in counts:
+            counts[key][1] += 1
+        else:
+            counts[key] = [value, 1]
+    return sorted(((value, count) for value, count in counts.values()),
+                  key=lambda item: -item[1])
+
+class ValueLoader:
+    """
+    Reads the current value of every setting from the server files.
+    """
+
+    def __init__(self, config_manager, document_cache=None, workers=None, paths=None):
+        """
+        Initializes the loader.
+
+        :param config_manager: The configuration manager holding the server paths.
+        :param document_cache: The DocumentCache to read files through; defaults to the
+                               process-wide cache.
+        :param workers: The number of files read at the same time; defaults to DEFAULT_WORKERS.
+        :param paths: A dictionary with the 'server_database' and 'server_config' directories to
+                      read; defaults to the 'paths' section.
+        """
+        self.config_manager = config_manager
+        self.document_cache = document_cache or get_document_cache()
+        self.workers = workers or DEFAULT_WORKERS
+        self.paths = paths
+        # Only selects records, so it needs neither the configuration nor a backup store
+        self.complex_handler = ComplexConfigHandler(None, self.document_cache)
+        # Resolved file path -> (file signature, SchemaIndex, result of load_file())
+        self._results = {}
+        self._lock = threading.Lock()
+
+    def _base_paths(self):
+        """
+        Return the server directories to read.
+
+        :return: A dictionary with the 'server_database' and 'server_config' directories.
+        """
+        if self.paths is not None:
+            return self.paths
+        return {name: self.config_manager.get_setting(f'paths.{name}')
+                for name in ('server_database', 'server_config')}
+
+    def load(self, schema):
+        """
+        Reads the current value of every setting from its file.
+
+        A file that is missing or cannot be parsed is reported and skipped; the settings of the
+        other files are still loaded.
+
+        :param schema: The schema defining the settings.
+        :return: A dictionary with the loaded 'values' keyed by setting ID in schema order, the
+                 'summaries' of complex settings keyed by setting ID (each with the number of
+                 targeted 'records' and the distinct 'values' from summarize_values()), the number
+                 of 'files' read and of those 'cached' from an earlier load, and the error message
+                 of every file that could not be read under 'failed'. A setting whose key path is
+                 missing, whose value does not match its type, or whose records disagree has no
+                 loaded value; the IDs of the complex settings among them are listed in schema
+                 order under 'undetermined'.
+        """
+        index = get_schema_index(schema)
+        result = {'values': {}, 'summaries': {}, 'files': 0, 'cached': 0, 'failed': {},
+                  'undetermined': []}
+        with span('load_values', 'startup', files=len(index.by_file)):
+            self.complex_handler.prepare(schema)
+            file_paths = index.file_paths(self._base_paths())
+            workers = min(self.workers, len(file_paths)) or 1
+            with ThreadPoolExecutor(max_workers=workers,
+                                    thread_name_prefix='ValueLoader') as executor:
+                futures = {
+                    relative_path: executor.submit(self.load_file, index, relative_path,
+                                                   file_paths[relative_path])
+                    for relative_path in index.by_file
+                }
+            loaded = {}
+            for relative_path, future in futures.items():
+                try:
+                    values, summaries, cached = future.result()
+                except (OSError, ValueError) as e:
+                    logging.warning("Could not read current values from %s: %s", relative_path, e)
+                    result['failed'][relative_path] = str(e)
+                    continue
+                loaded.update(values)
+                result['summaries'].update(summaries)
+                result['files'] += 1
+                result['cached'] += cached
+            result['values'] = {entry['id']: loaded[entry['id']] for entry in index.entries
+                                if entry['id'] in loaded}
+            result['undetermined'] = [entry['id'] for entry in index.entries
+                                      if entry['complex'] and entry['id'] not in loaded]
+
+        logging.info("Loaded %d current value(s) from %d file(s) (%d cached), %d file(s) failed",
+                     len(result['values']), result['files'], result['cached'],
+                     len(result['failed']))
+        return result
+
+    def load_file(self, index, relative_path, file_path):
+        """
+        Reads the current values of one file's settings.
+
+        :param index: The SchemaIndex of the schema.
+        :param relative_path: The file path from the schema.
+        :param file_path: The resolved path of the file.
+        :return: A tuple of the loaded values keyed by setting ID, the summaries of its complex
+                 settings keyed by setting ID, and whether the result was reused from an earlier
+                 load of the unchanged file.
+        :raises OSError: If the file cannot be read.
+        :raises ValueError: If the file is not valid JSON.
+        """
+        stat = os.stat(file_path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            cached = self._results.get(file_path)
+        if cached is not None and cached[0] == signature and cached[1] is index:
+            return cached[2][0], cached[2][1], True
+
+        data = self.document_cache.load(file_path)
+        values = {}
+        summaries = {}
+        for key, value in index.key_path_trie(relative_path).read(data).items():
+            self._store_value(values, index.by_id[key], value)
+
+        item_index = None
+        for entry in index.by_file[relative_path]:
+            if not entry['complex']:
+                continue
+            if item_index is None:
+                item_index = ItemTemplateIndex(data)
+            try:
+                records, record_values = self.complex_handler.read_complex_values(
+                    data, entry['setting'], item_index)
+            except ValueError as e:
+                logging.debug("Not loading %s: %s", entry['id'], e)
+                continue
+            distinct = summarize_values(record_values)
+            summaries[entry['id']] = {'records': records, 'values': distinct}
+            if len(distinct) == 1 and distinct[0][1] == records:
+                self._store_value(values, entry, distinct[0][0])
+
+        with self._lock:
+            self._results[file_path] = (signature, index, (values, summaries))
+        return values, summaries, False
+
+    @staticmethod
+    def _store_value(values, entry, value):
+        """Store a value read from a file, coerced to its setting's type, unless it is invalid."""
+        try:
+            values[entry['id']] = entry['coerce'](value)
+        except ValueError as e:
+            logging.debug("Not loading %s from its file: %s", entry['id'], e)
+
+    def load_in_background(self, schema):
+        """
+        Runs load() on a background thread, so the Tk event loop never waits for the files.
+
+        :param schema: The schema defining the settings.
+        :return: A concurrent.futures.Future holding the result of load() or its exception.
+        """
+        future = Future()
+
+        def run():
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                future.set_result(self.load(schema))
+            except Exception as e:  # pylint: disable=broad-except
+                future.set_exception(e)
+
+        threading.Thread(target=run, name="ValueLoader", daemon=True).start()
+        return future
@@ -0,0 +1,226 @@
+"""
+virtual_settings_view.py
+
+This module provides the VirtualSettingsView class, a scrolling list of settings that only creates
+widgets for the rows currently visible.
+
+A tab with hundreds of settings used to create every label and input widget up front and to
+measure them all (bbox("all")) on every resize. VirtualSettingsView instead lays its rows out at a
+fixed height, so the scroll region is computed from the row count, and keeps a small pool of row
+widgets that are moved and rebound to other settings as the view scrolls. Values are read from and
+written to the SettingsModel through the UIUpdater, so the widget count, memory and redraw cost
+stay constant regardless of the number of settings in the tab.
+
+Classes:
+    VirtualSettingsView: Scrolling single-column list of settings with recycled row widgets.
+
+Functions:
+    visible_range(top, height, row_height, row_count): Returns the indices of the visible rows.
+
+Methods (VirtualSettingsView class):
+    __init__(self, parent, rows, ui_updater, row_height=ROW_HEIGHT): Creates the view for a tab's rows.
+    refresh(self): Shows the rows in the visible part of the list, recycling row widgets.
+    yview_scroll(self, number, what): Scrolls the list, e.g. from the mouse wheel.
+    scroll_to(self, index): Scrolls the list so that a row is visible.
+    show_setting(self, key): Scrolls to a setting and focuses its input widget.
+"""
+
+import tkinter as tk
+from tkinter import font as tkfont
+from tooltip import Tooltip
+
+ROW_HEIGHT = 32
+LABEL_WIDTH = 45
+
+def visible_range(top, height, row_height, row_count):
+    """
+    Returns the indices of the rows that are at least partly visible.
+
+    :param top: The canvas y coordinate at the top of the view.
+    :param height: The height of the view in pixels.
+    :param row_height: The height of every row in pixels.
+    :param row_count: The number of rows.
+    :return: A (first, last) tuple; rows first to last - 1 are visible.
+    """
+    first = max(0, int(top // row_height))
+    last = min(row_count, int((top + height) // row_height) + 1)
+    return first, max(first, last)
+
+class _RowWidgets:
+    """
+    The widgets of one pooled row, rebound to whichever row it currently shows.
+    """
+
+    def __init__(self, view):
+        self.view = view
+        self.frame = tk.Frame(view.canvas, height=view.row_height)
+        self.frame.pack_propagate(False)
+        self.label = tk.Label(self.frame, anchor="w", width=LABEL_WIDTH)
+        self.label.pack(side="left", padx=5)
+        self.tooltip = Tooltip(self.label, '')
+        self.string_var = tk.StringVar(view)
+        self.boolean_var = tk.BooleanVar(view)
+        self.entry = tk.Entry(self.frame, textvariable=self.string_var)
+        self.checkbox = tk.Checkbutton(self.frame, variable=self.boolean_var)
+        self.window = view.canvas.create_window(0, 0, window=self.frame, anchor="nw",
+                                                width=view.canvas.winfo_width())
+        self.default_font = self.label.cget("font")
+        self.bound = None
+
+    def show(self, index, row):
+        """
+        Moves the row widgets to a row and binds them to its setting.
+        """
+        self.unbind()
+        self.view.canvas.coords(self.window, 0, index * self.view.row_height)
+        self.label.config(text=row['text'])
+        self.entry.pack_forget()
+        self.checkbox.pack_forget()
+        if row['kind'] == 'group':
+            self.label.config(font=self.view.header_font)
+            self.tooltip.text = ''
+            return
+        self.label.config(font=self.default_font)
+        placement = row['placement']
+        self.tooltip.text = placement['description'] or ''
+        widget = placement['widget']
+        if widget['type'] == 'entry':
+            variable = self.string_var
+            self.entry.config(width=widget['width'])
+            self.entry.pack(side="left", padx=5)
+        elif widget['type'] == 'checkbox':
+            variable = self.boolean_var
+            self.checkbox.pack(side="left", padx=5)
+        else:
+            return
+        self.view.ui_updater.bind_variable(placement['id'], variable)
+        self.bound = (placement['id'], variable)
+
+    def hide(self):
+        """
+        Unbinds the row widgets and moves them above the scroll region until they are reused.
+        """
+        self.unbind()
+        self.view.canvas.coords(self.window, 0, -2 * self.view.row_height)
+
+    def focus(self):
+        """
+        Focuses the input widget of the row, if it shows one.
+        """
+        if self.entry.winfo_manager():
+            self.entry.focus_set()
+        elif self.checkbox.winfo_manager():
+            self.checkbox.focus_set()
+
+    def unbind(self):
+        """
+        Stops syncing the row's variable with the setting it showed.
+        """
+        if self.bound is not None:
+            self.view.ui_updater.unbind_variable(*self.bound)
+            self.bound = None
+
+class VirtualSettingsView(tk.Frame):
+    """
+    Scrolling single-column list of settings with recycled row widgets.
+    """
+
+    def __init__(self, parent, rows, ui_updater, row_height=ROW_HEIGHT):
+        """
+        Creates the view for a tab's rows.
+
+        :param parent: The parent widget.
+        :param rows: The rows from layout_engine.layout_rows().
+        :param ui_updater: The UIUpdater syncing row variables with the SettingsModel.
+        :param row_height: The height of every row in pixels.
+        """
+        super().__init__(parent)
+        self.rows = rows
+        self.ui_updater = ui_updater
+        self.row_height = row_height
+        self.header_font = tkfont.nametofont("TkDefaultFont").copy()
+        self.header_font.configure(weight="bold")
+        self.canvas = tk.Canvas(self, highlightthickness=0)
+        self.scrollbar = tk.Scrollbar(self, orient="vertical", command=self.canvas.yview)
+        self.canvas.configure(yscrollcommand=self._on_view_changed,
+                              scrollregion=(0, 0, 0, len(rows) * row_height),
+                              yscrollincrement=row_height)
+        self.canvas.pack(side="left", fill="both", expand=True)
+        self.scrollbar.pack(side="right", fill="y")
+        self.canvas.bind("<Configure>", self._on_configure)
+
+        # Setting ID -> row index
+        self.row_indices = {row['placement']['id']: index for index, row in enumerate(rows)
+                            if row['kind'] == 'setting'}
+        # Row index -> the pooled row widgets showing it
+        self.shown = {}
+        self.free = []
+
+    def _on_view_changed(self, first, last):
+        """
+        Updates the scrollbar and the shown rows whenever the canvas view moves.
+        """
+        self.scrollbar.set(first, last)
+        self.refresh()
+
+    def _on_configure(self, event):
+        """
+        Stretches the rows to the new width and shows the rows of the new height.
+        """
+        for row_widgets in list(self.shown.values()) + self.free:
+            self.canvas.itemconfigure(row_widgets.window, width=event.width)
+        self.refresh()
+
+    def refresh(self):
+        """
+        Shows the rows in the visible part of the list, recycling row widgets.
+
+        Rows that scrolled out of view release their widgets, which are then moved to the rows
+        that scrolled into view; rows that stay visible keep theirs untouched.
+        """
+        first, last = visible_range(self.canvas.canvasy(0), self.canvas.winfo_height(),
+                                    self.row_height, len(self.rows))
+        for index in [index for index in self.shown if not first <= index < last]:
+            row_widgets = self.shown.pop(index)
+            row_widgets.hide()
+            self.free.append(row_widgets)
+        for index in range(first, last):
+            if index in self.shown:
+                continue
+            row_widgets = self.free.pop() if self.free else _RowWidgets(self)
+            row_widgets.show(index, self.rows[index])
+            self.shown[index] = row_widgets
+
+    def yview_scroll(self, number, what):
+        """
+        Scrolls the list, e.g. from the mouse wheel.
+
+        :param number: The number of units or pages to scroll.
+        :param what: "units" or "pages".
+        """
+        self.canvas.yview_scroll(number, what)
+
+    def scroll_to(self, index):
+        """
+        Scrolls the list so that a row is visible.
+
+        :param index: The index of the row.
+        """
+        if self.rows:
+            self.canvas.yview_moveto(index / len(self.rows))
+
+    def show_setting(self, key):
+        """
+        Scrolls to a setting and focuses its input widget.
+
+        :param key: The ID of the setting.
+        :return: True if the setting is listed in this view.
+        """
+        index = self.row_indices.get(key)
+        if index is None:
+            return False
+        self.scroll_to(index)
+        self.refresh()
+        if index in self.shown:
+            self.shown[index].focus()
+        return True